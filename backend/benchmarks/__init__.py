@@ -0,0 +1,10 @@
+"""ベンチマークスイート
+
+変換パイプラインの各ステージを個別に計測し、結果をJSONベースラインと比較します。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks run --output .benchmarks/baseline.json
+    python -m benchmarks run --output .benchmarks/latest.json
+    python -m benchmarks compare .benchmarks/baseline.json .benchmarks/latest.json --threshold 0.1
+"""
@@ -0,0 +1,97 @@
+"""ベンチマークCLI
+
+backendディレクトリで ``python -m benchmarks --help`` を実行してください。
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from .corpus import KINDS
+from .runner import (
+    build_report,
+    compare_reports,
+    format_comparison_table,
+    format_results_table,
+    load_report,
+    measure,
+    save_report,
+)
+from .stages import FORMATS, QUICK_SIZES, SIZES, STAGES, iter_stage_benchmarks
+
+DEFAULT_OUTPUT = Path(".benchmarks/latest.json")
+
+
+def _csv(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _run(args: argparse.Namespace) -> int:
+    sizes = [int(size) for size in args.sizes] if args.sizes else list(QUICK_SIZES if args.quick else SIZES)
+    results = []
+    for benchmark in iter_stage_benchmarks(args.formats, sizes, args.stages, args.kind):
+        result = measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        results.append(result)
+        sys.stdout.write(format_results_table([result]).splitlines()[1] + "\n")
+        sys.stdout.flush()
+
+    save_report(build_report(results), args.output)
+    sys.stdout.write(f"\n{format_results_table(results)}\n\nSaved results to {args.output}\n")
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    comparisons = compare_reports(
+        load_report(args.baseline),
+        load_report(args.current),
+        threshold=args.threshold,
+        metric=args.metric,
+        min_delta=args.min_delta / 1000,
+    )
+    sys.stdout.write(format_comparison_table(comparisons) + "\n")
+    regressions = [item for item in comparisons if item.regressed]
+    if regressions:
+        sys.stdout.write(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}\n")
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLIエントリーポイント
+
+    Returns:
+        int: 終了コード（compare で退行を検出した場合は1）
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Conversion stage benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run stage benchmarks and save results as JSON")
+    run_parser.add_argument("--formats", type=_csv, default=list(FORMATS), help="comma separated input formats")
+    run_parser.add_argument("--sizes", type=_csv, default=None, help="comma separated edge lengths in pixels")
+    run_parser.add_argument("--stages", type=_csv, default=list(STAGES), help="comma separated stages")
+    run_parser.add_argument("--kind", choices=KINDS, default="photo", help="synthetic input image kind")
+    run_parser.add_argument("--quick", action="store_true", help=f"only sizes {', '.join(map(str, QUICK_SIZES))}")
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="minimum measured seconds per benchmark")
+    run_parser.add_argument("--max-rounds", type=int, default=50, help="maximum rounds per benchmark")
+    run_parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="result JSON path")
+    run_parser.set_defaults(handler=_run)
+
+    compare_parser = subparsers.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline", type=Path, help="baseline result JSON")
+    compare_parser.add_argument("current", type=Path, nargs="?", default=DEFAULT_OUTPUT, help="current result JSON")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown ratio (0.1 = 10%%)")
+    compare_parser.add_argument("--metric", choices=("min", "median", "mean"), default="median")
+    compare_parser.add_argument("--min-delta", type=float, default=0.5, help="ignore slowdowns below this many ms")
+    compare_parser.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    return int(args.handler(args))
+
+
+if __name__ == "__main__":
+    # 計測中は変換処理のログを抑制する
+    logger.disable("core")
+    logger.disable("services")
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""ICC色変換ベンチマーク
+
+埋め込みICCプロファイル（Adobe RGB）の画像をsRGBに変換する時間を、変換のキャッシュが空の場合（cold）と
+作成済みの変換を再利用する場合（warm）で計測します。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.color --sizes 256,1024
+"""
+
+import argparse
+import struct
+import sys
+from collections.abc import Iterator, Sequence
+
+from PIL import Image
+
+from core.color import convert_to_srgb, transform_cache
+
+from .corpus import generate_image
+from .runner import Benchmark, fixed_args, format_results_table, measure
+
+SIZES = (256, 1024)
+
+# D50 の白色点と Adobe RGB (1998) の原色（D50に順応したXYZ）
+_D50 = (0.9642, 1.0, 0.8249)
+_ADOBE_RGB_PRIMARIES = ((0.6097, 0.3111, 0.0195), (0.2053, 0.6257, 0.0609), (0.1492, 0.0632, 0.7446))
+_ADOBE_RGB_GAMMA = 563 / 256
+
+
+def _s15fixed16(value: float) -> bytes:
+    return struct.pack(">i", round(value * 65536))
+
+
+def _xyz_tag(xyz: tuple[float, float, float]) -> bytes:
+    return b"XYZ \0\0\0\0" + b"".join(_s15fixed16(v) for v in xyz)
+
+
+def _desc_tag(text: str) -> bytes:
+    ascii_text = text.encode("ascii") + b"\0"
+    # ASCII・Unicode（空）・ScriptCode（空）の説明
+    return b"desc\0\0\0\0" + struct.pack(">I", len(ascii_text)) + ascii_text + bytes(8) + bytes(3) + bytes(67)
+
+
+def rgb_profile(
+    description: str,
+    primaries: tuple[tuple[float, float, float], ...] = _ADOBE_RGB_PRIMARIES,
+    gamma: float = _ADOBE_RGB_GAMMA,
+) -> bytes:
+    """行列とガンマで表したRGBのICCプロファイル（v2）を作成
+
+    Args:
+        description: プロファイルの説明
+        primaries: 赤・緑・青の原色（D50に順応したXYZ）
+        gamma: トーンカーブのガンマ値
+
+    Returns:
+        bytes: ICCプロファイル
+    """
+    curve = b"curv\0\0\0\0" + struct.pack(">IH", 1, round(gamma * 256)) + b"\0\0"
+    tags = [
+        (b"desc", _desc_tag(description)),
+        (b"wtpt", _xyz_tag(_D50)),
+        (b"rXYZ", _xyz_tag(primaries[0])),
+        (b"gXYZ", _xyz_tag(primaries[1])),
+        (b"bXYZ", _xyz_tag(primaries[2])),
+        (b"rTRC", curve),
+        (b"gTRC", curve),
+        (b"bTRC", curve),
+    ]
+    offset = 128 + 4 + 12 * len(tags)
+    table = b""
+    data = b""
+    for signature, body in tags:
+        table += signature + struct.pack(">II", offset + len(data), len(body))
+        data += body + bytes(-len(body) % 4)
+    header = (
+        struct.pack(">I", offset + len(data))
+        + b"lcms"
+        + bytes([2, 0x10, 0, 0])
+        + b"mntrRGB XYZ "
+        + bytes(12)  # 作成日時
+        + b"acsp"
+        + bytes(28)  # プラットフォーム・フラグ・デバイス属性・レンダリングインテント
+        + b"".join(_s15fixed16(v) for v in _D50)
+        + bytes(48)  # 作成者・プロファイルID・予約
+    )
+    return header + struct.pack(">I", len(tags)) + table + data
+
+
+def adobe_rgb_profile() -> bytes:
+    """Adobe RGB (1998) 相当のICCプロファイル"""
+    return rgb_profile("Adobe RGB (1998)")
+
+
+def _cold(image: Image.Image) -> Image.Image:
+    transform_cache.clear()
+    return convert_to_srgb(image)
+
+
+def iter_color_benchmarks(sizes: Sequence[int] = SIZES, modes: Sequence[str] = ("RGB", "RGBA")) -> Iterator[Benchmark]:
+    """ICC色変換のベンチマークを順に生成
+
+    Args:
+        sizes: 一辺のピクセル数
+        modes: 入力画像のモード
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    icc_profile = adobe_rgb_profile()
+    for size in sizes:
+        for mode in modes:
+            image = generate_image("photo", size).convert(mode)
+            image.info["icc_profile"] = icc_profile
+            case = f"{mode.lower()}-{size}"
+            params = {"stage": "color", "mode": mode, "size": size}
+            yield Benchmark(f"icc_cold[{case}]", fixed_args(image), _cold, {**params, "cache": "cold"})
+            yield Benchmark(f"icc_warm[{case}]", fixed_args(image), convert_to_srgb, {**params, "cache": "warm"})
+
+
+def main(argv: list[str] | None = None) -> int:
+    """ICC色変換ベンチマークCLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.color", description="ICC transform benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma separated edge lengths in pixels")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum measured seconds per benchmark")
+    parser.add_argument("--max-rounds", type=int, default=20, help="maximum rounds per benchmark")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = [
+        measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        for benchmark in iter_color_benchmarks(sizes)
+    ]
+    sys.stdout.write(format_results_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""合成画像コーパス生成
+
+ベンチマーク・負荷試験用の画像を numpy でベクトル化して生成します。
+同じシードからは常に同じ画像が得られ、指定したファイルサイズに近づくよう寸法を調整します。
+
+画像の種類:
+    photo: 低周波の色の変化に細かいノイズを重ねた写真風画像（圧縮しにくい）
+    logo: 単色背景に単色の図形を置いたロゴ風画像（auto_transparent_bg の対象）
+    alpha_gradient: アルファ値が放射状に変化する半透明画像
+    palette: 256色パレットのインデックス画像
+    animated: 写真風フレームを複数持つアニメーション / マルチページ画像
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.corpus --output .benchmarks/corpus
+"""
+
+import argparse
+import math
+import sys
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+KINDS = ("photo", "logo", "alpha_gradient", "palette", "animated")
+FORMATS = ("png", "jpeg", "webp", "tiff", "gif", "bmp")
+
+# 複数フレームを保存できる形式
+MULTI_FRAME_FORMATS = ("png", "gif", "tiff", "webp")
+
+# 拡張子（アップロード時のファイル名に使用）
+EXTENSIONS = {
+    "png": ".png",
+    "jpeg": ".jpg",
+    "webp": ".webp",
+    "tiff": ".tiff",
+    "gif": ".gif",
+    "bmp": ".bmp",
+}
+
+# 種類ごとのフレーム数
+_ANIMATION_FRAMES = 8
+
+
+@dataclass(frozen=True)
+class CorpusImage:
+    """生成済みのコーパス画像
+
+    Attributes:
+        kind: 画像の種類
+        fmt: 保存形式
+        width: 幅（ピクセル）
+        height: 高さ（ピクセル）
+        frames: フレーム数
+        seed: 乱数シード
+        data: エンコード済みのバイト列
+        target_bytes: 目標ファイルサイズ（指定なしの場合は None）
+    """
+
+    kind: str
+    fmt: str
+    width: int
+    height: int
+    frames: int
+    seed: int
+    data: bytes
+    target_bytes: int | None = None
+
+    @property
+    def filename(self) -> str:
+        """アップロード用のファイル名"""
+        return f"{self.kind}-{self.width}x{self.height}-s{self.seed}{EXTENSIONS[self.fmt]}"
+
+
+def _smooth_field(rng: np.random.Generator, width: int, height: int, channels: int, cells: int = 8) -> np.ndarray:
+    """低解像度の乱数場を双線形補間で拡大した滑らかな場（0〜1）を生成"""
+    grid = rng.random((cells + 1, cells + 1, channels), dtype=np.float32)
+    ys = np.linspace(0, cells, height, dtype=np.float32)
+    xs = np.linspace(0, cells, width, dtype=np.float32)
+    y0 = np.minimum(ys.astype(np.int32), cells - 1)
+    x0 = np.minimum(xs.astype(np.int32), cells - 1)
+    fy = (ys - y0)[:, None, None]
+    fx = (xs - x0)[None, :, None]
+    top = grid[y0][:, x0] * (1 - fx) + grid[y0][:, x0 + 1] * fx
+    bottom = grid[y0 + 1][:, x0] * (1 - fx) + grid[y0 + 1][:, x0 + 1] * fx
+    return np.asarray(top * (1 - fy) + bottom * fy, dtype=np.float32)
+
+
+def _photo(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    base = _smooth_field(rng, width, height, 3) * 200.0 + 28.0
+    noise = rng.normal(0.0, 18.0, size=(height, width, 3)).astype(np.float32)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels, "RGB")
+
+
+def _logo(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    background = rng.integers(0, 256, size=3, dtype=np.uint8)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[...] = background
+    yy, xx = np.ogrid[:height, :width]
+    cy, cx, radius = height / 2, width / 2, min(width, height) * 0.3
+    # 円・リング・矩形の3つの単色図形（四隅は必ず背景色のまま）
+    pixels[(yy - cy) ** 2 + (xx - cx) ** 2 <= radius**2] = rng.integers(0, 256, size=3, dtype=np.uint8)
+    ring = np.abs(np.sqrt((yy - cy) ** 2 + (xx - cx) ** 2) - radius * 1.3) <= radius * 0.08
+    pixels[ring] = rng.integers(0, 256, size=3, dtype=np.uint8)
+    box = (np.abs(yy - cy) <= radius * 0.35) & (np.abs(xx - cx) <= radius * 0.8)
+    pixels[box] = rng.integers(0, 256, size=3, dtype=np.uint8)
+    return Image.fromarray(pixels, "RGB")
+
+
+def _alpha_gradient(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    rgb = np.asarray(_photo(rng, width, height))
+    yy, xx = np.ogrid[:height, :width]
+    distance = np.sqrt(((yy - height / 2) / (height / 2)) ** 2 + ((xx - width / 2) / (width / 2)) ** 2)
+    alpha = np.clip(255.0 * (1.0 - distance / math.sqrt(2)), 0, 255).astype(np.uint8)
+    return Image.fromarray(np.dstack((rgb, alpha)), "RGBA")
+
+
+def _palette(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    field = _smooth_field(rng, width, height, 1)[:, :, 0] * 255.0
+    noise = rng.integers(-24, 25, size=(height, width), dtype=np.int16)
+    indices = np.clip(field.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    image = Image.fromarray(indices, "L").convert("P")
+    image.putpalette(rng.integers(0, 256, size=256 * 3, dtype=np.uint8).tobytes())
+    return image
+
+
+def generate_frames(kind: str, width: int, height: int, seed: int = 0) -> list[Image.Image]:
+    """指定した種類の画像フレームを生成
+
+    Args:
+        kind: 画像の種類（KINDS のいずれか）
+        width: 幅（ピクセル）
+        height: 高さ（ピクセル）
+        seed: 乱数シード
+
+    Returns:
+        list[Image.Image]: フレームのリスト（animated 以外は1枚）
+
+    Raises:
+        ValueError: 未知の種類が指定された場合
+    """
+    rng = np.random.default_rng([seed, width, height])
+    if kind == "photo":
+        return [_photo(rng, width, height)]
+    if kind == "logo":
+        return [_logo(rng, width, height)]
+    if kind == "alpha_gradient":
+        return [_alpha_gradient(rng, width, height)]
+    if kind == "palette":
+        return [_palette(rng, width, height)]
+    if kind == "animated":
+        return [_photo(rng, width, height) for _ in range(_ANIMATION_FRAMES)]
+    raise ValueError(f"未知の画像種類です: {kind}")
+
+
+def generate_image(kind: str, width: int, height: int | None = None, seed: int = 0) -> Image.Image:
+    """指定した種類の画像を1枚生成（animated は先頭フレーム）"""
+    return generate_frames(kind, width, height or width, seed)[0]
+
+
+def _to_format_mode(image: Image.Image, fmt: str) -> Image.Image:
+    """保存形式が扱えるモードに変換"""
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    if fmt == "gif" and image.mode != "P":
+        return image.convert("RGB").quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+    return image
+
+
+def encode_frames(frames: Sequence[Image.Image], fmt: str) -> bytes:
+    """フレームを指定形式でエンコード
+
+    Args:
+        frames: フレームのリスト
+        fmt: 保存形式（FORMATS のいずれか）
+
+    Returns:
+        bytes: エンコード済みのデータ
+    """
+    converted = [_to_format_mode(frame, fmt) for frame in frames]
+    buffer = BytesIO()
+    options: dict[str, object] = {}
+    if fmt == "jpeg":
+        options["quality"] = 90
+    elif fmt == "webp":
+        options["quality"] = 90
+        options["method"] = 0
+    if len(converted) > 1:
+        options["save_all"] = True
+        options["append_images"] = converted[1:]
+    converted[0].save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def generate(kind: str, fmt: str, width: int, height: int | None = None, seed: int = 0) -> CorpusImage:
+    """指定寸法のコーパス画像を生成してエンコード"""
+    height = height or width
+    frames = generate_frames(kind, width, height, seed)
+    return CorpusImage(kind, fmt, width, height, len(frames), seed, encode_frames(frames, fmt))
+
+
+def generate_sized(
+    kind: str,
+    fmt: str,
+    target_bytes: int,
+    seed: int = 0,
+    *,
+    tolerance: float = 0.1,
+    max_side: int = 8192,
+    max_attempts: int = 4,
+) -> CorpusImage:
+    """目標ファイルサイズに近い正方形のコーパス画像を生成
+
+    小さいプローブ画像で1ピクセルあたりのバイト数を見積もってから寸法を決め、
+    誤差が ``tolerance`` を超える場合は実測値で寸法を補正して作り直す。
+    圧縮しやすい種類（logo等）は ``max_side`` に達した時点の画像を返す。
+
+    Args:
+        kind: 画像の種類
+        fmt: 保存形式
+        target_bytes: 目標ファイルサイズ（バイト）
+        seed: 乱数シード
+        tolerance: 許容する相対誤差
+        max_side: 一辺の上限（ピクセル）
+        max_attempts: 寸法補正の最大回数
+
+    Returns:
+        CorpusImage: 生成した画像
+    """
+    if kind == "animated" and fmt not in MULTI_FRAME_FORMATS:
+        raise ValueError(f"{fmt} は複数フレームを保存できません")
+
+    side = min(256, max_side)
+    best = generate(kind, fmt, side, seed=seed)
+    for _ in range(max_attempts):
+        error = len(best.data) / target_bytes - 1.0
+        if abs(error) <= tolerance or (error < 0 and side >= max_side):
+            break
+        # ファイルサイズは概ね画素数（一辺の2乗）に比例する
+        side = max(16, min(max_side, round(side * math.sqrt(target_bytes / len(best.data)))))
+        candidate = generate(kind, fmt, side, seed=seed)
+        if abs(len(candidate.data) / target_bytes - 1.0) < abs(error):
+            best = candidate
+    return CorpusImage(
+        best.kind,
+        best.fmt,
+        best.width,
+        best.height,
+        best.frames,
+        best.seed,
+        best.data,
+        target_bytes,
+    )
+
+
+# 既定のコーパス（種類, 形式, 目標バイト数）
+DEFAULT_SPECS: tuple[tuple[str, str, int], ...] = (
+    *(("photo", fmt, 5 * 1024 * 1024) for fmt in FORMATS),
+    *(("photo", fmt, 512 * 1024) for fmt in FORMATS),
+    *(("logo", fmt, 256 * 1024) for fmt in ("png", "jpeg", "bmp", "gif")),
+    ("alpha_gradient", "png", 2 * 1024 * 1024),
+    ("alpha_gradient", "webp", 1024 * 1024),
+    ("palette", "gif", 1024 * 1024),
+    ("palette", "png", 1024 * 1024),
+    ("animated", "gif", 5 * 1024 * 1024),
+    ("animated", "tiff", 8 * 1024 * 1024),
+    ("animated", "webp", 2 * 1024 * 1024),
+)
+
+
+def build_corpus(specs: Iterable[tuple[str, str, int]] = DEFAULT_SPECS, seed: int = 0) -> list[CorpusImage]:
+    """仕様の一覧からコーパスを生成"""
+    return [generate_sized(kind, fmt, target, seed=seed) for kind, fmt, target in specs]
+
+
+def write_corpus(images: Iterable[CorpusImage], directory: Path) -> list[Path]:
+    """コーパスをディレクトリに書き出す"""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for image in images:
+        path = directory / image.filename
+        path.write_bytes(image.data)
+        paths.append(path)
+    return paths
+
+
+def main(argv: list[str] | None = None) -> int:
+    """既定のコーパスをディレクトリに書き出すCLI"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.corpus",
+        description="Generate a synthetic image corpus",
+    )
+    parser.add_argument("--output", type=Path, default=Path(".benchmarks/corpus"), help="output directory")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args(argv)
+
+    for path in write_corpus(build_corpus(seed=args.seed), args.output):
+        sys.stdout.write(f"{path.stat().st_size / 1024 / 1024:8.2f} MB  {path}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
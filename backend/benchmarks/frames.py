@@ -0,0 +1,85 @@
+"""複数フレーム画像のフレーム選択ベンチマーク
+
+大きなアニメーションGIF・WebP、複数ページのTIFFを入力に、フレーム数の確認（バリデーション）と
+フレーム選択付きのdecode（first / largest / 最終フレーム）を計測します。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.frames --size 1024 --frames 32
+"""
+
+import argparse
+import sys
+from collections.abc import Iterator, Sequence
+from io import BytesIO
+
+from PIL import Image
+
+from core.utils import FRAME_FIRST, FRAME_LARGEST, frame_count, select_frame
+
+from .corpus import encode_frames, generate_image
+from .runner import Benchmark, fixed_args, format_results_table, measure
+
+FORMATS = ("gif", "webp", "tiff")
+
+
+def _count(data: bytes) -> int:
+    with Image.open(BytesIO(data)) as image:
+        return frame_count(image)
+
+
+def _decode(data: bytes, frame: int | str) -> Image.Image:
+    image = Image.open(BytesIO(data))
+    select_frame(image, frame)
+    image.load()
+    return image
+
+
+def iter_frame_benchmarks(formats: Sequence[str] = FORMATS, size: int = 1024, frames: int = 32) -> Iterator[Benchmark]:
+    """フレーム選択のベンチマークを順に生成
+
+    Args:
+        formats: 入力形式
+        size: 一辺のピクセル数
+        frames: フレーム数
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    source = [generate_image("photo", size, seed=index) for index in range(frames)]
+    for fmt in formats:
+        data = encode_frames(source, fmt)
+        case = f"{fmt}-{size}x{frames}"
+        params = {"format": fmt, "size": size, "frames": frames, "input_bytes": len(data)}
+        yield Benchmark(f"count_frames[{case}]", fixed_args(data), _count, {"stage": "count_frames", **params})
+        for selector in (FRAME_FIRST, FRAME_LARGEST, frames - 1):
+            label = selector if isinstance(selector, str) else "last"
+            yield Benchmark(
+                f"decode_frame[{case}-{label}]",
+                fixed_args(data, selector),
+                _decode,
+                {"stage": "decode_frame", "frame": label, **params},
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """フレーム選択ベンチマークCLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.frames", description="Frame selection benchmarks")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="comma separated input formats")
+    parser.add_argument("--size", type=int, default=1024, help="edge length in pixels")
+    parser.add_argument("--frames", type=int, default=32, help="number of frames")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum measured seconds per benchmark")
+    parser.add_argument("--max-rounds", type=int, default=20, help="maximum rounds per benchmark")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    results = [
+        measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        for benchmark in iter_frame_benchmarks(formats, args.size, args.frames)
+    ]
+    sys.stdout.write(format_results_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
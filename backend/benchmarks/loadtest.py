@@ -0,0 +1,327 @@
+"""変換APIの負荷試験
+
+起動中のバックエンドの ``/api/convert`` にコーパス画像を並行送信し、
+同時実行数ごとのスループット・レイテンシ分布・エラー率を計測します。
+
+使用例（backendディレクトリで実行）::
+
+    # ローカルでuvicornを起動して計測（レート制限は TESTING=true で無効化）
+    python -m benchmarks.loadtest --spawn --concurrency 1,2,4,8 --requests 40
+
+    # 起動済みのサーバーに対して、ディレクトリ内の画像を送信
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --corpus .benchmarks/corpus --output result.json
+"""
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict, dataclass
+from itertools import cycle
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .corpus import generate_sized
+
+# 既定のコーパス（種類, 形式, 目標バイト数）: 実運用に近い小〜中サイズの入力
+DEFAULT_LOAD_SPECS = (
+    ("photo", "png", 512 * 1024),
+    ("photo", "jpeg", 1024 * 1024),
+    ("photo", "webp", 256 * 1024),
+    ("logo", "png", 64 * 1024),
+    ("alpha_gradient", "png", 512 * 1024),
+    ("palette", "gif", 256 * 1024),
+)
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class Upload:
+    """送信する1件の画像"""
+
+    filename: str
+    content_type: str
+    data: bytes
+
+
+@dataclass
+class LevelResult:
+    """1つの同時実行数での計測結果（時間はミリ秒）"""
+
+    concurrency: int
+    requests: int
+    duration_s: float
+    requests_per_s: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    success: int
+    errors: int
+    error_rate: float
+    status_429: int
+    status_503: int
+    transport_errors: int
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """線形補間でパーセンタイルを計算
+
+    Args:
+        sorted_values: 昇順に並んだ値
+        q: パーセンタイル（0〜100）
+
+    Returns:
+        float: パーセンタイル値（値がない場合は0）
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(concurrency: int, latencies: Sequence[float], statuses: Sequence[int], duration: float) -> LevelResult:
+    """個々のリクエスト結果を集計
+
+    Args:
+        concurrency: 同時実行数
+        latencies: レイテンシ（秒）
+        statuses: HTTPステータス（通信エラーは0）
+        duration: 計測全体の所要時間（秒）
+
+    Returns:
+        LevelResult: 集計結果
+    """
+    ordered = sorted(latency * 1000 for latency in latencies)
+    total = len(statuses)
+    success = sum(1 for status in statuses if 200 <= status < 300)
+    return LevelResult(
+        concurrency=concurrency,
+        requests=total,
+        duration_s=round(duration, 3),
+        requests_per_s=round(total / duration, 2) if duration > 0 else 0.0,
+        p50_ms=round(percentile(ordered, 50), 2),
+        p95_ms=round(percentile(ordered, 95), 2),
+        p99_ms=round(percentile(ordered, 99), 2),
+        max_ms=round(ordered[-1], 2) if ordered else 0.0,
+        success=success,
+        errors=total - success,
+        error_rate=round((total - success) / total, 4) if total else 0.0,
+        status_429=statuses.count(429),
+        status_503=statuses.count(503),
+        transport_errors=statuses.count(0),
+    )
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    uploads: Sequence[Upload],
+    concurrency: int,
+    requests: int,
+    form: dict[str, str] | None = None,
+) -> LevelResult:
+    """1つの同時実行数で負荷をかける
+
+    ``concurrency`` 個のワーカーが合計 ``requests`` 件を送信する。
+
+    Args:
+        client: 送信に使うHTTPクライアント（base_url設定済み）
+        uploads: 送信する画像（順番に繰り返し使用）
+        concurrency: 同時実行数
+        requests: 送信する合計リクエスト数
+        form: 追加のフォームフィールド
+
+    Returns:
+        LevelResult: 集計結果
+    """
+    source: Iterator[Upload] = cycle(uploads)
+    remaining = requests
+    latencies: list[float] = []
+    statuses: list[int] = []
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            upload = next(source)
+            files = {"file": (upload.filename, upload.data, upload.content_type)}
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/convert", files=files, data=form or {})
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(concurrency, latencies, statuses, time.perf_counter() - started)
+
+
+async def run_sweep(
+    client: httpx.AsyncClient,
+    uploads: Sequence[Upload],
+    levels: Sequence[int],
+    requests: int,
+    warmup: int = 2,
+    form: dict[str, str] | None = None,
+) -> list[LevelResult]:
+    """同時実行数を変えながら順に計測
+
+    Args:
+        client: 送信に使うHTTPクライアント
+        uploads: 送信する画像
+        levels: 同時実行数の一覧
+        requests: 各同時実行数で送信するリクエスト数
+        warmup: 計測前に捨てるリクエスト数
+        form: 追加のフォームフィールド
+
+    Returns:
+        list[LevelResult]: 同時実行数ごとの結果
+    """
+    if warmup:
+        await run_level(client, uploads, 1, warmup, form)
+    return [await run_level(client, uploads, level, requests, form) for level in levels]
+
+
+def load_uploads(corpus_dir: Path | None) -> list[Upload]:
+    """送信する画像を読み込む（ディレクトリ未指定なら既定のコーパスを生成）"""
+    if corpus_dir is None:
+        images = [generate_sized(kind, fmt, target) for kind, fmt, target in DEFAULT_LOAD_SPECS]
+        return [
+            Upload(image.filename, mimetypes.guess_type(image.filename)[0] or "image/png", image.data)
+            for image in images
+        ]
+    uploads = []
+    for path in sorted(corpus_dir.iterdir()):
+        content_type = mimetypes.guess_type(path.name)[0]
+        if path.is_file() and content_type and content_type.startswith("image/"):
+            uploads.append(Upload(path.name, content_type, path.read_bytes()))
+    if not uploads:
+        raise ValueError(f"{corpus_dir} に画像ファイルがありません")
+    return uploads
+
+
+def format_table(results: Sequence[LevelResult]) -> str:
+    """計測結果をテキスト表に整形"""
+    header = (
+        f"{'conc':>5} {'reqs':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'max ms':>9} {'err %':>7} {'429':>5} {'503':>5}"
+    )
+    lines = [header]
+    for r in results:
+        lines.append(
+            f"{r.concurrency:>5} {r.requests:>6} {r.requests_per_s:>8.2f} {r.p50_ms:>9.1f} {r.p95_ms:>9.1f} "
+            f"{r.p99_ms:>9.1f} {r.max_ms:>9.1f} {r.error_rate * 100:>7.2f} {r.status_429:>5} {r.status_503:>5}",
+        )
+    return "\n".join(lines)
+
+
+def build_report(results: Sequence[LevelResult], base_url: str, uploads: Sequence[Upload]) -> dict[str, Any]:
+    """JSON出力用のレポートを作成"""
+    return {
+        "base_url": base_url,
+        "corpus": [{"filename": upload.filename, "bytes": len(upload.data)} for upload in uploads],
+        "levels": [asdict(result) for result in results],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def spawn_server(port: int, timeout: float = 30.0) -> subprocess.Popen[bytes]:
+    """ローカルにuvicornを起動し、ヘルスチェックが通るまで待つ
+
+    レート制限は TESTING=true で無効化する（無効化しない場合は429として計上される）。
+
+    Raises:
+        RuntimeError: 起動がタイムアウトした場合
+    """
+    env = {**os.environ, "TESTING": os.environ.get("TESTING", "true"), "LOG_LEVEL": "WARNING"}
+    process = subprocess.Popen(
+        [
+            *(sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)),
+            *("--log-level", "warning", "--no-access-log"),
+        ],
+        cwd=_BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn が終了しました（終了コード {process.returncode}）")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn の起動がタイムアウトしました")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """負荷試験CLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Load test /api/convert")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of a running backend")
+    target.add_argument("--spawn", action="store_true", help="start a local uvicorn instance for the run")
+    parser.add_argument("--corpus", type=Path, default=None, help="directory of images to replay")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=2, help="warm-up requests before measuring")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--auto-transparent-bg", action="store_true", help="send auto_transparent_bg=true")
+    parser.add_argument("--output", type=Path, default=None, help="write JSON report to this path")
+    args = parser.parse_args(argv)
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    uploads = load_uploads(args.corpus)
+    form = {"auto_transparent_bg": "true", "preserve_transparency": "false"} if args.auto_transparent_bg else None
+
+    process = None
+    base_url = args.url
+    if args.spawn:
+        port = _free_port()
+        process = spawn_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    async def run() -> list[LevelResult]:
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            return await run_sweep(client, uploads, levels, args.requests, args.warmup, form)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = build_report(results, base_url, uploads)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    sys.stdout.write(format_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
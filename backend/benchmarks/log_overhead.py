@@ -0,0 +1,121 @@
+"""ログ出力のオーバーヘッド計測
+
+アプリ内（TestClient）で小さな画像の変換リクエストを繰り返し、ログを無効にした場合との
+中央値の差から、1リクエストあたりのログのコストを計測します。ログは /dev/null に出力します。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.log_overhead --requests 300
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from io import BytesIO
+from typing import TextIO
+
+from loguru import logger
+from PIL import Image
+
+from .runner import BenchmarkResult
+
+
+def _legacy_logger(sink: TextIO) -> None:
+    """従来の設定（リクエスト処理中に同期でJSONへシリアライズして書き込む）"""
+    logger.remove()
+    logger.add(sink, format="{message}", level="INFO", serialize=True, backtrace=True, diagnose=True)
+
+
+def _modes() -> dict[str, Callable[[TextIO], None]]:
+    from core.logger import setup_logger
+
+    return {
+        "off": lambda sink: logger.remove(),
+        "sync": _legacy_logger,
+        "enqueue": lambda sink: setup_logger("INFO", sink=sink, sample_rate=1.0),
+        "enqueue_sampled_10pct": lambda sink: setup_logger("INFO", sink=sink, sample_rate=0.1),
+    }
+
+
+def _png() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (64, 64), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def run(requests: int = 300, rounds: int = 10) -> list[BenchmarkResult]:
+    """各ログ設定で変換リクエストを計測
+
+    マシンの状態の変化が特定の設定に偏らないよう、設定を切り替えながら ``rounds`` 回に分けて計測する。
+
+    Args:
+        requests: 設定ごとのリクエスト数
+        rounds: 計測を分割する回数
+
+    Returns:
+        list[BenchmarkResult]: 設定ごとの計測結果
+    """
+    os.environ.setdefault("TESTING", "true")
+    os.environ.setdefault("CANARY_INTERVAL_SECONDS", "0")
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    client = TestClient(app)
+    files = {"file": ("bench.png", _png(), "image/png")}
+    modes = _modes()
+    samples: dict[str, list[float]] = {name: [] for name in modes}
+    with open(os.devnull, "w", encoding="utf-8") as sink:
+        for _ in range(rounds):
+            for name, configure in modes.items():
+                configure(sink)
+                for index in range(requests // rounds + 5):
+                    start = time.perf_counter()
+                    client.post("/api/convert", files=files)
+                    # 設定切り替え直後の5回はウォームアップとして捨てる
+                    if index >= 5:
+                        samples[name].append(time.perf_counter() - start)
+        logger.remove()
+
+    return [
+        BenchmarkResult(
+            name=f"request[{name}]",
+            params={"mode": name},
+            rounds=len(values),
+            min=min(values),
+            median=statistics.median(values),
+            mean=statistics.fmean(values),
+            stddev=statistics.stdev(values),
+        )
+        for name, values in samples.items()
+    ]
+
+
+def format_overhead_table(results: list[BenchmarkResult]) -> str:
+    """ログ無効時との差をテキスト表に整形"""
+    baseline = next(result.median for result in results if result.name == "request[off]")
+    lines = [f"{'mode':<32} {'median (ms)':>12} {'overhead (ms)':>14}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<32} {result.median * 1000:>12.3f} {(result.median - baseline) * 1000:>+14.3f}",
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """ログオーバーヘッド計測CLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.log_overhead", description="Measure logging overhead")
+    parser.add_argument("--requests", type=int, default=300, help="requests per logging mode")
+    parser.add_argument("--rounds", type=int, default=10, help="interleaved rounds across logging modes")
+    args = parser.parse_args(argv)
+
+    results = run(args.requests, args.rounds)
+    sys.stdout.write(format_overhead_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
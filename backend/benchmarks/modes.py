@@ -0,0 +1,85 @@
+"""入力モード別の前処理ベンチマーク
+
+入力画像のモード（CMYK、16bitグレースケール、LA、透明色付きパレット等）ごとに、作業モードへの前処理と
+各アイコンサイズへのリサイズをまとめた時間を計測します。``prepare`` は変換で使う経路
+（``IconConverter._prepare_frames``）、``convert_first`` は元の解像度でRGBAに変換してからリサイズする経路です。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.modes --modes CMYK,I;16,LA --size 2048
+"""
+
+import argparse
+import sys
+from collections.abc import Iterator, Sequence
+
+import numpy as np
+from PIL import Image
+
+from core.logic import IconConverter
+
+from .corpus import generate_image
+from .runner import Benchmark, fixed_args, format_results_table, measure
+
+MODES = ("RGB", "RGBA", "L", "LA", "P", "CMYK", "I;16")
+
+
+def generate_mode_image(mode: str, size: int) -> Image.Image:
+    """指定したモードの入力画像を作成（P は透明色付き、I;16 は16bitの値域を使う）"""
+    if mode == "I;16":
+        gray = np.asarray(generate_image("photo", size).convert("L"), dtype=np.uint16)
+        return Image.fromarray(gray * 257)
+    if mode == "P":
+        image = generate_image("palette", size)
+        image.info["transparency"] = 0
+        return image
+    return generate_image("alpha_gradient", size).convert(mode)
+
+
+def _convert_first(converter: IconConverter, image: Image.Image) -> list[Image.Image]:
+    return converter._resize_for_icon(image.convert("RGBA"))
+
+
+def _prepare(converter: IconConverter, image: Image.Image) -> list[Image.Image]:
+    return converter._prepare_frames(image, preserve_transparency=True)[1]
+
+
+def iter_mode_benchmarks(modes: Sequence[str] = MODES, size: int = 1024) -> Iterator[Benchmark]:
+    """入力モード別の前処理ベンチマークを順に生成
+
+    Args:
+        modes: 入力画像のモード
+        size: 入力画像の一辺のピクセル数
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    converter = IconConverter()
+    for mode in modes:
+        image = generate_mode_image(mode, size)
+        case = f"{mode.lower().replace(';', '')}-{size}"
+        params = {"stage": "resize", "mode": mode, "size": size}
+        yield Benchmark(f"prepare[{case}]", fixed_args(converter, image), _prepare, params)
+        yield Benchmark(f"convert_first[{case}]", fixed_args(converter, image), _convert_first, params)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """入力モード別ベンチマークCLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.modes", description="Input mode benchmarks")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated Pillow modes")
+    parser.add_argument("--size", type=int, default=1024, help="edge length in pixels")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum measured seconds per benchmark")
+    parser.add_argument("--max-rounds", type=int, default=20, help="maximum rounds per benchmark")
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    results = [
+        measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        for benchmark in iter_mode_benchmarks(modes, args.size)
+    ]
+    sys.stdout.write(format_results_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
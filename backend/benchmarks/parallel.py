@@ -0,0 +1,132 @@
+"""変換内の並列処理のベンチマーク
+
+1件の変換のリサイズとエンコード（``IconConverter._resize_for_icon`` と ``_encode_ico``）と、元の解像度での
+背景色の透明化（``core.keying.key_color``）を、同時に処理する数（``RESIZE_PARALLELISM``）を変えて計測します。
+他に変換がない状態（実行スレッドの外）で計測するため、CPUが空いていれば上限までヘルパーが予約されます。
+CPUが1つの環境では並列化されません。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.parallel --limits 1,2,4,8 --size 2048
+"""
+
+import argparse
+import os
+import sys
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from io import BytesIO
+
+from PIL import Image
+
+from core import parallel
+from core.encoding import get_profile
+from core.keying import key_color
+from core.logic import IconConverter
+
+from .corpus import generate_image
+from .runner import Benchmark, format_results_table, measure
+
+LIMITS = (1, 2, 4, 8)
+
+
+@contextmanager
+def _parallelism(limit: int) -> Iterator[None]:
+    previous = parallel.RESIZE_PARALLELISM
+    parallel.RESIZE_PARALLELISM = limit
+    try:
+        yield
+    finally:
+        parallel.RESIZE_PARALLELISM = previous
+
+
+def _resize_and_encode(converter: IconConverter, image: Image.Image, limit: int, profile: str) -> bytes:
+    with _parallelism(limit):
+        frames = converter._resize_for_icon(image)
+        output = BytesIO()
+        converter._encode_ico(frames[-1], frames, output, get_profile(profile))  # type: ignore[arg-type]
+        return output.getvalue()
+
+
+def _key(image: Image.Image, background: tuple[int, ...], limit: int) -> int:
+    with _parallelism(limit):
+        return key_color(image, background)
+
+
+def iter_parallel_benchmarks(
+    limits: Sequence[int] = LIMITS, size: int = 2048, profile: str = "balanced"
+) -> Iterator[Benchmark]:
+    """同時に処理するサイズ数別のベンチマークを順に生成
+
+    Args:
+        limits: 同時に処理するサイズ数の上限（1: 並列化しない）
+        size: 入力画像の一辺のピクセル数
+        profile: エンコードプロファイル
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    converter = IconConverter()
+    image = generate_image("photo", size).convert("RGBA")
+    for limit in limits:
+        params = {"stage": "resize", "limit": limit, "size": size, "profile": profile, "cpus": os.cpu_count()}
+        yield Benchmark(
+            f"fan_out[{profile}-{size}-p{limit}]",
+            lambda: (converter, image),
+            lambda conv, im, n=limit: _resize_and_encode(conv, im, n, profile),
+            params,
+        )
+
+
+def iter_key_benchmarks(limits: Sequence[int] = LIMITS, size: int = 4096) -> Iterator[Benchmark]:
+    """同時に処理するタイル数別の背景色の透明化のベンチマークを順に生成
+
+    入力は上半分が背景色（白に近い色）の写真風の画像。各ラウンドで複製した画像のアルファを書き換える。
+
+    Args:
+        limits: 同時に処理するタイル数の上限（1: 並列化しない）
+        size: 入力画像の一辺のピクセル数
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    image = generate_image("photo", size).convert("RGBA")
+    image.paste((250, 250, 248, 255), (0, 0, size, size // 2))
+    background = (255, 255, 255, 255)
+    for limit in limits:
+        params = {"stage": "key", "limit": limit, "size": size, "cpus": os.cpu_count()}
+        yield Benchmark(
+            f"key_tiles[{size}-p{limit}]",
+            lambda: (image.copy(), background),
+            lambda im, bg, n=limit: _key(im, bg, n),
+            params,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """変換内の並列処理のベンチマークCLI"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.parallel", description="Intra-conversion fan-out benchmarks"
+    )
+    parser.add_argument("--limits", default=",".join(map(str, LIMITS)), help="comma separated RESIZE_PARALLELISM")
+    parser.add_argument("--size", type=int, default=2048, help="edge length in pixels for resize and encode")
+    parser.add_argument("--key-size", type=int, default=4096, help="edge length in pixels for background keying")
+    parser.add_argument("--profile", default="balanced", help="encoding profile")
+    parser.add_argument("--min-time", type=float, default=0.5, help="minimum measured seconds per benchmark")
+    parser.add_argument("--max-rounds", type=int, default=20, help="maximum rounds per benchmark")
+    args = parser.parse_args(argv)
+
+    limits = [int(limit) for limit in args.limits.split(",") if limit.strip()]
+    results = [
+        measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        for benchmark in (
+            *iter_parallel_benchmarks(limits, args.size, args.profile),
+            *iter_key_benchmarks(limits, args.key_size),
+        )
+    ]
+    sys.stdout.write(format_results_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""エンコードプロファイル別ベンチマーク
+
+入力画像の種類ごとに、リサイズ済みの全アイコンサイズをICOにエンコードする時間と出力サイズを
+プロファイル（fast / balanced / small）別に計測します。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.profiles --kinds photo,logo --size 1024
+"""
+
+import argparse
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from io import BytesIO
+
+from PIL import Image
+
+from core.encoding import PROFILES, get_profile
+from core.logic import IconConverter
+from core.utils import prepare_image_for_conversion
+
+from .corpus import KINDS, generate_image
+from .runner import Benchmark, BenchmarkResult, fixed_args, measure
+
+
+def _encode(converter: IconConverter, frames: list[Image.Image], profile: str) -> bytes:
+    buffer = BytesIO()
+    converter._encode_ico(frames[-1], frames, buffer, get_profile(profile))  # type: ignore[arg-type]
+    return buffer.getvalue()
+
+
+def iter_profile_benchmarks(
+    kinds: Sequence[str] = KINDS,
+    profiles: Sequence[str] = tuple(PROFILES),
+    size: int = 1024,
+) -> Iterator[Benchmark]:
+    """プロファイル別のエンコードベンチマークを順に生成
+
+    出力サイズはベンチマーク定義の作成時に1回エンコードして ``params["output_bytes"]`` に記録する。
+
+    Args:
+        kinds: 入力画像の種類（benchmarks.corpus.KINDS のいずれか）
+        profiles: エンコードプロファイル
+        size: 入力画像の一辺のピクセル数
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    converter = IconConverter()
+    for kind in kinds:
+        image = prepare_image_for_conversion(generate_image(kind, size), preserve_transparency=True)
+        frames = converter._resize_for_icon(image)
+        for profile in profiles:
+            params = {
+                "stage": "encode",
+                "kind": kind,
+                "profile": profile,
+                "size": size,
+                "output_bytes": len(_encode(converter, frames, profile)),
+            }
+            yield Benchmark(
+                f"encode_profile[{kind}-{profile}]",
+                fixed_args(converter, frames, profile),
+                _encode,
+                params,
+            )
+
+
+def format_profile_table(results: Iterable[BenchmarkResult]) -> str:
+    """計測結果を出力サイズ付きのテキスト表に整形"""
+    lines = [f"{'benchmark':<40} {'median (ms)':>12} {'output (bytes)':>15}"]
+    for result in results:
+        lines.append(f"{result.name:<40} {result.median * 1000:>12.3f} {result.params['output_bytes']:>15,}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """エンコードプロファイルベンチマークCLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.profiles", description="Encoding profile benchmarks")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="comma separated input image kinds")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="comma separated encoding profiles")
+    parser.add_argument("--size", type=int, default=1024, help="edge length in pixels")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum measured seconds per benchmark")
+    parser.add_argument("--max-rounds", type=int, default=20, help="maximum rounds per benchmark")
+    args = parser.parse_args(argv)
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    profiles = [profile.strip() for profile in args.profiles.split(",") if profile.strip()]
+    results = [
+        measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        for benchmark in iter_profile_benchmarks(kinds, profiles, args.size)
+    ]
+    sys.stdout.write(format_profile_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""ベンチマーク実行・保存・比較
+
+計測ループ、結果のJSON入出力、ベースラインとの比較を提供します。
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import PIL
+
+# 結果ファイルのスキーマバージョン
+RESULT_SCHEMA_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """1件のベンチマーク定義
+
+    Attributes:
+        name: 一意な名前（例: ``decode[png-1024]``）
+        setup: 計測対象に渡す引数を準備する関数（計測時間に含まれない）
+        func: 計測対象の関数
+        params: 結果に記録する付加情報（ステージ・形式・サイズ等）
+    """
+
+    name: str
+    setup: Callable[[], tuple[Any, ...]]
+    func: Callable[..., Any]
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BenchmarkResult:
+    """1件のベンチマーク結果（時間はすべて秒）"""
+
+    name: str
+    params: dict[str, Any]
+    rounds: int
+    min: float
+    median: float
+    mean: float
+    stddev: float
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON出力用の辞書に変換"""
+        return {
+            "params": self.params,
+            "rounds": self.rounds,
+            "min": self.min,
+            "median": self.median,
+            "mean": self.mean,
+            "stddev": self.stddev,
+        }
+
+
+def fixed_args(*args: Any) -> Callable[[], tuple[Any, ...]]:
+    """常に同じ引数を返す ``setup`` 関数を作成（ループ内で作るベンチマークに現在の値を束縛する）"""
+    return lambda: args
+
+
+def measure(
+    benchmark: Benchmark,
+    *,
+    min_time: float = 0.2,
+    min_rounds: int = 3,
+    max_rounds: int = 50,
+    warmup: int = 1,
+) -> BenchmarkResult:
+    """ベンチマークを計測
+
+    ``min_time`` 秒を超えるか ``max_rounds`` 回に達するまで繰り返し、
+    ラウンドごとに ``setup`` を呼び直して計測対象だけの時間を記録する。
+
+    Args:
+        benchmark: 計測するベンチマーク
+        min_time: 計測に費やす最小合計時間（秒）
+        min_rounds: 最小ラウンド数
+        max_rounds: 最大ラウンド数
+        warmup: 計測前に捨てる実行回数
+
+    Returns:
+        BenchmarkResult: 計測結果
+    """
+    for _ in range(warmup):
+        benchmark.func(*benchmark.setup())
+
+    samples: list[float] = []
+    while len(samples) < max_rounds and (len(samples) < min_rounds or sum(samples) < min_time):
+        args = benchmark.setup()
+        start = time.perf_counter()
+        benchmark.func(*args)
+        samples.append(time.perf_counter() - start)
+
+    return BenchmarkResult(
+        name=benchmark.name,
+        params=dict(benchmark.params),
+        rounds=len(samples),
+        min=min(samples),
+        median=statistics.median(samples),
+        mean=statistics.fmean(samples),
+        stddev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    )
+
+
+def machine_info() -> dict[str, str]:
+    """結果の比較可能性を判断するための実行環境情報"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+        # フリースレッド版のCPythonでは "false"（GILのないビルドとの比較のため）
+        "gil_enabled": str(getattr(sys, "_is_gil_enabled", lambda: True)()).lower(),
+    }
+
+
+def build_report(results: Iterable[BenchmarkResult]) -> dict[str, Any]:
+    """結果一覧をJSON出力用のレポートに変換"""
+    return {
+        "version": RESULT_SCHEMA_VERSION,
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "results": {result.name: result.to_dict() for result in results},
+    }
+
+
+def save_report(report: dict[str, Any], path: Path) -> None:
+    """レポートをJSONファイルに保存"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def load_report(path: Path) -> dict[str, Any]:
+    """JSONファイルからレポートを読み込む
+
+    Raises:
+        ValueError: スキーマバージョンが一致しない場合
+    """
+    report: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    if report.get("version") != RESULT_SCHEMA_VERSION:
+        raise ValueError(f"{path}: 未対応の結果ファイルバージョンです（{report.get('version')}）")
+    return report
+
+
+@dataclass
+class Comparison:
+    """ベースラインとの比較結果（1件分）
+
+    Attributes:
+        name: ベンチマーク名
+        baseline: ベースラインの中央値（秒）
+        current: 今回の中央値（秒）
+        ratio: 今回 / ベースライン
+        regressed: しきい値を超えて遅くなったか
+    """
+
+    name: str
+    baseline: float
+    current: float
+    ratio: float
+    regressed: bool
+
+
+def compare_reports(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = 0.1,
+    metric: str = "median",
+    min_delta: float = 0.0,
+) -> list[Comparison]:
+    """2つのレポートを比較し、しきい値を超えた退行を検出
+
+    両方のレポートに存在するベンチマークだけを比較する。
+
+    Args:
+        baseline: 基準となるレポート
+        current: 比較対象のレポート
+        threshold: 退行とみなす遅延率（0.1 = 10%遅くなったら退行）
+        metric: 比較に使う統計量（min / median / mean）
+        min_delta: 退行とみなす最小の差（秒）。計測誤差に埋もれる短い処理の誤検出を防ぐ
+
+    Returns:
+        list[Comparison]: 名前順の比較結果
+    """
+    comparisons = []
+    base_results = baseline["results"]
+    for name, result in sorted(current["results"].items()):
+        if name not in base_results:
+            continue
+        base_value = float(base_results[name][metric])
+        current_value = float(result[metric])
+        ratio = current_value / base_value if base_value > 0 else float("inf")
+        comparisons.append(
+            Comparison(
+                name=name,
+                baseline=base_value,
+                current=current_value,
+                ratio=ratio,
+                regressed=ratio > 1.0 + threshold and current_value - base_value > min_delta,
+            ),
+        )
+    return comparisons
+
+
+def format_results_table(results: Iterable[BenchmarkResult]) -> str:
+    """計測結果をテキスト表に整形"""
+    lines = [f"{'benchmark':<40} {'rounds':>6} {'min (ms)':>11} {'median (ms)':>12} {'stddev (ms)':>12}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<40} {result.rounds:>6} {result.min * 1000:>11.3f} "
+            f"{result.median * 1000:>12.3f} {result.stddev * 1000:>12.3f}",
+        )
+    return "\n".join(lines)
+
+
+def format_comparison_table(comparisons: Iterable[Comparison]) -> str:
+    """比較結果をテキスト表に整形"""
+    lines = [f"{'benchmark':<40} {'baseline (ms)':>14} {'current (ms)':>13} {'change':>9}"]
+    for item in comparisons:
+        marker = "  REGRESSION" if item.regressed else ""
+        lines.append(
+            f"{item.name:<40} {item.baseline * 1000:>14.3f} {item.current * 1000:>13.3f} "
+            f"{(item.ratio - 1.0) * 100:>+8.1f}%{marker}",
+        )
+    return "\n".join(lines)
@@ -0,0 +1,98 @@
+"""変換ステージ別ベンチマーク
+
+decode / 背景色検出 / 透明化 / リサイズ / ICOエンコードを入力形式・サイズごとに個別に計測します。
+"""
+
+from collections.abc import Iterator, Sequence
+from io import BytesIO
+
+from PIL import Image
+
+from core.logic import IconConverter
+from core.utils import prepare_image_for_conversion
+
+from .corpus import encode_frames, generate_frames
+from .runner import Benchmark, fixed_args
+
+# 計測対象の入力形式（Pillowの保存形式名）
+FORMATS = ("png", "jpeg", "webp", "tiff", "gif", "bmp")
+
+# 計測対象の一辺のピクセル数（64px〜8K）
+SIZES = (64, 256, 1024, 2048, 4096, 8192)
+QUICK_SIZES = (64, 256, 1024)
+
+STAGES = ("decode", "detect_background", "make_transparent", "resize", "encode")
+
+# 透明度を保持して変換する形式（core.utils.is_transparency_supported と同じ）
+_TRANSPARENT_FORMATS = {"png", "gif", "webp"}
+
+
+def _decode(data: bytes) -> Image.Image:
+    image = Image.open(BytesIO(data))
+    image.load()
+    return image
+
+
+def _encode(converter: IconConverter, image: Image.Image, frames: list[Image.Image]) -> None:
+    converter._encode_ico(image, frames, BytesIO())  # type: ignore[arg-type]
+
+
+def iter_stage_benchmarks(
+    formats: Sequence[str] = FORMATS,
+    sizes: Sequence[int] = SIZES,
+    stages: Sequence[str] = STAGES,
+    kind: str = "photo",
+) -> Iterator[Benchmark]:
+    """ステージ別ベンチマークを順に生成
+
+    入力画像は（サイズ, 形式）ごとに生成し、次の組み合わせに進むと解放されるため、
+    8Kの入力でもメモリに載るのは常に1組分だけになる。
+
+    Args:
+        formats: 入力形式
+        sizes: 一辺のピクセル数
+        stages: 計測するステージ
+        kind: 入力画像の種類（benchmarks.corpus.KINDS のいずれか）
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    converter = IconConverter()
+    for size in sizes:
+        source = generate_frames(kind, size, size)
+        for fmt in formats:
+            data = encode_frames(source, fmt)
+            decoded = _decode(data)
+            rgba = decoded.convert("RGBA")
+            prepared = prepare_image_for_conversion(decoded, preserve_transparency=fmt in _TRANSPARENT_FORMATS)
+            frames = converter._resize_for_icon(prepared)
+            background = converter._detect_background_color(rgba)
+            params = {"kind": kind, "format": fmt, "size": size, "input_bytes": len(data)}
+            case = f"{kind}-{fmt}-{size}"
+
+            candidates = {
+                "decode": Benchmark(f"decode[{case}]", fixed_args(data), _decode),
+                "detect_background": Benchmark(
+                    f"detect_background[{case}]",
+                    fixed_args(rgba),
+                    converter._detect_background_color,
+                ),
+                "make_transparent": Benchmark(
+                    f"make_transparent[{case}]",
+                    fixed_args(rgba, background),
+                    converter._make_color_transparent,
+                ),
+                "resize": Benchmark(
+                    f"resize[{case}]",
+                    fixed_args(prepared),
+                    converter._resize_for_icon,
+                ),
+                "encode": Benchmark(
+                    f"encode[{case}]",
+                    fixed_args(converter, prepared, frames),
+                    _encode,
+                ),
+            }
+            for stage in stages:
+                benchmark = candidates[stage]
+                yield Benchmark(benchmark.name, benchmark.setup, benchmark.func, {"stage": stage, **params})
@@ -0,0 +1,138 @@
+"""スレッド数別のスループットベンチマーク
+
+同じ数の変換を1〜Nスレッドで分担して実行し、スループット（変換/秒）と1スレッドに対する倍率を計測します。
+GILのあるビルドでは、Pillow・numpyがGILを解放する区間（デコード・リサイズ・圧縮）だけが並列に実行されます。
+フリースレッド版のCPython（``python3.14t`` 等）で同じコマンドを実行すると、Python側の処理も並列に実行されます。
+どちらのビルドで計測したかは表の先頭に出力します。
+
+使用例（backendディレクトリで実行）::
+
+    python -m benchmarks.threads --threads 1,2,4,8 --size 512
+"""
+
+import argparse
+import platform
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from core.logic import IconConverter
+
+from .corpus import generate
+from .runner import Benchmark, BenchmarkResult, measure
+
+THREADS = (1, 2, 4, 8)
+
+
+def gil_enabled() -> bool:
+    """実行中のCPythonでGILが有効か（フリースレッド版でGILを無効にして実行している場合はFalse）"""
+    return bool(getattr(sys, "_is_gil_enabled", lambda: True)())
+
+
+def _prepare(data: bytes, suffix: str) -> tuple[tempfile.TemporaryDirectory[str], Path]:
+    directory = tempfile.TemporaryDirectory(prefix="iconconv-threads-")
+    input_path = Path(directory.name) / f"input{suffix}"
+    input_path.write_bytes(data)
+    return directory, input_path
+
+
+def _convert_all(
+    converter: IconConverter,
+    directory: tempfile.TemporaryDirectory[str],
+    input_path: Path,
+    threads: int,
+    conversions: int,
+) -> None:
+    output_dir = Path(directory.name)
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            outputs = [str(output_dir / f"output-{index}.ico") for index in range(conversions)]
+            list(executor.map(lambda output: converter.convert_image_to_ico(str(input_path), output), outputs))
+    finally:
+        directory.cleanup()
+
+
+def iter_thread_benchmarks(
+    threads: Sequence[int] = THREADS,
+    size: int = 512,
+    conversions: int = 16,
+    kind: str = "photo",
+    fmt: str = "png",
+) -> Iterator[Benchmark]:
+    """スレッド数別のスループットベンチマークを順に生成
+
+    1ラウンドで ``conversions`` 件の変換を ``threads`` スレッドで分担する（変換の総数はスレッド数によらず同じ）。
+    ``IconConverter`` のインスタンスは、APIと同じく全スレッドで共有する。
+
+    Args:
+        threads: スレッド数
+        size: 入力画像の一辺のピクセル数
+        conversions: 1ラウンドで実行する変換の数
+        kind: 入力画像の種類（benchmarks.corpus.KINDS のいずれか）
+        fmt: 入力画像の形式
+
+    Yields:
+        Benchmark: ベンチマーク定義
+    """
+    converter = IconConverter()
+    image = generate(kind, fmt, size)
+    suffix = Path(image.filename).suffix
+    for count in threads:
+        params = {
+            "threads": count,
+            "conversions": conversions,
+            "kind": kind,
+            "format": fmt,
+            "size": size,
+            "gil_enabled": gil_enabled(),
+        }
+        yield Benchmark(
+            f"convert_threads[{kind}-{fmt}-{size}-t{count}]",
+            lambda: (converter, *_prepare(image.data, suffix)),
+            lambda conv, directory, path, n=count: _convert_all(conv, directory, path, n, conversions),
+            params,
+        )
+
+
+def format_thread_table(results: Iterable[BenchmarkResult]) -> str:
+    """計測結果をスループットと1スレッドに対する倍率の表に整形"""
+    results = list(results)
+    build = "GIL" if gil_enabled() else "free-threaded"
+    lines = [
+        f"Python {platform.python_version()} ({build})",
+        f"{'benchmark':<40} {'threads':>8} {'median (ms)':>12} {'conv/s':>10} {'speedup':>8}",
+    ]
+    baseline = next((result for result in results if result.params["threads"] == 1), None)
+    for result in results:
+        throughput = result.params["conversions"] / result.median
+        speedup = f"{baseline.median / result.median:.2f}x" if baseline is not None else "-"
+        lines.append(
+            f"{result.name:<40} {result.params['threads']:>8} {result.median * 1000:>12.1f} "
+            f"{throughput:>10.1f} {speedup:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """スレッド数別ベンチマークCLI"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.threads", description="Thread scaling benchmarks")
+    parser.add_argument("--threads", default=",".join(map(str, THREADS)), help="comma separated thread counts")
+    parser.add_argument("--size", type=int, default=512, help="edge length in pixels")
+    parser.add_argument("--conversions", type=int, default=16, help="conversions per round")
+    parser.add_argument("--min-time", type=float, default=1.0, help="minimum measured seconds per benchmark")
+    parser.add_argument("--max-rounds", type=int, default=10, help="maximum rounds per benchmark")
+    args = parser.parse_args(argv)
+
+    threads = [int(count) for count in args.threads.split(",") if count.strip()]
+    results = [
+        measure(benchmark, min_time=args.min_time, max_rounds=args.max_rounds)
+        for benchmark in iter_thread_benchmarks(threads, args.size, args.conversions)
+    ]
+    sys.stdout.write(format_thread_table(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
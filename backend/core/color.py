@@ -0,0 +1,111 @@
+"""埋め込みICCプロファイルのsRGBへの変換
+
+ICCプロファイルを埋め込んだ画像（Adobe RGBの写真、Display P3のスクリーンショット、CMYKのJPEG等）を、
+リサイズの前にsRGBへ変換します。ICOはカラーマネジメントされないため、変換しないと色がずれます。
+
+``ImageCms`` の変換（transform）の作成は適用より高コストなため、作成済みの変換をプロファイルの
+ハッシュとモードをキーにしたLRUキャッシュ（``ICC_CACHE_SIZE`` 件）で再利用します。実際のトラフィックでは
+同じプロファイルが繰り返し現れるため、2回目以降は適用だけのコストになります。
+sRGBのプロファイルや読み込めないプロファイルは変換せず、その判定結果もキャッシュします。
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from loguru import logger
+from PIL import Image, ImageCms
+
+from .metrics import ICC_TRANSFORM_CACHE
+
+# 作成済みの変換をキャッシュする件数（環境変数で制御）
+ICC_CACHE_SIZE = int(os.getenv("ICC_CACHE_SIZE", "32"))
+
+# 入力モード → 変換後のモード（それ以外のモードは変換しない）
+_OUTPUT_MODES = {"RGB": "RGB", "RGBA": "RGBA", "CMYK": "RGB"}
+
+_SRGB_PROFILE = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB"))
+
+
+def _build_transform(icc_profile: bytes, mode: str) -> ImageCms.ImageCmsTransform | None:
+    """sRGBへの変換を作成（sRGBのプロファイルや読み込めないプロファイルはNone）"""
+    try:
+        profile = ImageCms.ImageCmsProfile(BytesIO(icc_profile))
+        if ImageCms.getProfileDescription(profile).strip().startswith("sRGB"):
+            return None
+        # 変換は複数のスレッドで共有して同時に適用するため、LittleCMSの変換ごとの1画素キャッシュを使わない
+        # （Pillowは適用中にGILを解放するため、GILのあるビルドでも同時に適用される）
+        return ImageCms.buildTransform(profile, _SRGB_PROFILE, mode, _OUTPUT_MODES[mode], flags=ImageCms.Flags.NOCACHE)
+    except (OSError, ImageCms.PyCMSError) as e:
+        logger.warning("ICCプロファイルを読み込めないため色変換を行いません: {}", e)
+        return None
+
+
+class TransformCache:
+    """作成済みのICC変換のLRUキャッシュ（スレッドセーフ）
+
+    変換の作成はロックの外で行うため、同じキーの初回が同時に来た場合は重複して作成されることがある
+    （結果は同じため、後から作成したものでも問題ない）。
+    """
+
+    def __init__(self, maxsize: int = ICC_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[bytes, str], ImageCms.ImageCmsTransform | None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, icc_profile: bytes, mode: str) -> ImageCms.ImageCmsTransform | None:
+        """プロファイルとモードに対応するsRGBへの変換を取得（変換不要の場合はNone）"""
+        key = (hashlib.sha256(icc_profile).digest(), mode)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                ICC_TRANSFORM_CACHE.labels("hit").inc()
+                return self._entries[key]
+
+        ICC_TRANSFORM_CACHE.labels("miss").inc()
+        transform = _build_transform(icc_profile, mode)
+        with self._lock:
+            self._entries[key] = transform
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return transform
+
+    def clear(self) -> None:
+        """キャッシュを空にする"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+transform_cache = TransformCache()
+
+
+def has_icc_profile(image: Image.Image) -> bool:
+    """sRGBへの変換対象になり得るICCプロファイルを持つか"""
+    return bool(image.info.get("icc_profile")) and image.mode in _OUTPUT_MODES
+
+
+def convert_to_srgb(image: Image.Image) -> Image.Image:
+    """埋め込みICCプロファイルに従って画像をsRGBに変換する
+
+    Args:
+        image: 変換する画像（ICCプロファイルがない、または対象外のモードの場合はそのまま返す）
+
+    Returns:
+        Image.Image: sRGBの画像（CMYKはRGBになり、ICCプロファイルは取り除かれる）
+    """
+    if not has_icc_profile(image):
+        return image
+    transform = transform_cache.get(image.info["icc_profile"], image.mode)
+    if transform is None:
+        return image
+    converted = ImageCms.applyTransform(image, transform)
+    assert converted is not None
+    converted.info = {key: value for key, value in image.info.items() if key != "icc_profile"}
+    return converted
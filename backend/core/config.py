@@ -2,6 +2,8 @@
 WINDOW_SIZE = "300x420"
 PREVIEW_SIZE = (256, 256)
 ICON_SIZES = [(16, 16), (32, 32), (48, 48), (64, 64), (128, 128), (256, 256)]
+# ICOに格納する最大のアイコンサイズ（256pxを超えるサイズはICOに格納しない）
+MAX_ICON_EDGE = max(min(size) for size in ICON_SIZES if size[0] <= 256 and size[1] <= 256)
 
 # 背景透明化設定
 DEFAULT_PRESERVE_TRANSPARENCY = True
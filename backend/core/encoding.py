@@ -0,0 +1,209 @@
+"""ICOの項目のエンコードプロファイル
+
+ICOに格納する各サイズの画像を、どの形式・圧縮設定でエンコードするかをプロファイルとして定義します。
+
+- ``fast``: 対話的なAPI呼び出し向け。zlibの圧縮レベル1とRLE戦略で、小さいサイズは圧縮しないBMPで格納する
+- ``balanced``: 既定。Pillowの既定の設定（従来と同一の出力）
+- ``small``: リリースビルド向け。最大圧縮で複数のzlib戦略を試し、色数が256以下の画像はパレット化する
+
+既定のプロファイルは ``ENCODING_PROFILE`` で変更できます。PillowはPNGの行フィルタを選べないため、
+圧縮の傾向は zlib の戦略（``compress_type``）で調整します。
+
+``quantize`` を有効にすると、色数が256以下でアルファが0か255だけの項目を8bitのパレット形式
+（BMP・PNGのうち小さい方）で格納します。色数は梱包したRGBA値に対する ``np.unique`` で数えます。
+"""
+
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from .ico import IconEntry
+
+# 既定のエンコードプロファイル（環境変数で制御）
+ENCODING_PROFILE = os.getenv("ENCODING_PROFILE", "balanced")
+
+# zlib の既定の戦略（Pillowの compress_type の既定値）
+_DEFAULT_STRATEGY = -1
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """ICOの項目のエンコード設定
+
+    Attributes:
+        name: プロファイル名
+        compress_level: PNGのzlib圧縮レベル（-1 はPillowの既定）
+        strategies: 試す zlib の戦略（複数の場合は最も小さい結果を使う）
+        optimize: Pillowの ``optimize`` を有効にするか
+        palettize_max_size: この一辺以下のサイズは、色数が256以下ならパレット化する（0: しない）
+        bmp_max_size: この一辺以下のサイズはBMPで格納する（0: 常にPNG）
+        quantize: 256色以下でアルファが0か255だけの項目を8bitのパレット形式で格納するか
+    """
+
+    name: str
+    compress_level: int = -1
+    strategies: tuple[int, ...] = (_DEFAULT_STRATEGY,)
+    optimize: bool = False
+    palettize_max_size: int = 0
+    bmp_max_size: int = 0
+    quantize: bool = False
+
+    @property
+    def uses_pillow_defaults(self) -> bool:
+        """PillowのICO保存と同一の出力になる設定か"""
+        return self == EncodingProfile(self.name)
+
+
+PROFILES: dict[str, EncodingProfile] = {
+    "fast": EncodingProfile("fast", compress_level=1, strategies=(zlib.Z_RLE,), bmp_max_size=32),
+    "balanced": EncodingProfile("balanced"),
+    "small": EncodingProfile(
+        "small",
+        compress_level=9,
+        strategies=(_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE),
+        optimize=True,
+        palettize_max_size=256,
+    ),
+}
+
+
+def get_profile(name: str | None = None) -> EncodingProfile:
+    """エンコードプロファイルを取得する
+
+    Args:
+        name: プロファイル名（省略時は ``ENCODING_PROFILE``）
+
+    Raises:
+        ValueError: 存在しないプロファイル名の場合
+    """
+    name = name or ENCODING_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"エンコードプロファイル {name} はありません（{', '.join(PROFILES)} のいずれか）")
+    return PROFILES[name]
+
+
+def _palettize(image: Image.Image) -> tuple[Image.Image, np.ndarray | None] | None:
+    """色数が256以下の画像を、色を変えずにパレット画像に変換する
+
+    アルファが0か255だけの画像は、完全に透明な画素の色を (0, 0, 0, 0) にそろえてから数える。
+
+    Returns:
+        tuple[Image.Image, np.ndarray | None] | None: パレット画像と、アルファが0か255だけの場合は
+            透明な画素のマスク（それ以外はNone）。256色を超える場合はNone
+    """
+    rgba = np.asarray(image if image.mode == "RGBA" else image.convert("RGBA"))
+    alpha = rgba[..., 3]
+    transparent = alpha == 0
+    binary = bool((transparent | (alpha == 255)).all())
+    if binary and transparent.any():
+        rgba = rgba.copy()
+        rgba[transparent] = 0
+    # RGBAの4バイトを1つの uint32 に梱包して色を数える
+    pixels = np.ascontiguousarray(rgba).view(np.uint32)[..., 0]
+    colors, indices = np.unique(pixels, return_inverse=True)
+    if len(colors) > 256:
+        return None
+    paletted = Image.fromarray(indices.reshape(pixels.shape).astype(np.uint8), "P")
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    paletted.putpalette(palette[:, :3].tobytes())
+    if (palette[:, 3] != 255).any():
+        paletted.info["transparency"] = palette[:, 3].tobytes()
+    return paletted, transparent if binary else None
+
+
+def _encode_png(image: Image.Image, profile: EncodingProfile) -> bytes:
+    candidates = []
+    for strategy in profile.strategies:
+        buffer = BytesIO()
+        image.save(
+            buffer,
+            format="PNG",
+            compress_level=profile.compress_level,
+            compress_type=strategy,
+            optimize=profile.optimize,
+            transparency=image.info.get("transparency"),
+        )
+        candidates.append(buffer.getvalue())
+    return min(candidates, key=len)
+
+
+def _encode_bmp(image: Image.Image) -> IconEntry:
+    """DIB（ICO用に高さを2倍にし、ANDマスクを付加）にエンコード"""
+    buffer = BytesIO()
+    image.save(buffer, format="DIB")
+    width, height = image.size
+    dib = bytearray(buffer.getvalue())
+    struct.pack_into("<i", dib, 8, height * 2)
+    # 透明度はアルファで表すため、ANDマスクはすべて0（不透明）
+    mask = bytes((width + 31) // 32 * 4 * height)
+    return IconEntry(size=image.size, bit_count=32 if image.mode == "RGBA" else 24, data=bytes(dib) + mask)
+
+
+def _encode_paletted_bmp(paletted: Image.Image, transparent: np.ndarray) -> IconEntry:
+    """8bitのパレットDIBにエンコードし、透明な画素をANDマスクで表す"""
+    buffer = BytesIO()
+    paletted.save(buffer, format="DIB")
+    width, height = paletted.size
+    dib = bytearray(buffer.getvalue())
+    struct.pack_into("<i", dib, 8, height * 2)
+    # ANDマスクは下の行から順に、1行を4バイト境界までパディングして格納する（1: 透明）
+    stride = (width + 31) // 32 * 32
+    rows = np.zeros((height, stride), dtype=bool)
+    rows[:, :width] = transparent
+    mask = np.packbits(rows[::-1], axis=1).tobytes()
+    return IconEntry(size=paletted.size, bit_count=8, data=bytes(dib) + mask)
+
+
+def encode_frame(image: Image.Image, profile: EncodingProfile) -> IconEntry:
+    """画像をプロファイルに従ってICOの項目にエンコードする
+
+    Args:
+        image: RGBA または RGB の画像
+        profile: エンコードプロファイル
+
+    Returns:
+        IconEntry: エンコードした項目
+    """
+    edge = max(image.size)
+    if edge <= profile.bmp_max_size:
+        return _encode_bmp(image)
+    if edge <= profile.palettize_max_size:
+        palettized = _palettize(image)
+        if palettized is not None:
+            return IconEntry(size=image.size, bit_count=8, data=_encode_png(palettized[0], profile))
+    # PNGの項目はPillowのICO保存と同じく32bitとして格納する
+    return IconEntry(size=image.size, bit_count=32, data=_encode_png(image, profile))
+
+
+def quantize_frame(image: Image.Image, profile: EncodingProfile) -> tuple[IconEntry, int]:
+    """256色以下でアルファが0か255だけの画像を8bitのパレット形式の項目にエンコードする
+
+    8bitのBMPとPNGのうち小さい方が、プロファイルどおりにエンコードした項目より小さい場合だけ採用する。
+
+    Args:
+        image: RGBA または RGB の画像
+        profile: エンコードプロファイル
+
+    Returns:
+        tuple[IconEntry, int]: エンコードした項目と削減したバイト数（パレット化しなかった場合は0）
+    """
+    full = encode_frame(image, profile)
+    palettized = _palettize(image)
+    if palettized is None:
+        return full, 0
+    paletted, transparent = palettized
+    if transparent is None:
+        return full, 0
+    candidates = [
+        _encode_paletted_bmp(paletted, transparent),
+        IconEntry(size=image.size, bit_count=8, data=_encode_png(paletted, profile)),
+    ]
+    best = min(candidates, key=lambda entry: len(entry.data))
+    if len(best.data) >= len(full.data):
+        return full, 0
+    return best, len(full.data) - len(best.data)
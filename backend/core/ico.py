@@ -0,0 +1,223 @@
+"""ICO / ICNS の読み書き
+
+既存のアイコンを入力に受け付け、出力に必要なサイズのうち入力に含まれるものは、圧縮済みのデータ（PNG または
+BMP）をデコードせずにそのままコピーするためのモジュールです。入力に含まれないサイズだけを、最適な項目から
+リサンプリングして生成します。
+
+ICNS はPNGで格納された項目だけをそのままコピーできます（ICO はPNGの項目を格納できるため）。
+
+``update_ico`` は既存のICOのうち指定したサイズの項目だけを差し替え、他の項目は圧縮済みのデータのまま残します。
+"""
+
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO
+
+from PIL import Image
+
+_ICO_HEADER = struct.Struct("<HHH")
+_ICO_ENTRY = struct.Struct("<BBBBHHII")
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_ICNS_MAGIC = b"icns"
+
+# ICOに格納できる最大のサイズ
+_MAX_ICO_EDGE = 256
+
+
+@dataclass(frozen=True)
+class IconEntry:
+    """アイコンの1項目
+
+    Attributes:
+        size: 実際の画像の幅と高さ
+        bit_count: 1ピクセルあたりのビット数
+        data: 圧縮済みのデータ（PNG、またはICOの場合はBMPのDIB）
+    """
+
+    size: tuple[int, int]
+    bit_count: int
+    data: bytes
+
+    @property
+    def is_png(self) -> bool:
+        return self.data.startswith(_PNG_SIGNATURE)
+
+
+def _png_header(data: bytes) -> tuple[tuple[int, int], int] | None:
+    """PNGのIHDRからサイズとビット数を読み取る"""
+    if not data.startswith(_PNG_SIGNATURE) or len(data) < 29 or data[12:16] != b"IHDR":
+        return None
+    width, height, depth, color_type = struct.unpack(">IIBB", data[16:26])
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type, 4)
+    return (width, height), depth * channels
+
+
+def _dib_header(data: bytes) -> tuple[tuple[int, int], int] | None:
+    """BMPのDIBヘッダーからサイズとビット数を読み取る（高さはANDマスクを含むため半分にする）"""
+    if len(data) < 16:
+        return None
+    header_size, width, height, _, bit_count = struct.unpack("<IiiHH", data[:16])
+    if header_size < 12 or width <= 0 or height <= 0:
+        return None
+    return (width, height // 2), bit_count
+
+
+def read_ico(data: bytes) -> list[IconEntry]:
+    """ICOの読み取れる項目をすべて読み込む（画素はデコードしない）
+
+    Raises:
+        ValueError: ICOとして不正な場合
+    """
+    if len(data) < _ICO_HEADER.size:
+        raise ValueError("ICOのヘッダーが不完全です")
+    reserved, kind, count = _ICO_HEADER.unpack_from(data)
+    if reserved != 0 or kind != 1:
+        raise ValueError("ICOファイルではありません")
+    entries = []
+    # ディレクトリの範囲外や、ファイルの範囲外を指す項目は読み飛ばす（Pillowと同じく読める項目だけを使う）
+    count = min(count, (len(data) - _ICO_HEADER.size) // _ICO_ENTRY.size)
+    for index in range(count):
+        *_, length, offset = _ICO_ENTRY.unpack_from(data, _ICO_HEADER.size + index * _ICO_ENTRY.size)
+        if offset + length > len(data):
+            continue
+        payload = data[offset : offset + length]
+        header = _png_header(payload) or _dib_header(payload)
+        if header is not None:
+            entries.append(IconEntry(size=header[0], bit_count=header[1], data=payload))
+    return entries
+
+
+def read_icns(data: bytes) -> list[IconEntry]:
+    """ICNSのうちPNGで格納された項目を読み込む（画素はデコードしない）
+
+    Raises:
+        ValueError: ICNSとして不正な場合
+    """
+    if not data.startswith(_ICNS_MAGIC) or len(data) < 8:
+        raise ValueError("ICNSファイルではありません")
+    end = min(struct.unpack(">I", data[4:8])[0], len(data))
+    entries = []
+    position = 8
+    while position + 8 <= end:
+        length = struct.unpack(">I", data[position + 4 : position + 8])[0]
+        if length < 8:
+            raise ValueError("ICNSの項目の長さが不正です")
+        payload = data[position + 8 : position + length]
+        header = _png_header(payload)
+        if header is not None:
+            entries.append(IconEntry(size=header[0], bit_count=header[1], data=payload))
+        position += length
+    return entries
+
+
+def read_icon_entries(data: bytes) -> list[IconEntry]:
+    """ICO / ICNS の項目を読み込む
+
+    Raises:
+        ValueError: ICO / ICNS として不正な場合
+    """
+    return read_icns(data) if data.startswith(_ICNS_MAGIC) else read_ico(data)
+
+
+def write_ico(entries: list[IconEntry], fp: BinaryIO | str) -> None:
+    """項目の圧縮済みデータをそのまま格納してICOを書き出す
+
+    Args:
+        entries: 格納する項目（256px以下）
+        fp: 出力先のパスまたはバイナリストリーム
+    """
+    directory = bytearray(_ICO_HEADER.pack(0, 1, len(entries)))
+    offset = _ICO_HEADER.size + _ICO_ENTRY.size * len(entries)
+    for entry in entries:
+        width, height = entry.size
+        if width > _MAX_ICO_EDGE or height > _MAX_ICO_EDGE:
+            raise ValueError(f"ICOに格納できないサイズです: {width}x{height}")
+        # 幅・高さの 0 は256pxを表す
+        directory += _ICO_ENTRY.pack(width % 256, height % 256, 0, 0, 1, entry.bit_count, len(entry.data), offset)
+        offset += len(entry.data)
+    payload = bytes(directory) + b"".join(entry.data for entry in entries)
+    if isinstance(fp, str):
+        with open(fp, "wb") as f:
+            f.write(payload)
+    else:
+        fp.write(payload)
+
+
+def decode_entry(entry: IconEntry) -> Image.Image:
+    """項目の画素をデコードする（BMPの項目はANDマスクを透明度として反映する）"""
+    if entry.is_png:
+        image = Image.open(BytesIO(entry.data))
+    else:
+        buffer = BytesIO()
+        write_ico([entry], buffer)
+        image = Image.open(BytesIO(buffer.getvalue()))
+    image.load()
+    return image
+
+
+def encode_entry(image: Image.Image) -> IconEntry:
+    """画像をPNGの項目にエンコードする（PillowのICO保存と同じく32bitとして格納）"""
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return IconEntry(size=image.size, bit_count=32, data=buffer.getvalue())
+
+
+def replace_entries(entries: list[IconEntry], images: list[Image.Image]) -> list[IconEntry]:
+    """同じサイズの項目を画像で差し替える（他の項目はそのまま残す）
+
+    同じサイズの項目が複数ある場合（ビット数違い）は、最初の位置に差し替えた項目を置き、残りは削除する。
+    同じサイズの項目がない画像は末尾に追加する。
+
+    Args:
+        entries: 既存の項目
+        images: 差し替える画像（サイズごとに1枚、256px以下）
+
+    Returns:
+        list[IconEntry]: 差し替え後の項目
+
+    Raises:
+        ValueError: 画像のサイズが重複している、またはICOに格納できないサイズの場合
+    """
+    replacements: dict[tuple[int, int], IconEntry] = {}
+    for image in images:
+        width, height = image.size
+        if width > _MAX_ICO_EDGE or height > _MAX_ICO_EDGE:
+            raise ValueError(f"ICOに格納できないサイズです: {width}x{height}")
+        if image.size in replacements:
+            raise ValueError(f"同じサイズの画像が複数指定されています: {width}x{height}")
+        replacements[image.size] = encode_entry(image if image.mode == "RGBA" else image.convert("RGBA"))
+
+    result = []
+    replaced = set()
+    for entry in entries:
+        if entry.size not in replacements:
+            result.append(entry)
+        elif entry.size not in replaced:
+            result.append(replacements[entry.size])
+            replaced.add(entry.size)
+    result.extend(entry for size, entry in replacements.items() if size not in replaced)
+    return result
+
+
+def update_ico(data: bytes, images: list[Image.Image]) -> bytes:
+    """既存のICOのうち画像と同じサイズの項目だけを差し替える
+
+    差し替えない項目はデコード・再エンコードせず、圧縮済みのデータをそのままコピーする。
+
+    Args:
+        data: 既存のICOのバイト列
+        images: 差し替える画像（サイズごとに1枚、256px以下）
+
+    Returns:
+        bytes: 更新後のICOのバイト列
+
+    Raises:
+        ValueError: ICOとして不正、または画像のサイズが不正な場合
+    """
+    entries = read_ico(data)
+    if not entries:
+        raise ValueError("ICOに読み取れる項目がありません")
+    buffer = BytesIO()
+    write_ico(replace_entries(entries, images), buffer)
+    return buffer.getvalue()
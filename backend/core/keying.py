@@ -0,0 +1,73 @@
+"""背景色の透明化（タイル単位の処理）
+
+元の解像度で背景色を透明化する場合、画像全体を1つのnumpy式で処理すると、色差の計算の中間配列
+（1ピクセルあたり数十バイト）が画像全体の大きさで確保されます。ここでは画像を行の帯（タイル）に分けて
+処理し、透明にするピクセルがあるタイルだけアルファを書き換えて画像に貼り戻します。画像全体の大きさの
+アルファのプレーンは作らないため、作業用のメモリはタイルの大きさ × 同時に処理するスレッド数に収まります。
+
+タイルは ``core.parallel`` のヘルパーで並列に処理します（numpyは大きな配列の演算の間GILを解放します）。
+ヘルパーの予約は ``RESIZE_PARALLELISM`` と実行スレッドの負荷に従います。
+"""
+
+import os
+import threading
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from .parallel import fan_out, run_parallel
+
+# 1タイルのピクセル数（行単位に切り上げる）（環境変数で制御）
+KEY_TILE_PIXELS = int(os.getenv("KEY_TILE_PIXELS", "262144"))
+
+
+def _bands(width: int, height: int, tile_pixels: int) -> list[tuple[int, int]]:
+    rows = max(1, tile_pixels // max(width, 1))
+    return [(top, min(top + rows, height)) for top in range(0, height, rows)]
+
+
+def key_color(image: Image.Image, target_color: Any, tolerance: float = 10, tile_pixels: int | None = None) -> int:
+    """RGBA画像の ``target_color`` との色差が ``tolerance`` 以下のピクセルを透明にする（画像をそのまま書き換える）
+
+    色差はRGBのユークリッド距離。整数の2乗和で比較するため、平方根を取る従来の計算と同じピクセルが対象になる。
+
+    Args:
+        image: RGBAモードの画像（読み取り専用の画像は、最初の貼り戻しで Pillow が画像全体を複製する）
+        target_color: 透明にする色（先頭の3要素をRGBとして使う）
+        tolerance: 色差の許容範囲
+        tile_pixels: 1タイルのピクセル数（省略時は ``KEY_TILE_PIXELS``）
+
+    Returns:
+        int: 透明にしたピクセル数
+    """
+    if image.mode != "RGBA":
+        raise ValueError(f"RGBA画像が必要です: {image.mode}")
+    if tolerance < 0:
+        return 0
+    width, height = image.size
+    target = np.array(target_color[:3], dtype=np.int32)
+    limit = tolerance * tolerance
+    # タイルの貼り戻しを直列化する（貼り戻す範囲は重ならないが、同じ画像への書き込みのため）
+    paste_lock = threading.Lock()
+
+    def key_band(band: tuple[int, int]) -> int:
+        top, bottom = band
+        tile = image.crop((0, top, width, bottom))
+        pixels = np.asarray(tile)
+        # 色差の2乗の最大値は 3 * 255**2 のため int32 に収まる
+        diff = pixels[:, :, :3].astype(np.int32)
+        diff -= target
+        mask = np.einsum("ijk,ijk->ij", diff, diff) <= limit
+        keyed = int(np.count_nonzero(mask))
+        if keyed:
+            alpha = pixels[:, :, 3].copy()
+            alpha[mask] = 0
+            tile.putalpha(Image.fromarray(alpha))
+            with paste_lock:
+                image.paste(tile, (0, top))
+        return keyed
+
+    bands = _bands(width, height, KEY_TILE_PIXELS if tile_pixels is None else tile_pixels)
+    with fan_out(len(bands)) as workers:
+        return sum(run_parallel(key_band, bands, workers))
@@ -1,32 +1,170 @@
 """ロガー設定モジュール
 
 構造化ログ（JSON形式）の設定を提供します。
+
+ログ行の書き込みはバックグラウンドスレッドで行うため、リクエスト処理中は
+整形済みの行をキューに積むだけで済みます。成功ログ（INFO以下）はリクエスト単位でサンプリングでき、
+WARNING以上のログは常に出力されます。
 """
 
+import os
+import queue
+import random
 import sys
+import threading
+from typing import Any, TextIO
 
 from loguru import logger
 
+from .metrics import LOG_LINES_DROPPED
+
+# 成功ログ（INFO以下）を出力するリクエストの割合（0.0〜1.0）
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+# 書き込み待ちのログ行の上限（超えた分は破棄して iconconv_log_lines_dropped_total に数える）
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# サンプリングに関係なく常に出力するログレベル（WARNING）
+_ALWAYS_KEEP_LEVEL = logger.level("WARNING").no
+
+
+class _BackgroundWriter:
+    """整形済みのログ行をキューに積み、専用スレッドで出力先へ書き込むシンク
+
+    loguru の ``enqueue=True`` はレコード全体を pickle するため、プロセス内の書き込みでは
+    同期書き込みより遅くなる。ここでは整形済みの文字列だけを受け渡し、リクエスト処理中は
+    キューへの追加だけで済むようにする。
+
+    出力先が詰まってもメモリが増え続けないよう、キューは ``max_lines`` 行までとし、あふれた行は破棄する。
+    破棄した行と書き込みに失敗した行は ``iconconv_log_lines_dropped_total`` に数え、書き込みの失敗は
+    最初の1回だけ ``sys.__stderr__`` に報告する（ログ出力の障害でリクエスト処理を止めない）。
+    """
+
+    def __init__(self, stream: TextIO, max_lines: int = LOG_QUEUE_SIZE) -> None:
+        self._stream = stream
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=max(max_lines, 1))
+        self._failure_reported = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _report_failure(self, error: Exception) -> None:
+        LOG_LINES_DROPPED.labels("write_error").inc()
+        if self._failure_reported:
+            return
+        self._failure_reported = True
+        try:
+            if sys.__stderr__ is not None:
+                sys.__stderr__.write(
+                    f"Log writer failed ({error!r}); failed lines are counted in iconconv_log_lines_dropped_total\n"
+                )
+                sys.__stderr__.flush()
+        except Exception:  # 標準エラー出力も使えない場合は数えるだけにする
+            pass
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            try:
+                if message is None:
+                    return
+                self._stream.write(message)
+                # キューが空になったときだけフラッシュしてシステムコールをまとめる
+                if self._queue.empty():
+                    self._stream.flush()
+            except Exception as e:  # 出力先の障害でログ出力を止めない
+                self._report_failure(e)
+            finally:
+                self._queue.task_done()
+
+    def write(self, message: str) -> None:
+        """ログ行をキューに追加（キューが一杯の場合は破棄して数える）"""
+        try:
+            self._queue.put_nowait(str(message))
+        except queue.Full:
+            LOG_LINES_DROPPED.labels("queue_full").inc()
+
+    def drain(self) -> None:
+        """キューに積まれたログ行がすべて書き込まれるまで待つ"""
+        self._queue.join()
+
+    def stop(self) -> None:
+        """残りのログ行を書き込んでスレッドを終了（ハンドラー削除時に loguru から呼ばれる）"""
+        try:
+            self._queue.put(None, timeout=5)
+        except queue.Full:  # 出力先が詰まったままの場合は待たずに終了する（デーモンスレッド）
+            return
+        self._thread.join(timeout=5)
+
+
+# setup_logger の同時呼び出しでハンドラーや書き込みスレッドが重複しないようにするロック
+_setup_lock = threading.Lock()
 
-def setup_logger(log_level: str = "INFO") -> None:
+# 適用済みの設定（同じ設定での再適用を省略するため）
+_applied_config: tuple[Any, ...] | None = None
+_sample_rate = LOG_SUCCESS_SAMPLE_RATE
+_writer: _BackgroundWriter | None = None
+
+
+def _sampling_filter(record: Any) -> bool:
+    """サンプリング対象外のリクエストの成功ログを除外"""
+    return bool(record["level"].no >= _ALWAYS_KEEP_LEVEL or record["extra"].get("sampled", True))
+
+
+def should_sample() -> bool:
+    """リクエストの成功ログを出力するか判定
+
+    ログ処理のミドルウェアでリクエストごとに1回呼び出し、結果を ``logger.contextualize(sampled=...)``
+    で同じリクエストのログ全体に適用する。
+
+    Returns:
+        bool: 成功ログを出力する場合はTrue
+    """
+    return _sample_rate >= 1.0 or random.random() < _sample_rate
+
+
+def setup_logger(log_level: str = "INFO", sink: TextIO | None = None, sample_rate: float | None = None) -> None:
     """ロガーをセットアップする
 
     構造化ログ（JSON形式）を出力するように設定します。
+    同じ設定で複数回呼び出した場合、2回目以降は何もしません。複数のスレッドから同時に呼び出しても
+    ハンドラーは1つだけ登録されます。
 
     Args:
         log_level: ログレベル（DEBUG, INFO, WARNING, ERROR, CRITICAL）
+        sink: 出力先（デフォルト: 標準出力）
+        sample_rate: 成功ログを出力するリクエストの割合（デフォルト: LOG_SUCCESS_SAMPLE_RATE）
     """
-    # デフォルトのハンドラーを削除
-    logger.remove()
-
-    # JSON形式のログを標準出力に追加
-    logger.add(
-        sys.stdout,
-        format="{message}",
-        level=log_level,
-        serialize=True,  # JSON形式で出力
-        backtrace=True,
-        diagnose=True,
-    )
-
-    logger.info(f"Logger initialized with level: {log_level}")
+    global _applied_config, _sample_rate, _writer
+
+    if sample_rate is None:
+        sample_rate = LOG_SUCCESS_SAMPLE_RATE
+    if sink is None:
+        sink = sys.stdout
+    config = (log_level, sink, sample_rate)
+    with _setup_lock:
+        if config == _applied_config:
+            return
+
+        # デフォルトのハンドラーを削除
+        logger.remove()
+
+        # JSON形式のログを標準出力に追加（書き込みはバックグラウンドスレッドで行う）
+        _writer = _BackgroundWriter(sink)
+        logger.add(
+            _writer,
+            format="{message}",
+            level=log_level,
+            serialize=True,  # JSON形式で出力
+            filter=_sampling_filter,
+            backtrace=True,
+            diagnose=True,
+        )
+        _applied_config = config
+        _sample_rate = sample_rate
+
+        logger.info("Logger initialized with level: {} (success sample rate: {})", log_level, sample_rate)
+
+
+def flush() -> None:
+    """バックグラウンドで書き込み中のログをすべて出力し終えるまで待つ"""
+    if _writer is not None:
+        _writer.drain()
@@ -1,17 +1,67 @@
+import math
+from dataclasses import replace
 from typing import Any
 
-import numpy as np
 from loguru import logger
-from PIL import Image
+from PIL import ExifTags, Image, TiffImagePlugin
 
-from .config import ICON_SIZES
-from .utils import is_transparency_supported, prepare_image_for_conversion, setup_logger
+from .color import convert_to_srgb, has_icc_profile
+from .config import ICON_SIZES, MAX_ICON_EDGE
+from .encoding import EncodingProfile, encode_frame, get_profile, quantize_frame
+from .ico import IconEntry, decode_entry, read_icon_entries, write_ico
+from .keying import key_color
+from .parallel import fan_out, run_parallel
+from .stats import ConversionStats
+from .svg import SvgDocument, fit_svg_size, get_renderer, parse_svg
+from .tiff import decode_tiff
+from .tracing import span
+from .utils import (
+    FRAME_FIRST,
+    apply_orientation,
+    can_prepare_after_resize,
+    exif_orientation,
+    get_file_extension,
+    is_transparency_supported,
+    prepare_image_for_conversion,
+    select_frame,
+)
 
+# 項目を再パックできるアイコン形式
+_ICON_EXTENSIONS = {".ico", ".icns"}
 
-class IconConverter:
-    def __init__(self):
-        setup_logger(self.__class__.__name__)
 
+def _fit_icon_size(image_size: tuple[int, int], icon_size: tuple[int, int]) -> tuple[int, int]:
+    """アスペクト比を保ったままアイコンサイズに収まる寸法を計算
+
+    Pillowの ``Image.thumbnail`` と同じ丸め規則を用いるため、
+    ICO保存時に内部で縮小していた従来の出力と同一の寸法になる。
+    """
+    width, height = image_size
+    x, y = icon_size
+    if x >= width and y >= height:
+        return width, height
+
+    def round_aspect(number: float, key: Any) -> int:
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+    aspect = width / height
+    if x / y >= aspect:
+        x = round_aspect(y * aspect, key=lambda n: abs(aspect - n / y))
+    else:
+        y = round_aspect(x / aspect, key=lambda n: 0 if n == 0 else abs(aspect - x / n))
+    return x, y
+
+
+def _log_success(input_path: str, output_ico_path: str, preserve_transparency: bool, auto_transparent_bg: bool) -> None:
+    """変換成功ログを透明化の状態とともに出力"""
+    if auto_transparent_bg and not preserve_transparency:
+        transparency_status = "自動背景透明化"
+    else:
+        transparency_status = "透明化保持" if preserve_transparency else "透明化無効"
+    logger.info("変換成功: {} -> {} ({})", input_path, output_ico_path, transparency_status)
+
+
+class IconConverter:
     def _detect_background_color(self, image: Image.Image, tolerance: int = 10) -> Any:
         """画像の四隅の色を検出して背景色を推定"""
         width, height = image.size
@@ -30,22 +80,238 @@ class IconConverter:
         return background_color
 
     def _make_color_transparent(self, image: Image.Image, target_color: Any, tolerance: int = 10) -> Image.Image:
-        """指定した色を透明化"""
-        # RGBAモードに変換
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
+        """指定した色を透明化（渡された画像は書き換えない）"""
+        # RGBAモードに変換（変換が不要な場合は複製して透明化する）
+        keyed = prepare_image_for_conversion(image, preserve_transparency=True)
+        if keyed is image:
+            keyed = image.copy()
+        key_color(keyed, target_color, tolerance)
+        return keyed
+
+    def _decode_image(self, input_path: str, frame: int | str = FRAME_FIRST) -> Image.Image:
+        """画像ファイルを開き、変換に使うフレームのピクセルデータだけを読み込む
+
+        大きなTIFFは、最大のアイコンサイズを満たす範囲で縮小画像やタイル単位の縮小を使ってデコードする。
+        """
+        image = Image.open(input_path)
+        select_frame(image, frame)
+        if isinstance(image, TiffImagePlugin.TiffImageFile):
+            decoded = decode_tiff(image, MAX_ICON_EDGE)
+            # 縮小デコードした画像にも色変換のためICCプロファイルを、向きの補正のためEXIFの向きを引き継ぐ
+            if "icc_profile" in image.info:
+                decoded.info.setdefault("icc_profile", image.info["icc_profile"])
+            orientation = exif_orientation(image)
+            if orientation != 1:
+                exif = Image.Exif()
+                exif[ExifTags.Base.Orientation] = orientation
+                decoded.info["exif"] = exif.tobytes()
+            return decoded
+        image.load()
+        return image
+
+    def _resize_for_icon(self, image: Image.Image) -> list[Image.Image]:
+        """ICOに格納する各サイズの画像を生成
+
+        画像より大きいサイズ（および256pxを超えるサイズ）は従来どおり除外する。
+        ``RESIZE_PARALLELISM`` が有効で実行スレッドに余裕がある場合は、サイズごとに並列にリサイズする。
+        """
+        width, height = image.size
+        sizes = [
+            size
+            for size in sorted(set(ICON_SIZES))
+            if size[0] <= width and size[1] <= height and size[0] <= 256 and size[1] <= 256
+        ]
+
+        def resize(size: tuple[int, int]) -> Image.Image:
+            with span("resize.size") as size_span:
+                size_span.set_attribute("size", size[0])
+                return image.resize(_fit_icon_size(image.size, size), Image.Resampling.LANCZOS)
+
+        # 実行スレッドに余裕があればサイズごとにヘルパースレッドへ分担する
+        with fan_out(len(sizes)) as workers:
+            return run_parallel(resize, sizes, workers)
+
+    def _prepare_frames(
+        self, image: Image.Image, preserve_transparency: bool, orientation: int = 1
+    ) -> tuple[Image.Image, list[Image.Image]]:
+        """画像を作業モードに前処理し、ICOに格納する各サイズの画像を生成
+
+        縮小と順序を入れ替えても結果が同じ前処理（L・LA・RGBからの変換）は、元の解像度ではなく縮小後の
+        各サイズで行う。EXIFの向きも、元の解像度の画像をコピーしないよう縮小後の各サイズに適用する。
+
+        Args:
+            image: デコードした画像
+            preserve_transparency: 透明度を保持するか
+            orientation: EXIFの向き（1: 正常の場合は向きを変えない）
 
-        # 画像データをnumpy配列に変換
-        img_array = np.array(image)
+        Returns:
+            tuple[Image.Image, list[Image.Image]]: 前処理した画像（縮小後に前処理した場合は最大サイズの画像）と
+                各サイズの画像
+        """
+        if can_prepare_after_resize(image, preserve_transparency):
+            frames = self._resize_for_icon(image)
+            frames = [prepare_image_for_conversion(frame, preserve_transparency) for frame in frames]
+            image = frames[-1] if frames else prepare_image_for_conversion(image, preserve_transparency)
+        else:
+            image = prepare_image_for_conversion(image, preserve_transparency)
+            frames = self._resize_for_icon(image)
+        if orientation != 1:
+            frames = [apply_orientation(frame, orientation) for frame in frames]
+            image = frames[-1] if frames else apply_orientation(image, orientation)
+        return image, frames
 
-        # 色の類似度を計算
-        color_diff = np.sqrt(np.sum((img_array[:, :, :3] - target_color[:3]) ** 2, axis=2))
+    def _encode_ico(
+        self,
+        image: Image.Image,
+        frames: list[Image.Image],
+        output_ico_path: str,
+        profile: EncodingProfile | None = None,
+        stats: ConversionStats | None = None,
+    ) -> None:
+        """リサイズ済みの画像をプロファイルに従ってICOファイルとして書き出す
+
+        サイズごとのエンコードを並列化できる場合は、Pillowの既定の設定でも項目を個別にエンコードする
+        （項目のデータはPillowのICO保存と同一）。
+        """
+        profile = profile or get_profile()
+        with fan_out(len(frames)) as workers:
+            if profile.uses_pillow_defaults and workers == 1:
+                # サイズが一致する画像を append_images で渡すとPillow側での再リサイズは行われない
+                image.save(
+                    output_ico_path,
+                    format="ICO",
+                    sizes=[frame.size for frame in frames],
+                    append_images=frames,
+                )
+                return
+            encoded = run_parallel(lambda frame: self._encode_frame(frame, profile), frames, workers)
+        for _, saved in encoded:
+            self._record_palette_savings(saved, stats)
+        write_ico([entry for entry, _ in encoded], output_ico_path)
+
+    def _encode_entry(
+        self,
+        frame: Image.Image,
+        profile: EncodingProfile,
+        stats: ConversionStats | None = None,
+    ) -> IconEntry:
+        """1サイズ分の画像をICOの項目にエンコード（パレット化した場合は削減量を stats に記録）"""
+        entry, saved = self._encode_frame(frame, profile)
+        self._record_palette_savings(saved, stats)
+        return entry
 
-        # 類似度が閾値以下のピクセルを透明化
-        mask = color_diff <= tolerance
-        img_array[mask, 3] = 0  # アルファチャンネルを0（透明）に設定
+    def _encode_frame(self, frame: Image.Image, profile: EncodingProfile) -> tuple[IconEntry, int]:
+        """1サイズ分の画像をICOの項目にエンコード（ヘルパースレッドから呼び出すため stats には記録しない）
 
-        return Image.fromarray(img_array)
+        Returns:
+            tuple[IconEntry, int]: 項目と、パレット化で削減したバイト数（パレット化しなかった場合は0）
+        """
+        if not profile.quantize:
+            return encode_frame(frame, profile), 0
+        return quantize_frame(frame, profile)
+
+    def _record_palette_savings(self, saved: int, stats: ConversionStats | None) -> None:
+        if saved and stats is not None:
+            stats.palettized_entries += 1
+            stats.palette_saved_bytes += saved
+
+    def _render_svg(self, document: SvgDocument) -> list[Image.Image]:
+        """SVGをICOに格納する各サイズで個別にラスタライズ"""
+        renderer = get_renderer()
+        frames = []
+        for size in sorted(set(ICON_SIZES)):
+            if size[0] > 256 or size[1] > 256:
+                continue
+            with span("resize.size") as size_span:
+                size_span.set_attribute("size", size[0])
+                frames.append(renderer.render(document.data, fit_svg_size(document.size, size)))
+        return frames
+
+    def _convert_svg_to_ico(
+        self,
+        input_path: str,
+        output_ico_path: str,
+        preserve_transparency: bool,
+        auto_transparent_bg: bool,
+        stats: ConversionStats,
+        profile: EncodingProfile,
+    ) -> None:
+        """SVGを大きなビットマップを経由せずにICOに変換"""
+        with stats.measure("decode"), open(input_path, "rb") as f:
+            document = parse_svg(f.read())
+
+        with stats.measure("resize"):
+            frames = self._render_svg(document)
+
+        # 自動背景透明化（背景色は最大サイズの画像から推定し、全サイズに適用）
+        if auto_transparent_bg and not preserve_transparency:
+            with stats.measure("key"):
+                background_color = self._detect_background_color(frames[-1])
+                frames = [self._make_color_transparent(frame, background_color) for frame in frames]
+            logger.info("背景色 {} を自動透明化", background_color)
+
+        # 自動背景透明化で付けたアルファは保持する
+        keep_alpha = preserve_transparency or auto_transparent_bg
+        frames = [prepare_image_for_conversion(frame, keep_alpha) for frame in frames]
+
+        with stats.measure("encode"):
+            self._encode_ico(frames[-1], frames, output_ico_path, profile, stats)
+
+    def _repack_icon(
+        self,
+        input_path: str,
+        output_ico_path: str,
+        stats: ConversionStats,
+        profile: EncodingProfile,
+    ) -> bool:
+        """既存のICO / ICNSを再パック
+
+        出力するサイズのうち入力に同じサイズの項目があるものは、圧縮済みのデータをそのままコピーする。
+        ない場合だけ、そのサイズ以上で最も小さい項目（なければ最大の項目）からリサンプリングする。
+
+        Returns:
+            bool: 再パックした場合True。コピーできる項目がない場合はFalse（通常の変換を行う）
+        """
+        with stats.measure("decode"), open(input_path, "rb") as f:
+            try:
+                entries = read_icon_entries(f.read())
+            except ValueError as e:  # Pillowで開ける範囲の不正なファイルは通常の変換に任せる
+                logger.warning("アイコンの項目を読み取れないため通常の変換を行います: {}", e)
+                return False
+        if not entries:
+            return False
+
+        largest = max(entries, key=lambda entry: entry.size[0] * entry.size[1]).size
+        by_size: dict[tuple[int, int], IconEntry] = {}
+        for entry in entries:
+            if entry.size not in by_size or entry.bit_count > by_size[entry.size].bit_count:
+                by_size[entry.size] = entry
+
+        output: list[IconEntry] = []
+        decoded: dict[tuple[int, int], Image.Image] = {}
+        resampled = 0
+        with stats.measure("resize"):
+            for size in sorted(set(ICON_SIZES)):
+                if size[0] > largest[0] or size[1] > largest[1] or size[0] > 256 or size[1] > 256:
+                    continue
+                target = _fit_icon_size(largest, size)
+                if target in by_size:
+                    output.append(by_size[target])
+                    continue
+                sources = [entry for entry in entries if entry.size[0] >= target[0] and entry.size[1] >= target[1]]
+                source = min(sources, key=lambda entry: (entry.size[0] * entry.size[1], -entry.bit_count))
+                with span("resize.size") as size_span:
+                    size_span.set_attribute("size", size[0])
+                    if source.size not in decoded:
+                        decoded[source.size] = decode_entry(source).convert("RGBA")
+                    resized = decoded[source.size].resize(target, Image.Resampling.LANCZOS)
+                    output.append(self._encode_entry(resized, profile, stats))
+                resampled += 1
+
+        with stats.measure("encode"):
+            write_ico(output, output_ico_path)
+        logger.info("アイコンを再パック: {} サイズをコピー、{} サイズを再生成", len(output) - resampled, resampled)
+        return True
 
     def convert_image_to_ico(
         self,
@@ -53,38 +319,82 @@ class IconConverter:
         output_ico_path: str,
         preserve_transparency: bool = True,
         auto_transparent_bg: bool = False,
+        stats: ConversionStats | None = None,
+        frame: int | str = FRAME_FIRST,
+        profile: str | None = None,
+        palettize: bool = False,
     ) -> None:
-        """画像をICOファイルに変換（Web API用にメッセージボックスを削除）"""
+        """画像をICOファイルに変換（Web API用にメッセージボックスを削除）
+
+        ``stats`` を渡すと decode / key / resize / encode の各ステージの処理時間が記録される。
+        複数フレームの画像（アニメーションGIF・WebP、複数ページのTIFF）は ``frame`` で選んだフレームを変換する。
+        SVGは各アイコンサイズで個別にラスタライズする（resize ステージがラスタライズの時間になる）。
+        ICO / ICNS は同じサイズの項目をそのままコピーし、足りないサイズだけを生成する。
+        各サイズのエンコード設定は ``profile``（fast / balanced / small、省略時は ``ENCODING_PROFILE``）で選ぶ。
+        ``palettize`` を有効にすると、256色以下でアルファが0か255だけのサイズを8bitのパレット形式で格納し、
+        削減したバイト数を ``stats`` に記録する。
+        """
+        if stats is None:
+            stats = ConversionStats()
         try:
-            original_image = Image.open(input_path)
-            # 型アノテーションのために明示的にキャスト
-            image: Image.Image = original_image
+            encoding = get_profile(profile)
+            if palettize:
+                encoding = replace(encoding, quantize=True)
+            extension = get_file_extension(input_path)
+            if extension == ".svg":
+                self._convert_svg_to_ico(
+                    input_path,
+                    output_ico_path,
+                    preserve_transparency,
+                    auto_transparent_bg,
+                    stats,
+                    encoding,
+                )
+                _log_success(input_path, output_ico_path, preserve_transparency, auto_transparent_bg)
+                return
+            # 既存のアイコンは、画素を変更するオプションがなければ項目をそのままコピーして再パックする
+            if (
+                extension in _ICON_EXTENSIONS
+                and preserve_transparency
+                and not auto_transparent_bg
+                and self._repack_icon(input_path, output_ico_path, stats, encoding)
+            ):
+                _log_success(input_path, output_ico_path, preserve_transparency, auto_transparent_bg)
+                return
+
+            with stats.measure("decode"):
+                image = self._decode_image(input_path, frame)
+                orientation = exif_orientation(image)
+
+            # 埋め込みICCプロファイルがあればリサイズ前にsRGBへ変換
+            if has_icc_profile(image):
+                with stats.measure("color"):
+                    image = convert_to_srgb(image)
 
             # ファイル形式に応じた透明化サポートチェック
             if preserve_transparency and not is_transparency_supported(input_path):
-                logger.warning(f"ファイル形式 {input_path} は透明化をサポートしていません")
+                logger.warning("ファイル形式 {} は透明化をサポートしていません", input_path)
                 preserve_transparency = False
 
-            # 自動背景透明化
+            # 自動背景透明化（背景色はRGBAに前処理した画像の四隅から推定）
             if auto_transparent_bg and not preserve_transparency:
-                background_color = self._detect_background_color(image)
-                image = self._make_color_transparent(image, background_color)
-                logger.info(f"背景色 {background_color} を自動透明化")
-
-            # 画像前処理（utils.pyの責務）
-            processed_image = prepare_image_for_conversion(image, preserve_transparency)
-            image = processed_image
+                with stats.measure("key"):
+                    image = prepare_image_for_conversion(image, preserve_transparency=True)
+                    background_color = self._detect_background_color(image)
+                    # 前処理した画像は変換内だけで使うため、元の解像度のままアルファをタイル単位で書き換える
+                    key_color(image, background_color)
+                logger.info("背景色 {} を自動透明化", background_color)
 
-            image.save(output_ico_path, format="ICO", sizes=ICON_SIZES)
+            # 画像前処理（utils.pyの責務）とリサイズ（自動背景透明化で付けたアルファは保持する）
+            with stats.measure("resize"):
+                image, frames = self._prepare_frames(image, preserve_transparency or auto_transparent_bg, orientation)
 
-            if auto_transparent_bg and not preserve_transparency:
-                transparency_status = "自動背景透明化"
-            else:
-                transparency_status = "透明化保持" if preserve_transparency else "透明化無効"
+            with stats.measure("encode"):
+                self._encode_ico(image, frames, output_ico_path, encoding, stats)
 
-            logger.info(f"変換成功: {input_path} -> {output_ico_path} ({transparency_status})")
+            _log_success(input_path, output_ico_path, preserve_transparency, auto_transparent_bg)
         except Exception as e:
-            logger.error(f"変換失敗: {input_path} -> {output_ico_path} | {e}")
+            logger.error("変換失敗: {} -> {} | {}", input_path, output_ico_path, e)
             raise
 
     # 後方互換性のため、古い関数名も残す
@@ -94,6 +404,7 @@ class IconConverter:
         output_ico_path: str,
         preserve_transparency: bool = True,
         auto_transparent_bg: bool = False,
+        stats: ConversionStats | None = None,
     ) -> None:
         """後方互換性のためのエイリアス"""
-        self.convert_image_to_ico(input_png_path, output_ico_path, preserve_transparency, auto_transparent_bg)
+        self.convert_image_to_ico(input_png_path, output_ico_path, preserve_transparency, auto_transparent_bg, stats)
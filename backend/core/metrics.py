@@ -0,0 +1,570 @@
+"""メトリクス収集モジュール
+
+Prometheusテキスト形式（0.0.4）で出力できる軽量なメトリクスを提供します。
+外部ライブラリに依存せず、値の更新はラベル値ごとの短いロック区間だけで完結するため、
+変換処理のホットパスから呼び出してもレイテンシにほとんど影響しません。
+"""
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import Generic, TypeVar
+
+# Prometheusテキスト形式のContent-Type
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# 処理時間ヒストグラムのデフォルトバケット（秒）
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# メモリ量ヒストグラムのバケット（バイト）: 1MiB〜1GiB
+MEMORY_BUCKETS: tuple[float, ...] = tuple(float(2**n) for n in range(20, 31, 2))
+
+
+def _format_value(value: float) -> str:
+    """数値をPrometheusテキスト形式の表記に変換"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    """ラベル値をエスケープ"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """ラベル集合を `{name="value",...}` 形式に整形"""
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values, strict=True))
+    return "{" + pairs + "}"
+
+
+class _CounterChild:
+    """単一ラベル値のカウンター"""
+
+    __slots__ = ("_lock", "_value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """カウンターを加算
+
+        Args:
+            amount: 加算量（0以上）
+
+        Raises:
+            ValueError: 負の値が指定された場合
+        """
+        if amount < 0:
+            raise ValueError("カウンターは減少できません")
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        """現在値を取得"""
+        return self._value
+
+
+class _GaugeChild:
+    """単一ラベル値のゲージ"""
+
+    __slots__ = ("_function", "_lock", "_value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        """ゲージを加算"""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """ゲージを減算"""
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        """ゲージに値を設定"""
+        self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """収集時に評価する関数を設定
+
+        Args:
+            function: 現在値を返す関数（スクレイプ時にのみ呼び出される）
+        """
+        self._function = function
+
+    def get(self) -> float:
+        """現在値を取得"""
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+
+class _Timer:
+    """`with` ブロックの処理時間をヒストグラムに記録するコンテキストマネージャー"""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: "_HistogramChild") -> None:
+        self._child = child
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _HistogramChild:
+    """単一ラベル値のヒストグラム"""
+
+    __slots__ = ("_buckets", "_counts", "_lock", "_sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        # 末尾は +Inf バケット
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """観測値を記録
+
+        Args:
+            value: 観測値（秒など）
+        """
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        """処理時間を計測して記録するコンテキストマネージャーを返す"""
+        return _Timer(self)
+
+    def snapshot(self) -> tuple[list[int], float]:
+        """バケットごとのカウント（非累積）と合計値のスナップショットを取得"""
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+ChildT = TypeVar("ChildT", _CounterChild, _GaugeChild, _HistogramChild)
+
+
+class _Metric(Generic[ChildT]):
+    """ラベル付きメトリクスの基底クラス"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], ChildT] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self) -> ChildT:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> ChildT:
+        """ラベル値に対応する子メトリクスを取得（存在しなければ作成）
+
+        Args:
+            *values: ラベル値（labelnamesと同じ順序）
+
+        Returns:
+            ラベル値に対応する子メトリクス
+
+        Raises:
+            ValueError: ラベル値の数が一致しない場合
+        """
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ラベル数が一致しません（期待値: {len(self.labelnames)}）")
+        with self._lock:
+            return self._children.setdefault(values, self._new_child())
+
+    def _default_child(self) -> ChildT:
+        try:
+            return self._children[()]
+        except KeyError:
+            raise ValueError(f"{self.name}: ラベル付きメトリクスには labels() を使用してください") from None
+
+    def _collect_samples(self, values: tuple[str, ...], child: ChildT) -> list[str]:
+        raise NotImplementedError
+
+    def collect(self) -> list[str]:
+        """Prometheusテキスト形式の行リストを生成"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for values, child in sorted(self._children.copy().items()):
+            lines.extend(self._collect_samples(values, child))
+        return lines
+
+
+class Counter(_Metric[_CounterChild]):
+    """単調増加するカウンター"""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """ラベルなしカウンターを加算"""
+        self._default_child().inc(amount)
+
+    def _collect_samples(self, values: tuple[str, ...], child: _CounterChild) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"]
+
+
+class Gauge(_Metric[_GaugeChild]):
+    """増減する値を表すゲージ"""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """ラベルなしゲージを加算"""
+        self._default_child().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """ラベルなしゲージを減算"""
+        self._default_child().dec(amount)
+
+    def set(self, value: float) -> None:
+        """ラベルなしゲージに値を設定"""
+        self._default_child().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """ラベルなしゲージに収集時評価関数を設定"""
+        self._default_child().set_function(function)
+
+    def get(self) -> float:
+        """ラベルなしゲージの現在値を取得"""
+        return self._default_child().get()
+
+    def _collect_samples(self, values: tuple[str, ...], child: _GaugeChild) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"]
+
+
+class Histogram(_Metric[_HistogramChild]):
+    """バケット分布を記録するヒストグラム"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """ラベルなしヒストグラムに観測値を記録"""
+        self._default_child().observe(value)
+
+    def _collect_samples(self, values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        counts, total = child.snapshot()
+        bucket_labelnames = (*self.labelnames, "le")
+        lines = []
+        cumulative = 0
+        for upper, count in zip((*self.buckets, math.inf), counts, strict=True):
+            cumulative += count
+            labels = _format_labels(bucket_labelnames, (*values, _format_value(upper)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+MetricT = TypeVar("MetricT", Counter, Gauge, Histogram)
+
+
+class LatencyWindow:
+    """直近の処理時間からパーセンタイルを計算するローリングウィンドウ
+
+    ヒストグラムは起動時からの累計のため、「いま」の遅延の判定（レディネス等）にはこちらを使う。
+    """
+
+    def __init__(self, max_age: float = 60.0, max_samples: int = 1024) -> None:
+        """ローリングウィンドウを初期化
+
+        Args:
+            max_age: 保持する観測値の最大経過時間（秒）
+            max_samples: 保持する観測値の最大件数
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+
+    def observe(self, seconds: float) -> None:
+        """観測値を追加"""
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+
+    def values(self) -> list[float]:
+        """期限内の観測値を昇順で取得（期限切れの観測値は破棄する）"""
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return sorted(value for _, value in self._samples)
+
+    def percentile(self, q: float) -> float | None:
+        """期限内の観測値のパーセンタイル（最近傍順位法）
+
+        Args:
+            q: パーセンタイル（0〜100）
+
+        Returns:
+            float | None: パーセンタイル値（観測値がない場合はNone）
+        """
+        values = self.values()
+        if not values:
+            return None
+        rank = max(math.ceil(q / 100 * len(values)), 1)
+        return values[rank - 1]
+
+    def clear(self) -> None:
+        """観測値をすべて破棄"""
+        with self._lock:
+            self._samples.clear()
+
+
+class MetricsRegistry:
+    """メトリクスの登録とテキスト出力を管理するレジストリ"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def register(self, metric: MetricT) -> MetricT:
+        """メトリクスを登録
+
+        Args:
+            metric: 登録するメトリクス
+
+        Returns:
+            登録したメトリクス（定義と登録を1行で書けるようにそのまま返す）
+
+        Raises:
+            ValueError: 同名のメトリクスが既に登録されている場合
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"メトリクス {metric.name} は既に登録されています")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """登録済みメトリクスをPrometheusテキスト形式で出力"""
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+# アプリケーション共通のレジストリ
+REGISTRY = MetricsRegistry()
+
+# 変換パイプラインのステージ名
+STAGES = ("read", "validate", "decode", "color", "resize", "key", "encode", "total")
+
+# ファイル拡張子からformatラベルへの対応（ラベルのカーディナリティを固定するため）
+_FORMAT_LABELS = {
+    ".png": "png",
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".bmp": "bmp",
+    ".gif": "gif",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+    ".webp": "webp",
+    ".svg": "svg",
+    ".ico": "ico",
+    ".icns": "icns",
+}
+
+# 入力サイズバケット（上限バイト数, ラベル）
+_SIZE_BUCKETS = (
+    (100 * 1024, "lt_100k"),
+    (1024 * 1024, "100k_1m"),
+    (5 * 1024 * 1024, "1m_5m"),
+    (10 * 1024 * 1024, "5m_10m"),
+)
+
+STAGE_DURATION = REGISTRY.register(
+    Histogram(
+        "iconconv_stage_duration_seconds",
+        "Duration of each conversion stage in seconds.",
+        ("stage", "format", "size_bucket"),
+    ),
+)
+EXECUTOR_QUEUE_DEPTH = REGISTRY.register(
+    Gauge("iconconv_executor_queue_depth", "Conversion tasks waiting for an executor thread."),
+)
+EXECUTOR_ACTIVE_WORKERS = REGISTRY.register(
+    Gauge("iconconv_executor_active_workers", "Executor threads currently running a conversion."),
+)
+EXECUTOR_MAX_WORKERS = REGISTRY.register(
+    Gauge("iconconv_executor_max_workers", "Maximum number of executor threads."),
+)
+RESIZE_HELPERS_ACTIVE = REGISTRY.register(
+    Gauge("iconconv_resize_helpers_active", "Helper threads reserved for per-size resize, encode and keying tiles."),
+)
+INPUT_BYTES = REGISTRY.register(
+    Counter("iconconv_input_bytes_total", "Total bytes of uploaded images.", ("format",)),
+)
+OUTPUT_BYTES = REGISTRY.register(
+    Counter("iconconv_output_bytes_total", "Total bytes of generated ICO files.", ("format",)),
+)
+QUEUE_WAIT = REGISTRY.register(
+    Histogram(
+        "iconconv_queue_wait_seconds",
+        "Time a conversion waited for an executor thread in seconds.",
+        ("format",),
+    ),
+)
+CPU_SECONDS = REGISTRY.register(
+    Histogram(
+        "iconconv_conversion_cpu_seconds",
+        "CPU time of the executor thread and its resize helper threads spent on a conversion in seconds.",
+        ("format", "size_bucket"),
+    ),
+)
+PEAK_MEMORY = REGISTRY.register(
+    Histogram(
+        "iconconv_conversion_peak_traced_memory_bytes",
+        "Peak tracemalloc-traced memory of sampled conversions in bytes.",
+        ("format", "size_bucket"),
+        buckets=MEMORY_BUCKETS,
+    ),
+)
+RSS_GROWTH = REGISTRY.register(
+    Counter(
+        "iconconv_max_rss_growth_bytes_total",
+        "Growth of the process peak RSS observed during conversions in bytes.",
+        ("format",),
+    ),
+)
+CANARY_DURATION = REGISTRY.register(
+    Histogram("iconconv_canary_duration_seconds", "Duration of synthetic canary conversions in seconds."),
+)
+CANARY_FAILURES = REGISTRY.register(
+    Counter("iconconv_canary_failures_total", "Synthetic canary conversions that failed."),
+)
+CANARY_P99 = REGISTRY.register(
+    Gauge("iconconv_canary_p99_seconds", "p99 of canary conversions within the SLO window in seconds."),
+)
+CANARY_SLO_BREACHED = REGISTRY.register(
+    Gauge("iconconv_canary_slo_breached", "1 if the canary p99 exceeds the SLO target, otherwise 0."),
+)
+ERRORS = REGISTRY.register(
+    Counter("iconconv_errors_total", "Failed requests by error code.", ("error_code",)),
+)
+EVENT_LOOP_LAG = REGISTRY.register(
+    Histogram("iconconv_event_loop_lag_seconds", "Delay of the event loop in running a scheduled wakeup in seconds."),
+)
+EVENT_LOOP_STALLS = REGISTRY.register(
+    Counter("iconconv_event_loop_stalls_total", "Event loop lag samples above the warning threshold."),
+)
+ICC_TRANSFORM_CACHE = REGISTRY.register(
+    Counter("iconconv_icc_transform_cache_total", "Lookups of the ICC transform cache by result.", ("result",)),
+)
+EXECUTOR_START_DELAY = REGISTRY.register(
+    Histogram(
+        "iconconv_executor_start_delay_seconds",
+        "Delay before a probe task submitted to the conversion executor started running in seconds.",
+    ),
+)
+LOG_LINES_DROPPED = REGISTRY.register(
+    Counter("iconconv_log_lines_dropped_total", "Log lines dropped by the background writer by reason.", ("reason",)),
+)
+TRACE_SPANS_DROPPED = REGISTRY.register(
+    Counter("iconconv_trace_spans_dropped_total", "Spans dropped by the trace exporter by reason.", ("reason",)),
+)
+
+
+# 直近の変換レイテンシ（レディネス判定用）
+RECENT_LATENCY = LatencyWindow(max_age=float(os.getenv("READY_LATENCY_WINDOW_SECONDS", "60")))
+
+
+def format_label(filename: str) -> str:
+    """ファイル名からformatラベル値を取得
+
+    Args:
+        filename: ファイル名またはパス
+
+    Returns:
+        str: 正規化された形式名（未知の拡張子は "other"）
+    """
+    return _FORMAT_LABELS.get(Path(filename).suffix.lower(), "other")
+
+
+def size_bucket(num_bytes: int) -> str:
+    """入力サイズからsize_bucketラベル値を取得
+
+    Args:
+        num_bytes: 入力ファイルのバイト数
+
+    Returns:
+        str: サイズバケット名
+    """
+    for upper, label in _SIZE_BUCKETS:
+        if num_bytes < upper:
+            return label
+    return "ge_10m"
@@ -0,0 +1,153 @@
+"""変換内のサイズごとの並列処理
+
+大きな画像を1件だけ変換する場合、各アイコンサイズへのリサイズとエンコードは1つの実行スレッドで順に行われ、
+他のCPUは空いたままになります。Pillowはリサイズとzlibの圧縮の間GILを解放するため、サイズごとの処理を
+小さな共有スレッドプール（ヘルパー）に分担させると1変換の処理時間を短縮できます。
+
+元の解像度での背景色の透明化（``core.keying``）も、同じヘルパーで行の帯（タイル）ごとに処理します。
+
+ヘルパーは ``RESIZE_PARALLELISM`` で有効にし、変換ごとに実行スレッドの負荷に応じて予約します。
+
+- 実行スレッドの空きを待っている変換がある場合は並列化しない（空いたCPUは待っている変換に使う）
+- それ以外は、変換中の実行スレッドと他の変換が予約中のヘルパーが使っていないCPUを、変換中の実行スレッドで
+  等分した数までヘルパーを予約する
+
+そのため、トラフィックが多い間は従来どおり1変換を1スレッドで処理し、CPU数を超えて並列化することはありません。
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import TypeVar
+
+from .metrics import EXECUTOR_ACTIVE_WORKERS, EXECUTOR_QUEUE_DEPTH, RESIZE_HELPERS_ACTIVE
+from .stats import add_helper_cpu
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 1変換で同時に処理するサイズ数の上限（呼び出し元のスレッドを含む。0・1: 並列化しない）（環境変数で制御）
+RESIZE_PARALLELISM = int(os.getenv("RESIZE_PARALLELISM", "0"))
+
+_CPU_COUNT = os.cpu_count() or 1
+
+_lock = threading.Lock()
+_reserved = 0
+# ヘルパーの予約を止めている区間の数（プロファイリング中等）
+_suspended = 0
+_pool: ThreadPoolExecutor | None = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """ヘルパーのスレッドプール（初回の利用時に作成し、全変換で共有する）"""
+    global _pool
+
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=_CPU_COUNT, thread_name_prefix="iconconv-resize")
+        return _pool
+
+
+def _available_helpers(wanted: int) -> int:
+    """実行スレッドの負荷から予約できるヘルパー数を決める（``_lock`` を取得した状態で呼び出す）"""
+    if wanted <= 0 or _suspended or EXECUTOR_QUEUE_DEPTH.get() > 0:
+        return 0
+    # 実行スレッドの外（ベンチマークや直接の呼び出し）では、呼び出し元のスレッドだけが変換中とみなす
+    active = max(int(EXECUTOR_ACTIVE_WORKERS.get()), 1)
+    idle = _CPU_COUNT - active - _reserved
+    return max(0, min(wanted, idle // active))
+
+
+@contextmanager
+def suspend_fan_out() -> Iterator[None]:
+    """``with`` ブロックの間、すべての変換でヘルパーを予約しない（予約済みのヘルパーはそのまま終了まで使われる）"""
+    global _suspended
+
+    with _lock:
+        _suspended += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _suspended -= 1
+
+
+@contextmanager
+def fan_out(tasks: int, limit: int | None = None) -> Iterator[int]:
+    """サイズごとの処理に使うスレッド数を予約する
+
+    Args:
+        tasks: 処理するサイズの数
+        limit: 同時に処理する数の上限（省略時は ``RESIZE_PARALLELISM``）
+
+    Yields:
+        int: 呼び出し元のスレッドを含むスレッド数（1: 並列化しない）
+    """
+    global _reserved
+
+    limit = RESIZE_PARALLELISM if limit is None else limit
+    with _lock:
+        helpers = _available_helpers(min(limit, tasks) - 1)
+        _reserved += helpers
+        RESIZE_HELPERS_ACTIVE.set(_reserved)
+    try:
+        yield helpers + 1
+    finally:
+        with _lock:
+            _reserved -= helpers
+            RESIZE_HELPERS_ACTIVE.set(_reserved)
+
+
+def _run_group(func: Callable[[T], R], items: Sequence[T], indices: Sequence[int]) -> list[R]:
+    return [func(items[index]) for index in indices]
+
+
+def _run_helper_group(func: Callable[[T], R], items: Sequence[T], indices: Sequence[int], cpu: list[float]) -> list[R]:
+    """ヘルパーでグループを処理し、使ったCPU時間を ``cpu`` に追加する（例外で終了した場合も記録する）"""
+    start = time.thread_time()
+    try:
+        return _run_group(func, items, indices)
+    finally:
+        cpu.append(time.thread_time() - start)
+
+
+def run_parallel(func: Callable[[T], R], items: Sequence[T], workers: int) -> list[R]:
+    """``items`` の各要素に ``func`` を適用した結果を、入力と同じ順序で返す
+
+    要素を ``workers`` 個のグループに分け、先頭のグループは呼び出し元のスレッドで、残りはヘルパーで処理する。
+    ヘルパーには呼び出し元のコンテキスト（トレースの親スパン等）を引き継ぎ、ヘルパーで使ったCPU時間は
+    呼び出し元のスレッドで計測中の変換の統計（``ConversionStats.cpu_seconds``）に加算する。
+
+    Args:
+        func: 各要素に適用する関数（スレッドセーフであること）
+        items: 処理する要素
+        workers: ``fan_out`` で予約したスレッド数
+
+    Returns:
+        list[R]: 各要素の結果
+    """
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    groups = [range(start, len(items), workers) for start in range(min(workers, len(items)))]
+    pool = _get_pool()
+    helper_cpu: list[float] = []
+    futures: list[Future[list[R]]] = [
+        pool.submit(contextvars.copy_context().run, _run_helper_group, func, items, indices, helper_cpu)
+        for indices in groups[1:]
+    ]
+    results: list[R | None] = [None] * len(items)
+    try:
+        for index, result in zip(groups[0], _run_group(func, items, groups[0]), strict=True):
+            results[index] = result
+    finally:
+        # 例外の場合も、予約を解放する前にヘルパーの処理が終わるのを待つ
+        wait(futures)
+        add_helper_cpu(sum(helper_cpu))
+    for indices, future in zip(groups[1:], futures, strict=True):
+        for index, result in zip(indices, future.result(), strict=True):
+            results[index] = result
+    return results  # type: ignore[return-value]
@@ -0,0 +1,122 @@
+"""リクエスト単位のプロファイリング
+
+環境変数 ``PROFILE_ENABLED=true`` のときだけ有効になり、サンプリング率または
+認証ヘッダー（``X-Profile-Token``）で選ばれたリクエストの変換処理を cProfile で計測します。
+結果は ``<PROFILE_DIR>/<X-Request-ID>.prof`` に保存され、``PROFILE_MAX_FILES`` 件を超えると
+古いものから削除されます。
+
+Python 3.12以降の cProfile は ``sys.monitoring`` でインタープリター全体のイベントを受け取るため、
+計測区間（対象リクエストの変換の開始から終了まで）に他のスレッドで実行された処理（同時に実行中の
+別のリクエストの変換やイベントループ）もプロファイルに含まれます。計測中は変換内のヘルパースレッド
+（``RESIZE_PARALLELISM``）を使わず、対象リクエストの処理が実行スレッド1つにまとまるようにします。
+
+無効時のコストは ``should_profile`` でのフラグ確認のみです。
+
+保存したプロファイルの確認例::
+
+    python -m pstats /tmp/iconconverter-profiles/<request-id>.prof
+"""
+
+import cProfile
+import hmac
+import os
+import random
+import re
+import tempfile
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from loguru import logger
+
+from .parallel import suspend_fan_out
+
+T = TypeVar("T")
+
+# プロファイリング設定（環境変数で制御）
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(tempfile.gettempdir()) / "iconconverter-profiles")))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+
+# プロファイリングを要求するリクエストヘッダー（値は PROFILE_TOKEN と一致する必要がある）
+PROFILE_HEADER = "X-Profile-Token"
+
+# ファイル名に使えない文字の置換パターン
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+# Python 3.12以降の cProfile はインタープリター全体で1つしか有効にできないため、
+# 同時に計測するのは1リクエストだけにする（計測中に届いたリクエストは通常どおり実行）
+_profile_lock = threading.Lock()
+
+
+def should_profile(token: str | None = None) -> bool:
+    """このリクエストをプロファイリングするか判定
+
+    Args:
+        token: リクエストヘッダーで渡されたトークン
+
+    Returns:
+        bool: プロファイリングする場合はTrue
+    """
+    if not PROFILE_ENABLED:
+        return False
+    if token and PROFILE_TOKEN and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profile_path(request_id: str) -> Path:
+    """リクエストIDに対応するプロファイルの保存先"""
+    return PROFILE_DIR / f"{_UNSAFE_CHARS.sub('_', request_id)[:64] or 'unknown'}.prof"
+
+
+def _rotate(directory: Path, max_files: int) -> None:
+    """保存件数の上限を超えたプロファイルを古い順に削除"""
+    profiles = sorted(directory.glob("*.prof"), key=lambda path: path.stat().st_mtime)
+    for path in profiles[: max(len(profiles) - max_files, 0)]:
+        path.unlink(missing_ok=True)
+
+
+def _save(profiler: cProfile.Profile, request_id: str) -> None:
+    """プロファイルを保存（失敗しても変換結果には影響させない）"""
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = profile_path(request_id)
+        profiler.dump_stats(path)
+        _rotate(PROFILE_DIR, PROFILE_MAX_FILES)
+        logger.info("Saved conversion profile: {}", path)
+    except OSError as e:
+        logger.warning("Failed to save conversion profile for {}: {}", request_id, e)
+
+
+def run_profiled(request_id: str, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """関数を cProfile で計測しながら実行
+
+    別のリクエストを計測中の場合は計測せずに実行する。
+    プロファイルは例外で終了した場合も保存する。計測中はヘルパースレッドへの分担を止める。
+    プロファイルには計測区間に他のスレッドで実行された処理も含まれる（モジュールの説明を参照）。
+
+    Args:
+        request_id: 保存ファイル名に使うリクエストID
+        func: 実行する関数（変換処理を行うスレッドで呼び出すこと）
+        *args: 関数の位置引数
+        **kwargs: 関数のキーワード引数
+
+    Returns:
+        関数の戻り値
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.debug("Profiler busy, running {} without profiling", request_id)
+        return func(*args, **kwargs)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            with suspend_fan_out():
+                return profiler.runcall(func, *args, **kwargs)
+        finally:
+            _save(profiler, request_id)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,253 @@
+"""変換統計モジュール
+
+1回の変換で計測したステージ別の処理時間とリソース使用量を保持する構造化オブジェクトを提供します。
+同じインスタンスを IconConverter → ImageConversionService → ルーターへ受け渡し、
+各層で時間を計測し直さずに Server-Timing ヘッダーとメトリクスへ反映します。
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any
+
+from .metrics import (
+    CPU_SECONDS,
+    OUTPUT_BYTES,
+    PEAK_MEMORY,
+    QUEUE_WAIT,
+    RECENT_LATENCY,
+    RSS_GROWTH,
+    STAGE_DURATION,
+    STAGES,
+    size_bucket,
+)
+from .tracing import span
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# tracemalloc でピークメモリを計測する変換の割合（0.0〜1.0）
+# 計測中は全スレッドのメモリ割り当てが遅くなるため、一部の変換だけをサンプリングする
+MEMORY_TRACE_SAMPLE_RATE = float(os.getenv("MEMORY_TRACE_SAMPLE_RATE", "0.01"))
+
+# tracemalloc はプロセス全体で1つのため、同時に計測するのは1変換だけにする
+_trace_lock = threading.Lock()
+
+# 計測中の変換のメーター（ヘルパースレッドで使ったCPU時間の加算先）
+_active_meter: ContextVar["_ResourceMeter | None"] = ContextVar("active_meter", default=None)
+
+
+def _max_rss_bytes() -> int:
+    """プロセスのピークRSS（バイト）。取得できない環境では0"""
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト、Linux はキロバイト単位
+    return int(max_rss if sys.platform == "darwin" else max_rss * 1024)
+
+
+class _StageTimer:
+    """`with` ブロックの処理時間をステージに加算するコンテキストマネージャー
+
+    トレース中であれば、同じ区間をステージ名のスパンとしても記録する。
+    """
+
+    __slots__ = ("_span", "_stage", "_start", "_stats")
+
+    def __init__(self, stats: "ConversionStats", stage: str) -> None:
+        self._stats = stats
+        self._stage = stage
+        self._start = 0.0
+        self._span: Any = None
+
+    def __enter__(self) -> "_StageTimer":
+        self._span = span(self._stage).__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._stats.add(self._stage, time.perf_counter() - self._start)
+        self._span.__exit__(exc_type, exc, tb)
+
+
+class _ResourceMeter:
+    """`with` ブロックのCPU時間とメモリ使用量を記録するコンテキストマネージャー
+
+    CPU時間は実行スレッドの ``time.thread_time`` に、変換内でヘルパースレッドに分担した処理のCPU時間
+    （``add_helper_cpu``）を加えたもので、同時に実行中の他の変換のCPU時間は含まない。
+    メモリはプロセス全体の値のため、同時に実行中の他の変換の割り当ても含まれる。tracemalloc は計測中すべての
+    スレッドの割り当てを追跡し、対象はPythonとnumpyの割り当てのみでPillowの画像バッファは含まれないため、
+    プロセスのピークRSSの増加量も併せて記録する。
+    """
+
+    __slots__ = ("_cpu_start", "_helper_cpu", "_rss_start", "_stats", "_token", "_traced")
+
+    def __init__(self, stats: "ConversionStats", trace_memory: bool) -> None:
+        self._stats = stats
+        self._traced = trace_memory
+        self._cpu_start = 0.0
+        self._helper_cpu = 0.0
+        self._rss_start = 0
+        self._token: Any = None
+
+    def __enter__(self) -> "_ResourceMeter":
+        if self._traced:
+            # 既に別の計測（または外部ツール）が tracemalloc を使っている場合は計測しない
+            self._traced = _trace_lock.acquire(blocking=False)
+            if self._traced and tracemalloc.is_tracing():
+                _trace_lock.release()
+                self._traced = False
+            if self._traced:
+                tracemalloc.start()
+        self._rss_start = _max_rss_bytes()
+        self._token = _active_meter.set(self)
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        stats = self._stats
+        stats.cpu_seconds += time.thread_time() - self._cpu_start + self._helper_cpu
+        _active_meter.reset(self._token)
+        stats.rss_growth_bytes += max(_max_rss_bytes() - self._rss_start, 0)
+        if self._traced:
+            try:
+                _, peak = tracemalloc.get_traced_memory()
+                stats.peak_memory_bytes = max(stats.peak_memory_bytes or 0, peak)
+            finally:
+                tracemalloc.stop()
+                _trace_lock.release()
+
+
+def add_helper_cpu(seconds: float) -> None:
+    """ヘルパースレッドで使ったCPU時間を、計測中の変換のCPU時間に加算する
+
+    変換を実行しているスレッド（``measure_resources`` のブロック内）から呼び出す。計測中でなければ何もしない。
+
+    Args:
+        seconds: ヘルパースレッドの ``time.thread_time`` の増加量（秒）
+    """
+    meter = _active_meter.get()
+    if meter is not None:
+        meter._helper_cpu += seconds
+
+
+@dataclass
+class ConversionStats:
+    """1回の変換の計測結果
+
+    Attributes:
+        input_format: 入力形式のラベル値（png, jpeg等）
+        input_bytes: 入力ファイルのバイト数
+        output_bytes: 出力ICOファイルのバイト数
+        stages: ステージ名から処理時間（秒）への対応
+        queue_wait: スレッドプールの空きを待った時間（秒）
+        cpu_seconds: 変換に費やした実行スレッドとヘルパースレッドのCPU時間（秒）
+        peak_memory_bytes: tracemalloc で計測したプロセス全体のピークメモリ（バイト、サンプリング対象外はNone）
+        rss_growth_bytes: 変換中に増えたプロセスのピークRSS（バイト）
+        palettized_entries: 8bitのパレット形式で格納したICOの項目数
+        palette_saved_bytes: パレット化で削減したバイト数
+    """
+
+    input_format: str = "other"
+    input_bytes: int = 0
+    output_bytes: int = 0
+    stages: dict[str, float] = field(default_factory=dict)
+    queue_wait: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_memory_bytes: int | None = None
+    rss_growth_bytes: int = 0
+    palettized_entries: int = 0
+    palette_saved_bytes: int = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        """ステージの処理時間を加算（同じステージの複数回計測は合算）
+
+        Args:
+            stage: ステージ名
+            seconds: 処理時間（秒）
+        """
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def measure(self, stage: str) -> _StageTimer:
+        """`with` ブロックの処理時間をステージに加算するタイマーを返す
+
+        Args:
+            stage: ステージ名
+        """
+        return _StageTimer(self, stage)
+
+    def measure_resources(self, trace_memory: bool | None = None) -> _ResourceMeter:
+        """`with` ブロックのCPU時間とメモリ使用量を記録するメーターを返す
+
+        Args:
+            trace_memory: tracemalloc でピークメモリを計測するか
+                （None の場合は MEMORY_TRACE_SAMPLE_RATE でサンプリング）
+        """
+        if trace_memory is None:
+            trace_memory = MEMORY_TRACE_SAMPLE_RATE > 0 and random.random() < MEMORY_TRACE_SAMPLE_RATE
+        return _ResourceMeter(self, trace_memory)
+
+    def resource_fields(self) -> dict[str, Any]:
+        """構造化ログに付加するリソース使用量
+
+        Returns:
+            dict[str, Any]: ログレコードの extra に追加するフィールド
+        """
+        return {
+            "input_format": self.input_format,
+            "input_bytes": self.input_bytes,
+            "queue_wait_ms": round(self.queue_wait * 1000, 3),
+            "cpu_ms": round(self.cpu_seconds * 1000, 3),
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "rss_growth_bytes": self.rss_growth_bytes,
+        }
+
+    def server_timing(self) -> str:
+        """Server-Timingヘッダーの値を生成
+
+        Returns:
+            str: ``decode;dur=1.2, encode;dur=3.4`` 形式の文字列（ミリ秒）
+        """
+        ordered = [stage for stage in STAGES if stage in self.stages]
+        ordered += [stage for stage in self.stages if stage not in STAGES]
+        return ", ".join(f"{stage};dur={self.stages[stage] * 1000:.1f}" for stage in ordered)
+
+    def palette_savings(self) -> str:
+        """X-Palette-Savings ヘッダーの値を生成
+
+        Returns:
+            str: ``entries=3; bytes=1234`` 形式の文字列（パレット化した項目数と削減したバイト数）
+        """
+        return f"entries={self.palettized_entries}; bytes={self.palette_saved_bytes}"
+
+    def record_metrics(self) -> None:
+        """計測結果をメトリクスに反映"""
+        bucket = size_bucket(self.input_bytes)
+        for stage, seconds in self.stages.items():
+            STAGE_DURATION.labels(stage, self.input_format, bucket).observe(seconds)
+        OUTPUT_BYTES.labels(self.input_format).inc(self.output_bytes)
+        QUEUE_WAIT.labels(self.input_format).observe(self.queue_wait)
+        CPU_SECONDS.labels(self.input_format, bucket).observe(self.cpu_seconds)
+        if self.peak_memory_bytes is not None:
+            PEAK_MEMORY.labels(self.input_format, bucket).observe(self.peak_memory_bytes)
+        RSS_GROWTH.labels(self.input_format).inc(self.rss_growth_bytes)
+        if "total" in self.stages:
+            RECENT_LATENCY.observe(self.stages["total"])
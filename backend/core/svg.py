@@ -0,0 +1,224 @@
+"""SVG入力のラスタライズ
+
+SVGは大きなビットマップを経由せず、ICOに格納する各サイズで個別にラスタライズします。
+小さいアイコンも縮小によるぼやけがなく、縮小処理のCPUも不要になります。
+
+ラスタライズはレンダラー（``SvgRenderer``）に任せ、``SVG_RENDERER`` で選べます。既定の ``cairosvg`` は
+オプションの依存パッケージです（``pip install cairosvg``）。``register_renderer`` で別のレンダラーを追加できます。
+
+アップロードされたSVGはレンダラーに渡す前に ``parse_svg`` で検査し、外部実体（DOCTYPE / ENTITY）と
+外部リソース（``href``・CSSの ``url()`` / ``@import``・``xml-stylesheet``）を参照するものを拒否します。
+レンダラー側でも外部リソースの読み込みを禁止します（多層防御）。
+"""
+
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Protocol
+
+from PIL import Image
+
+# 使用するレンダラー（環境変数で制御）
+SVG_RENDERER = os.getenv("SVG_RENDERER", "cairosvg")
+
+_SVG_NAMESPACE = "{http://www.w3.org/2000/svg}"
+_HREF_ATTRIBUTES = ("href", "{http://www.w3.org/1999/xlink}href")
+
+# 文書内の参照（#id）と埋め込みデータ（data:）以外はすべて外部リソースとして扱う
+_LOCAL_REFERENCE = re.compile(r"^\s*(#|data:)", re.IGNORECASE)
+_CSS_URL = re.compile(r"url\(\s*(['\"]?)(.*?)\1\s*\)", re.IGNORECASE | re.DOTALL)
+_CSS_IMPORT = re.compile(r"@import", re.IGNORECASE)
+_UNSAFE_MARKUP = re.compile(rb"<!DOCTYPE|<!ENTITY|<\?xml-stylesheet", re.IGNORECASE)
+_LENGTH = re.compile(r"^\s*([0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)\s*(px)?\s*$")
+
+
+@dataclass(frozen=True)
+class SvgDocument:
+    """検査済みのSVG
+
+    Attributes:
+        data: SVGのバイト列
+        size: 縦横比の算出に使う固有サイズ（幅, 高さ）
+    """
+
+    data: bytes
+    size: tuple[float, float]
+
+
+class SvgRenderer(Protocol):
+    """SVGのレンダラー"""
+
+    def render(self, data: bytes, size: tuple[int, int]) -> Image.Image:
+        """SVGを指定したサイズのRGBA画像にラスタライズする"""
+        ...
+
+
+def _check_references(text: str, where: str) -> None:
+    for match in _CSS_URL.finditer(text):
+        if not _LOCAL_REFERENCE.match(match.group(2)):
+            raise ValueError(f"SVGの{where}が外部リソースを参照しています: {match.group(2)[:100]}")
+    if _CSS_IMPORT.search(text):
+        raise ValueError(f"SVGの{where}で @import は使用できません")
+
+
+def _check_element(element: ET.Element) -> None:
+    for name in _HREF_ATTRIBUTES:
+        href = element.get(name)
+        if href is not None and not _LOCAL_REFERENCE.match(href):
+            raise ValueError(f"SVGが外部リソースを参照しています: {href[:100]}")
+    for value in element.attrib.values():
+        _check_references(value, "属性")
+    if element.tag in (f"{_SVG_NAMESPACE}style", "style") and element.text:
+        _check_references(element.text, "style要素")
+
+
+def _intrinsic_size(root: ET.Element) -> tuple[float, float]:
+    """viewBox（なければ width / height）から固有サイズを求める"""
+    view_box = root.get("viewBox")
+    if view_box:
+        parts = view_box.replace(",", " ").split()
+        if len(parts) == 4:
+            try:
+                width, height = float(parts[2]), float(parts[3])
+            except ValueError:
+                width = height = 0.0
+            if width > 0 and height > 0:
+                return width, height
+    lengths = [_LENGTH.match(root.get(name, "")) for name in ("width", "height")]
+    if lengths[0] and lengths[1]:
+        width, height = float(lengths[0].group(1)), float(lengths[1].group(1))
+        if width > 0 and height > 0:
+            return width, height
+    return 1.0, 1.0
+
+
+def parse_svg(data: bytes) -> SvgDocument:
+    """SVGを検査し、外部実体・外部リソースを参照しないことを確認する
+
+    Args:
+        data: SVGのバイト列
+
+    Returns:
+        SvgDocument: 検査済みのSVG
+
+    Raises:
+        ValueError: XMLとして不正、SVGではない、または外部実体・外部リソースを参照している場合
+    """
+    if _UNSAFE_MARKUP.search(data):
+        raise ValueError("SVGにDOCTYPE宣言・実体宣言・スタイルシートの参照は使用できません")
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ValueError(f"SVGとして読み込めません: {e}") from e
+    if root.tag not in (f"{_SVG_NAMESPACE}svg", "svg"):
+        raise ValueError("ルート要素が svg ではありません")
+
+    for element in root.iter():
+        _check_element(element)
+    return SvgDocument(data=data, size=_intrinsic_size(root))
+
+
+class CairoSvgRenderer:
+    """cairosvg によるレンダラー（外部リソースの読み込みは禁止）"""
+
+    def __init__(self) -> None:
+        # オプションの依存パッケージ
+        from cairosvg import svg2png
+        from cairosvg.url import fetch
+
+        self._svg2png = svg2png
+        self._fetch_data = fetch
+
+    def _fetch(self, url: str, resource_type: str | None = None) -> bytes:
+        # 埋め込みデータ（data:）以外の読み込みを拒否する
+        if not url.lower().startswith("data:"):
+            raise ValueError(f"外部リソースの読み込みは禁止されています: {url[:100]}")
+        return bytes(self._fetch_data(url, resource_type))
+
+    def render(self, data: bytes, size: tuple[int, int]) -> Image.Image:
+        # unsafe=False で外部実体と巨大なファイルの読み込みも無効にする
+        png = self._svg2png(
+            bytestring=data,
+            output_width=size[0],
+            output_height=size[1],
+            unsafe=False,
+            url_fetcher=self._fetch,
+        )
+        with Image.open(BytesIO(png)) as image:
+            return image.convert("RGBA")
+
+
+# レンダラー名 → レンダラーを作成する関数
+_RENDERERS: dict[str, Callable[[], SvgRenderer]] = {"cairosvg": CairoSvgRenderer}
+_instances: dict[str, SvgRenderer] = {}
+# レンダラーの登録と作成を直列化するロック（同時に初回の変換が来てもレンダラーは1つだけ作成する）
+_renderers_lock = threading.Lock()
+
+
+def register_renderer(name: str, factory: Callable[[], SvgRenderer]) -> None:
+    """レンダラーを登録する（同じ名前の既存のレンダラーは置き換える）
+
+    Args:
+        name: ``SVG_RENDERER`` で指定する名前
+        factory: レンダラーを作成する関数
+    """
+    with _renderers_lock:
+        _RENDERERS[name] = factory
+        _instances.pop(name, None)
+
+
+def get_renderer(name: str | None = None) -> SvgRenderer:
+    """レンダラーを取得する
+
+    Args:
+        name: レンダラー名（省略時は ``SVG_RENDERER``）
+
+    Returns:
+        SvgRenderer: レンダラー
+
+    Raises:
+        RuntimeError: レンダラーが登録されていない、または依存パッケージがインストールされていない場合
+    """
+    name = name or SVG_RENDERER
+    renderer = _instances.get(name)
+    if renderer is not None:
+        return renderer
+    with _renderers_lock:
+        if name not in _instances:
+            factory = _RENDERERS.get(name)
+            if factory is None:
+                raise RuntimeError(f"SVGレンダラー {name} は登録されていません")
+            try:
+                _instances[name] = factory()
+            except ImportError as e:
+                raise RuntimeError(f"SVGレンダラー {name} を利用できません: {e}") from e
+        return _instances[name]
+
+
+def renderer_available(name: str | None = None) -> bool:
+    """レンダラーを利用できるか（作成に成功したレンダラーは再利用するため、2回目以降は辞書の参照だけ）
+
+    Args:
+        name: レンダラー名（省略時は ``SVG_RENDERER``）
+
+    Returns:
+        bool: 登録済みで、依存パッケージもインストールされている場合はTrue
+    """
+    try:
+        get_renderer(name)
+    except RuntimeError:
+        return False
+    return True
+
+
+def fit_svg_size(svg_size: tuple[float, float], icon_size: tuple[int, int]) -> tuple[int, int]:
+    """縦横比を保ったままアイコンサイズいっぱいに収まる寸法を計算（ベクターなので拡大もする）"""
+    width, height = svg_size
+    x, y = icon_size
+    if width / height >= x / y:
+        return x, max(round(x * height / width), 1)
+    return max(round(y * width / height), 1), y
@@ -0,0 +1,350 @@
+"""大きなTIFFの縮小デコード
+
+印刷用の数千万画素のTIFFをICO（最大256px）に変換する際、元の解像度のまま全画素をメモリに展開しないための処理です。
+
+- 複数解像度（ピラミッド）のTIFF: 縮小画像として記録されたページ（NewSubfileType の縮小画像フラグ）または
+  SubIFD のうち、必要なサイズを満たす最も小さいものを読み込む
+- タイル（またはストリップ）分割されたTIFF: タイル1行分ずつデコードして ``Image.reduce`` で縮小し、
+  縮小後の画像に貼り合わせる。メモリに載るのは1行分のタイルと縮小後の画像だけになる
+
+帯単位のデコードでは、タイルの圧縮データをそのまま帯1本分のTIFFとして包み直し、Pillow（libtiff）で
+デコードするため、LZW・Deflate・JPEG等の圧縮形式をそのまま扱える。
+"""
+
+import struct
+from collections.abc import Iterator
+from io import BytesIO
+
+from loguru import logger
+from PIL import Image, TiffImagePlugin, TiffTags
+
+# TIFFタグ番号
+_NEW_SUBFILE_TYPE = 254
+_IMAGE_WIDTH = 256
+_IMAGE_LENGTH = 257
+_STRIP_OFFSETS = 273
+_ROWS_PER_STRIP = 278
+_STRIP_BYTE_COUNTS = 279
+_PLANAR_CONFIGURATION = 284
+_TILE_WIDTH = 322
+_TILE_LENGTH = 323
+_TILE_OFFSETS = 324
+_TILE_BYTE_COUNTS = 325
+_SUB_IFDS = 330
+
+# NewSubfileType の縮小画像フラグ
+_REDUCED_IMAGE = 0x1
+
+# タイルを1ストリップのTIFFとして包み直すときにコピーする、画素データの解釈に必要なタグ
+_DECODING_TAGS = (
+    258,  # BitsPerSample
+    259,  # Compression
+    262,  # PhotometricInterpretation
+    266,  # FillOrder
+    277,  # SamplesPerPixel
+    317,  # Predictor
+    320,  # ColorMap
+    338,  # ExtraSamples
+    339,  # SampleFormat
+    347,  # JPEGTables
+    529,  # YCbCrCoefficients
+    530,  # YCbCrSubSampling
+    531,  # YCbCrPositioning
+    532,  # ReferenceBlackWhite
+)
+
+# ストリップをまとめてデコードするときの帯の最小の行数
+_MIN_BAND_ROWS = 64
+
+# Image.reduce が扱えるモード
+_REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA", "CMYK"}
+
+
+def _is_reduced(image: TiffImagePlugin.TiffImageFile) -> bool:
+    return bool(int(image.tag_v2.get(_NEW_SUBFILE_TYPE, 0)) & _REDUCED_IMAGE)
+
+
+def _same_aspect(size: tuple[int, int], base: tuple[int, int]) -> bool:
+    """縮小画像の縦横比が元画像と一致するか（縮小時の端数の丸めは許容）"""
+    return abs(size[0] * base[1] - size[1] * base[0]) <= max(base)
+
+
+def _open_sub_ifd(image: TiffImagePlugin.TiffImageFile, offset: int) -> TiffImagePlugin.TiffImageFile:
+    """SubIFD をヘッダーだけ読み込んで開く
+
+    ``ImageFile.get_child_images`` と同じ手順で開くが、すべての解像度の画素を読み込まないようにロードはしない。
+    """
+    assert image.fp is not None
+    child = Image.open(image.fp)
+    assert isinstance(child, TiffImagePlugin.TiffImageFile)
+    child._frame_pos = [offset]
+    child._seek(0)
+    return child
+
+
+def _reduced_page_sizes(image: TiffImagePlugin.TiffImageFile) -> list[tuple[int, tuple[int, int]]]:
+    """現在のページの直後に続く、縮小画像フラグ付きのページ番号とサイズ（シーク位置は元に戻す）"""
+    base_frame = image.tell()
+    pages = []
+    frame = base_frame + 1
+    while True:
+        try:
+            image.seek(frame)
+        except EOFError:
+            break
+        if not _is_reduced(image):
+            break
+        pages.append((frame, image.size))
+        frame += 1
+    image.seek(base_frame)
+    return pages
+
+
+def select_reduced_level(image: TiffImagePlugin.TiffImageFile, min_size: int) -> Image.Image:
+    """必要なサイズを満たす最も小さい縮小画像を選ぶ
+
+    候補は、現在のページの直後に続く縮小画像フラグ付きのページと、現在のページの SubIFD。
+    縦横比が元の画像と異なる候補（サムネイル以外の別画像など）は使わない。
+
+    Args:
+        image: 変換するページにシーク済みのTIFF
+        min_size: 縮小画像の幅・高さの下限（ピクセル）
+
+    Returns:
+        Image.Image: 選んだ縮小画像（候補がない場合は ``image`` 自身。いずれも画素は未読み込み）
+    """
+    base_size = image.size
+
+    def usable(size: tuple[int, int], area: int) -> bool:
+        return min(size) >= min_size and _same_aspect(size, base_size) and size[0] * size[1] < area
+
+    best_frame, best_area = None, base_size[0] * base_size[1]
+    for frame, size in _reduced_page_sizes(image):
+        if usable(size, best_area):
+            best_frame, best_area = frame, size[0] * size[1]
+    if best_frame is not None:
+        image.seek(best_frame)
+        return image
+
+    best: Image.Image = image
+    sub_ifds = image.tag_v2.get(_SUB_IFDS) or ()
+    for offset in sub_ifds if isinstance(sub_ifds, tuple) else (sub_ifds,):
+        try:
+            child = _open_sub_ifd(image, int(offset))
+        except Exception as e:  # 壊れた SubIFD は無視して元の解像度で変換する
+            logger.debug("Skipping unreadable TIFF SubIFD at {}: {}", offset, e)
+            continue
+        if usable(child.size, best_area):
+            best, best_area = child, child.size[0] * child.size[1]
+    return best
+
+
+def _layout(image: TiffImagePlugin.TiffImageFile) -> tuple[bool, int, int, list[int], list[int]] | None:
+    """タイル分割か、タイル（ストリップ）の幅・高さ・オフセット・バイト数"""
+    tags = image.tag_v2
+    tiled = _TILE_OFFSETS in tags and _TILE_BYTE_COUNTS in tags
+    if tiled:
+        width, height = tags.get(_TILE_WIDTH), tags.get(_TILE_LENGTH)
+        offsets, counts = tags[_TILE_OFFSETS], tags[_TILE_BYTE_COUNTS]
+    elif _STRIP_OFFSETS in tags and _STRIP_BYTE_COUNTS in tags:
+        width, height = image.size[0], min(int(tags.get(_ROWS_PER_STRIP, image.size[1])), image.size[1])
+        offsets, counts = tags[_STRIP_OFFSETS], tags[_STRIP_BYTE_COUNTS]
+    else:
+        return None
+    if not isinstance(width, int) or not isinstance(height, int) or width <= 0 or height <= 0:
+        return None
+    offsets = list(offsets) if isinstance(offsets, tuple) else [offsets]
+    counts = list(counts) if isinstance(counts, tuple) else [counts]
+    if len(offsets) != len(counts):
+        return None
+    return tiled, width, height, offsets, counts
+
+
+def _band_tiff(
+    image: TiffImagePlugin.TiffImageFile, tiled: bool, tile_size: tuple[int, int], height: int, chunks: list[bytes]
+) -> bytes:
+    """圧縮済みのタイル（ストリップ）データを、横長の帯1本分だけのTIFFとして包み直す"""
+    ifd = TiffImagePlugin.ImageFileDirectory_v2(prefix=b"II")
+    for tag in _DECODING_TAGS:
+        if tag in image.tag_v2:
+            ifd[tag] = image.tag_v2[tag]
+            ifd.tagtype[tag] = image.tag_v2.tagtype[tag]
+    ifd[_IMAGE_WIDTH] = image.size[0]
+    ifd[_IMAGE_LENGTH] = height
+    counts = tuple(len(chunk) for chunk in chunks)
+    relative = tuple(sum(counts[:index]) for index in range(len(chunks)))
+    tags: tuple[int, ...]
+    if tiled:
+        ifd[_TILE_WIDTH], ifd[_TILE_LENGTH] = tile_size
+        ifd[_TILE_BYTE_COUNTS] = counts
+        ifd[_TILE_OFFSETS] = relative
+        tags = (_IMAGE_WIDTH, _IMAGE_LENGTH, _TILE_WIDTH, _TILE_LENGTH, _TILE_OFFSETS, _TILE_BYTE_COUNTS)
+    else:
+        ifd[_ROWS_PER_STRIP] = tile_size[1]
+        ifd[_STRIP_BYTE_COUNTS] = counts
+        # Pillow は StripOffsets をIFDの直後からの相対位置として書き出す
+        ifd[_STRIP_OFFSETS] = relative
+        tags = (_IMAGE_WIDTH, _IMAGE_LENGTH, _ROWS_PER_STRIP, _STRIP_OFFSETS, _STRIP_BYTE_COUNTS)
+    for tag in tags:
+        ifd.tagtype[tag] = TiffTags.LONG
+    if tiled:
+        # TileOffsets は絶対位置で書く必要がある（IFDの大きさはオフセットの値に依存しない）
+        data_start = 8 + len(ifd.tobytes(8))
+        ifd[_TILE_OFFSETS] = tuple(data_start + offset for offset in relative)
+    return b"II*\x00" + struct.pack("<I", 8) + ifd.tobytes(8) + b"".join(chunks)
+
+
+def _decode_band(
+    image: TiffImagePlugin.TiffImageFile,
+    layout: tuple[bool, int, int, list[int], list[int]],
+    height: int,
+    indices: range,
+) -> Image.Image | None:
+    """横長の帯1本分のタイル（ストリップ）だけをデコードする"""
+    tiled, tile_width, tile_height, offsets, counts = layout
+    assert image.fp is not None
+    chunks = []
+    for index in indices:
+        image.fp.seek(offsets[index])
+        chunks.append(image.fp.read(counts[index]))
+    band = Image.open(BytesIO(_band_tiff(image, tiled, (tile_width, tile_height), height, chunks)))
+    band.load()
+    return band if band.mode == image.mode and band.size == (image.size[0], height) else None
+
+
+def _stack(bands: list[Image.Image]) -> Image.Image:
+    """帯を縦に連結"""
+    stacked = Image.new(bands[0].mode, (bands[0].width, sum(band.height for band in bands)))
+    top = 0
+    for band in bands:
+        stacked.paste(band, (0, top))
+        top += band.height
+    return stacked
+
+
+def _band_plan(
+    image: TiffImagePlugin.TiffImageFile,
+) -> tuple[tuple[bool, int, int, list[int], list[int]], int, int, int] | None:
+    """帯単位でデコードできる構成なら、タイルの構成・タイルの列数・行数・1つの帯の行数（扱えない場合はNone）"""
+    layout = _layout(image)
+    if layout is None or image.mode not in _REDUCIBLE_MODES:
+        return None
+    if int(image.tag_v2.get(_PLANAR_CONFIGURATION, 1)) != 1:
+        return None
+    tiled, tile_width, tile_height, offsets, _ = layout
+    columns = -(-image.size[0] // tile_width)
+    rows = -(-image.size[1] // tile_height)
+    if len(offsets) < columns * rows or len(offsets) < 2:
+        return None
+    # 行数の少ないストリップはまとめてデコードする（ストリップ1本ごとにTIFFを包み直す手間を減らすため）
+    rows_per_band = 1 if tiled else max(1, _MIN_BAND_ROWS // tile_height)
+    return layout, columns, rows, rows_per_band
+
+
+def _iter_bands(
+    image: TiffImagePlugin.TiffImageFile,
+    plan: tuple[tuple[bool, int, int, list[int], list[int]], int, int, int],
+) -> Iterator[Image.Image | None]:
+    """帯を上から順に1本ずつデコードする（帯として読めない場合はNone）"""
+    layout, columns, rows, rows_per_band = plan
+    tile_height = layout[2]
+    for first_row in range(0, rows, rows_per_band):
+        end_row = min(first_row + rows_per_band, rows)
+        band_height = min(end_row * tile_height, image.size[1]) - first_row * tile_height
+        yield _decode_band(image, layout, band_height, range(first_row * columns, end_row * columns))
+
+
+def decode_tiles_reduced(image: TiffImagePlugin.TiffImageFile, factor: int) -> Image.Image | None:
+    """タイル（ストリップ）を帯単位でデコードし、``factor`` 分の1に縮小した画像を作る
+
+    タイル1行分（または数本のストリップ）を横長の帯としてデコードし、``factor`` の倍数の行数がたまるごとに
+    縮小して貼り合わせる。割り切れずに残った行は次の帯と合わせて縮小するため、縮小結果は全画素をデコードしてから
+    ``Image.reduce(factor)`` した場合と一致する。
+
+    Args:
+        image: 変換するページにシーク済みのTIFF（画素は未読み込み）
+        factor: 縮小率（2以上）
+
+    Returns:
+        Image.Image | None: 縮小した画像。タイル単位で扱えない構成（1ストリップのみ、プレーン分割、
+        縮小できないモード等）の場合はNone
+    """
+    plan = _band_plan(image)
+    if plan is None:
+        return None
+    _, _, rows, rows_per_band = plan
+    width, height = image.size
+    band_count = -(-rows // rows_per_band)
+
+    output = Image.new(image.mode, (-(-width // factor), -(-height // factor)))
+    bands: list[Image.Image] = []
+    buffered = output_y = 0
+    for band_index, band in enumerate(_iter_bands(image, plan)):
+        if band is None:
+            return None
+        bands.append(band)
+        buffered += band.height
+        last = band_index == band_count - 1
+        if buffered < factor and not last:
+            continue
+        merged = bands[0] if len(bands) == 1 else _stack(bands)
+        usable_rows = buffered if last else buffered - buffered % factor
+        output.paste(merged.crop((0, 0, width, usable_rows)).reduce(factor), (0, output_y))
+        output_y += -(-usable_rows // factor)
+        bands = [merged.crop((0, usable_rows, width, buffered))] if usable_rows < buffered else []
+        buffered -= usable_rows
+
+    output.info = dict(image.info)
+    return output
+
+
+def decode_tiff(image: TiffImagePlugin.TiffImageFile, min_size: int) -> Image.Image:
+    """変換に必要なサイズを満たす範囲で、できるだけ小さくTIFFをデコードする
+
+    Args:
+        image: 変換するページにシーク済みのTIFF（画素は未読み込み）
+        min_size: デコード結果の幅・高さの下限（ピクセル）
+
+    Returns:
+        Image.Image: 画素を読み込んだ画像
+    """
+    level = select_reduced_level(image, min_size)
+    factor = min(level.size) // min_size
+    if factor >= 2 and isinstance(level, TiffImagePlugin.TiffImageFile):
+        try:
+            reduced = decode_tiles_reduced(level, factor)
+        except Exception as e:  # タイル単位で読めない場合は全体をデコードする
+            logger.debug("Falling back to full TIFF decode: {}", e)
+            reduced = None
+        if reduced is not None:
+            return reduced
+    level.load()
+    return level
+
+
+def verify_tiff(image: TiffImagePlugin.TiffImageFile, min_size: int) -> None:
+    """``decode_tiff`` で読み込むページを、元の解像度の全画素を展開せずにデコードできるか確認する
+
+    ``decode_tiff`` と同じ縮小画像を選び、帯単位でデコードできる場合はすべての帯を1本ずつデコードして捨てる
+    （メモリに載るのは帯1本分だけ）。帯単位で扱えない構成では ``decode_tiff`` と同じく選んだ画像全体を読み込む
+    （変換時と同じメモリ量）。
+
+    Args:
+        image: 変換するページにシーク済みのTIFF（画素は未読み込み）
+        min_size: デコード結果の幅・高さの下限（ピクセル）
+
+    Raises:
+        Exception: 選んだ画像をデコードできない場合（Pillowの例外をそのまま送出する）
+    """
+    level = select_reduced_level(image, min_size)
+    factor = min(level.size) // min_size
+    if factor >= 2 and isinstance(level, TiffImagePlugin.TiffImageFile):
+        plan = _band_plan(level)
+        if plan is not None:
+            try:
+                # 後半のタイルだけが壊れている場合も変換時ではなくここで検出するため、すべての帯を確認する
+                if all(band is not None for band in _iter_bands(level, plan)):
+                    return
+            except Exception as e:  # decode_tiff と同じく、帯単位で読めない場合は全体をデコードする
+                logger.debug("Falling back to full TIFF verification: {}", e)
+    level.load()
@@ -0,0 +1,420 @@
+"""リクエストのトレーシング
+
+OpenTelemetry と同じ形（trace_id / span_id / 親子関係 / 開始・終了時刻 / 属性）のスパンで、
+リクエストの処理をミドルウェア → アップロード読み込み → バリデーション → スレッドプールの待ち →
+decode / 背景透明化 / サイズ別リサイズ / ICOエンコード に分けて記録します。
+trace_id は ``X-Request-ID``（UUID）の16進表記で、ログとトレースを同じIDで突き合わせられます。
+
+現在のスパンは contextvars で受け渡すため、変換スレッドプール（呼び出し元のコンテキストを引き継ぐ）で
+作られたスパンも同じトレースに入ります。終了したスパンはキューに積まれ、専用スレッドがまとめて
+JSON Lines ファイルまたは OTLP/HTTP（JSON）のエンドポイントへ出力します。
+
+環境変数 ``TRACE_ENABLED=true`` のときだけ有効です。無効時（およびトレースの外）の ``span`` は
+共有の何もしないスパンを返すため、ホットパスでオブジェクトは生成されません。
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Protocol
+
+from loguru import logger
+
+from .metrics import TRACE_SPANS_DROPPED
+
+# トレーシング設定（環境変数で制御）
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+# 出力先の種類（jsonl または otlp）
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl")
+TRACE_FILE = Path(os.getenv("TRACE_FILE", str(Path(tempfile.gettempdir()) / "iconconverter-traces.jsonl")))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# 出力待ちのスパンの上限（超えた分は破棄して iconconv_trace_spans_dropped_total に数える）
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "4096"))
+
+# OTLP の resource 属性に使うサービス名
+SERVICE_NAME = "iconconverter-backend"
+
+# 1回の出力にまとめる最大スパン数
+_BATCH_SIZE = 512
+
+
+class SpanExporter(Protocol):
+    """終了したスパンの出力先"""
+
+    def export(self, spans: list["Span"]) -> None:
+        """スパンをまとめて出力"""
+
+    def shutdown(self) -> None:
+        """出力先を閉じる"""
+
+
+class Span:
+    """トレースの1区間
+
+    ``with`` ブロックで使うと、その間は現在のスパンになり、ブロック内で作られたスパンの親になる。
+    """
+
+    __slots__ = (
+        "_token",
+        "attributes",
+        "end_ns",
+        "error",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "thread",
+        "trace_id",
+    )
+
+    recording = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None = None, start_ns: int | None = None) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns = 0
+        self.error = False
+        self.thread = threading.current_thread().name
+        self.attributes: dict[str, Any] = {}
+        self._token: contextvars.Token[Span | None] | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """属性を設定"""
+        self.attributes[key] = value
+
+    def end(self, end_ns: int | None = None) -> None:
+        """スパンを終了して出力キューに積む"""
+        self.end_ns = time.time_ns() if end_ns is None else end_ns
+        _processor.put(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        if exc is not None:
+            self.error = True
+            self.attributes["exception.type"] = type(exc).__name__
+        self.end()
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON Lines 出力用の辞書"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "thread": self.thread,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """トレーシング無効時（およびトレースの外）に返す、何も記録しないスパン"""
+
+    __slots__ = ()
+
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """何もしない"""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# 現在のスパン（トレースの外では None）
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+class JsonLinesExporter:
+    """スパンを1行1件のJSONとしてファイルに追記する出力先"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        """スパンをファイルに追記"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as file:
+            file.writelines(json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans)
+
+    def shutdown(self) -> None:
+        """何もしない（書き込みのたびにファイルを閉じている）"""
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    """属性値を OTLP の AnyValue 形式に変換"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """スパンを OTLP/HTTP（JSONエンコーディング）でコレクターへ送信する出力先"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def payload(self, spans: list[Span]) -> dict[str, Any]:
+        """ExportTraceServiceRequest 形式のリクエストボディ"""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}],
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,  # SPAN_KIND_INTERNAL
+                                    "startTimeUnixNano": str(span.start_ns),
+                                    "endTimeUnixNano": str(span.end_ns),
+                                    "attributes": [
+                                        {"key": key, "value": _otlp_value(value)}
+                                        for key, value in {**span.attributes, "thread.name": span.thread}.items()
+                                    ],
+                                    "status": {"code": 2 if span.error else 0},
+                                }
+                                for span in spans
+                            ],
+                        },
+                    ],
+                },
+            ],
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        """スパンをコレクターへ送信"""
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.payload(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):  # noqa: S310 - 送信先は設定値のみ
+            pass
+
+    def shutdown(self) -> None:
+        """何もしない"""
+
+
+class _BatchProcessor:
+    """終了したスパンをキューに積み、専用スレッドでまとめて出力する
+
+    出力先への書き込み・送信はリクエストを処理するスレッドでは行わない。
+    出力先が遅い・到達できない場合もメモリが増え続けないよう、キューは ``max_spans`` 件までとし、
+    あふれたスパンと出力に失敗したスパンは破棄して ``iconconv_trace_spans_dropped_total`` に数える
+    （変換処理には影響させない）。
+    """
+
+    def __init__(self, max_spans: int = TRACE_QUEUE_SIZE) -> None:
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=max(max_spans, 1))
+        self._exporter: SpanExporter | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self, exporter: SpanExporter) -> None:
+        """出力先を設定して出力スレッドを開始"""
+        with self._lock:
+            self._exporter = exporter
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def put(self, span: Span) -> None:
+        """終了したスパンを出力キューに積む（キューが一杯の場合は破棄して数える）"""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            TRACE_SPANS_DROPPED.labels("queue_full").inc()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [] if first is None else [first]
+            stop = first is None
+            while not stop and len(batch) < _BATCH_SIZE:
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if span is None:
+                    stop = True
+                else:
+                    batch.append(span)
+            try:
+                if batch and self._exporter is not None:
+                    self._exporter.export(batch)
+            except Exception as e:  # 出力先の障害で変換処理を止めない
+                TRACE_SPANS_DROPPED.labels("export_error").inc(len(batch))
+                logger.warning("Failed to export {} spans: {}", len(batch), e)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """キューに積まれたスパンがすべて出力されるまで待つ"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self) -> None:
+        """残りのスパンを出力してスレッドを終了"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            try:
+                self._queue.put(None, timeout=5)
+            except queue.Full:  # 出力先が詰まったままの場合は待たずに終了する（デーモンスレッド）
+                pass
+            else:
+                thread.join(timeout=5)
+        if self._exporter is not None:
+            self._exporter.shutdown()
+
+
+_processor = _BatchProcessor()
+_enabled = False
+
+
+def configure(exporter: SpanExporter | None) -> None:
+    """トレーシングを有効化（None を渡すと無効化）
+
+    Args:
+        exporter: 終了したスパンの出力先
+    """
+    global _enabled
+
+    if exporter is None:
+        _enabled = False
+        _processor.shutdown()
+        return
+    _processor.start(exporter)
+    _enabled = True
+
+
+def setup_tracing() -> None:
+    """環境変数の設定に従ってトレーシングを有効化（TRACE_ENABLED が false なら何もしない）"""
+    if not TRACE_ENABLED:
+        return
+    exporter: SpanExporter
+    if TRACE_EXPORTER == "otlp":
+        exporter = OtlpHttpExporter(TRACE_OTLP_ENDPOINT)
+    else:
+        exporter = JsonLinesExporter(TRACE_FILE)
+    configure(exporter)
+    logger.info("Tracing enabled (exporter={})", TRACE_EXPORTER)
+
+
+def is_enabled() -> bool:
+    """トレーシングが有効か"""
+    return _enabled
+
+
+def start_trace(request_id: str, name: str) -> Span | _NoopSpan:
+    """リクエストのルートスパンを作成
+
+    Args:
+        request_id: リクエストID（UUIDなら16進表記をそのまま trace_id に使う）
+        name: スパン名
+
+    Returns:
+        Span | _NoopSpan: ``with`` ブロックで使うスパン（無効時は何もしないスパン）
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    try:
+        trace_id = uuid.UUID(request_id).hex
+    except ValueError:
+        trace_id = uuid.uuid4().hex
+    root = Span(name, trace_id)
+    root.set_attribute("request_id", request_id)
+    return root
+
+
+def span(name: str) -> Span | _NoopSpan:
+    """現在のスパンの子スパンを作成
+
+    トレースの外（無効時、カナリア変換、CLIからの変換など）では何もしないスパンを返す。
+
+    Args:
+        name: スパン名
+
+    Returns:
+        Span | _NoopSpan: ``with`` ブロックで使うスパン
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id)
+
+
+def record_span(name: str, seconds: float) -> None:
+    """計測済みの区間を現在のスパンの子スパンとして記録（終了時刻は現在時刻）
+
+    Args:
+        name: スパン名
+        seconds: 区間の長さ（秒）
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return
+    end_ns = time.time_ns()
+    Span(name, parent.trace_id, parent.span_id, start_ns=end_ns - int(seconds * 1e9)).end(end_ns)
+
+
+def flush() -> None:
+    """出力待ちのスパンがすべて出力されるまで待つ"""
+    _processor.flush()
+
+
+def shutdown() -> None:
+    """残りのスパンを出力してトレーシングを終了"""
+    configure(None)
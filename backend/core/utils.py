@@ -1,50 +1,160 @@
 import os
-import sys
 
+import numpy as np
 from loguru import logger
-from PIL import Image
-
-
-def setup_logger(name: str) -> None:
-    """Configure loguru logger with structured JSON output"""
-    os.makedirs("logs", exist_ok=True)
-
-    # Remove default handler
-    logger.remove()
-
-    # Add structured JSON file logging
-    logger.add(
-        "logs/app.log",
-        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}",
-        level="INFO",
-        rotation="10 MB",
-        retention="30 days",
-        encoding="utf-8",
-        enqueue=True,
-    )
-
-    # Add console output for development
-    console_format = (
-        "<green>{time:HH:mm:ss}</green> | <level>{level: <8}</level> | "
-        "<cyan>{name}</cyan>:<cyan>{function}</cyan> | {message}"
-    )
-    logger.add(
-        sys.stderr,
-        format=console_format,
-        level="INFO",
-    )
+from PIL import ExifTags, Image
+
+# グレースケールのモード（透明度を保持しない場合は L に変換する）
+_GRAYSCALE_MODES = {"1", "L", "LA", "I", "I;16", "I;16L", "I;16B", "I;16N", "F"}
+
+# 16bitのグレースケールのモード（Pillowの convert は255を超える値を255に切り詰めるため、上位8bitを使う）
+_SIXTEEN_BIT_MODES = {"I", "I;16", "I;16L", "I;16B", "I;16N"}
+
+# 縮小した後に変換しても結果が変わらない（チャンネルの複製や不透明なアルファの追加だけの）変換
+_RESIZE_FIRST_CONVERSIONS = {("L", "RGB"), ("L", "RGBA"), ("LA", "RGBA"), ("RGB", "RGBA")}
+
+
+def working_mode(image: Image.Image, preserve_transparency: bool = True) -> str:
+    """ICO変換で扱うモード（透明度を保持する場合は RGBA、しない場合はグレースケールなら L、それ以外は RGB）"""
+    if preserve_transparency:
+        return "RGBA"
+    return "L" if image.mode in _GRAYSCALE_MODES else "RGB"
+
+
+def _convert_sixteen_bit(image: Image.Image, mode: str) -> Image.Image:
+    """16bitのグレースケール画像を上位8bitで作業モードに変換（透明色の指定はアルファに反映）"""
+    pixels = np.asarray(image)
+    gray = (np.clip(pixels, 0, 0xFFFF) >> 8).astype(np.uint8)
+    if mode == "L":
+        return Image.fromarray(gray)
+    channels = [gray, gray, gray]
+    if mode == "RGBA":
+        alpha = np.full_like(gray, 255)
+        if "transparency" in image.info:
+            alpha[pixels == image.info["transparency"]] = 0
+        channels.append(alpha)
+    return Image.fromarray(np.dstack(channels))
 
 
 def prepare_image_for_conversion(image: Image.Image, preserve_transparency: bool = True) -> Image.Image:
-    """画像をICO変換用に前処理する"""
-    # JPEG等のアルファチャンネルがない画像をRGBAに変換
-    if preserve_transparency and image.mode != "RGBA":
-        image = image.convert("RGBA")
-    elif not preserve_transparency and image.mode == "RGBA":
-        # RGBA画像をRGBに変換（透明チャンネル削除）
-        image = image.convert("RGB")
+    """画像をICO変換用の作業モード（``working_mode``）に1回の変換で前処理する
+
+    パレット・グレースケール・RGBの透明色の指定（``transparency``）はアルファに、LA・PAのアルファはそのまま
+    RGBAのアルファになる。CMYKはRGB（透明度を保持する場合はRGBA）に直接変換し、16bitのグレースケールは
+    白に切り詰めずに上位8bitを使う。
+    """
+    mode = working_mode(image, preserve_transparency)
+    if image.mode == mode:
+        return image
+    if image.mode in _SIXTEEN_BIT_MODES:
+        return _convert_sixteen_bit(image, mode)
+    return image.convert(mode)
+
+
+def can_prepare_after_resize(image: Image.Image, preserve_transparency: bool = True) -> bool:
+    """前処理を縮小後の各サイズで行っても、縮小前に行った場合と結果が同じか
+
+    L・LA・RGBからの変換はチャンネルの複製と不透明なアルファの追加だけのため、縮小と順序を入れ替えられる。
+    透明色の指定がある画像は、縮小で透明色が周囲の色と混ざるため対象外。
+    """
+    conversion = (image.mode, working_mode(image, preserve_transparency))
+    return conversion in _RESIZE_FIRST_CONVERSIONS and "transparency" not in image.info
+
+
+# EXIFの向き（Orientation）→ 正しい向きにする変換（ImageOps.exif_transpose と同じ対応）
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def exif_orientation(image: Image.Image) -> int:
+    """EXIFの向き（1〜8）を取得（EXIFがない、または読み取れない・不正な値の場合は1: 正常）"""
+    try:
+        orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    except (OSError, ValueError, SyntaxError) as e:
+        logger.warning("EXIFを読み取れないため向きを補正しません: {}", e)
+        return 1
+    return orientation if orientation in _ORIENTATION_TRANSPOSE else 1
+
+
+def apply_orientation(image: Image.Image, orientation: int) -> Image.Image:
+    """EXIFの向きに従って画像を正しい向きにする（向きが正常な場合はそのまま返す）"""
+    method = _ORIENTATION_TRANSPOSE.get(orientation)
+    return image if method is None else image.transpose(method)
+
+
+# フレーム選択の指定（先頭フレーム / 最も大きいフレーム / 0始まりのインデックス）
+FRAME_FIRST = "first"
+FRAME_LARGEST = "largest"
+
+# 全フレームがキャンバスと同じサイズで合成される形式（最大フレームは常に先頭フレーム）
+_CANVAS_FORMATS = {"GIF", "WEBP", "PNG"}
+
+
+def parse_frame_selector(value: str) -> int | str:
+    """フレーム選択の指定を解釈する
+
+    Args:
+        value: ``first``、``largest``、または0以上の整数
+
+    Returns:
+        int | str: FRAME_FIRST、FRAME_LARGEST、またはフレームのインデックス
+
+    Raises:
+        ValueError: 解釈できない指定の場合
+    """
+    value = value.strip().lower()
+    if value in (FRAME_FIRST, FRAME_LARGEST):
+        return value
+    if value.isdigit():
+        return int(value)
+    raise ValueError(f"フレームの指定が不正です: {value}")
+
+
+def frame_count(image: Image.Image) -> int:
+    """画像のフレーム数（単一フレームの形式は1）"""
+    return int(getattr(image, "n_frames", 1))
+
+
+def select_frame(image: Image.Image, frame: int | str = FRAME_FIRST) -> int:
+    """変換に使うフレームへシークする（ピクセルデータは読み込まない）
+
+    TIFFのページは独立しているため、指定したページのヘッダーだけを読んで直接シークする。
+    GIF・WebPのアニメーションは前のフレームに重ねて合成されるため、Pillowは指定フレームまでの
+    フレームを順にデコードする。先頭フレームを指定した場合はシークもフレーム数の確認も行わない。
+
+    Args:
+        image: ``Image.open`` で開いた画像
+        frame: FRAME_FIRST、FRAME_LARGEST、またはフレームのインデックス
+
+    Returns:
+        int: 選択したフレームのインデックス
 
-    return image
+    Raises:
+        ValueError: 存在しないフレームが指定された場合
+    """
+    if frame in (FRAME_FIRST, 0) or (frame == FRAME_LARGEST and image.format in _CANVAS_FORMATS):
+        return 0
+    count = frame_count(image)
+    if frame == FRAME_LARGEST:
+        largest, largest_area = 0, 0
+        for index in range(count):
+            image.seek(index)
+            area = image.size[0] * image.size[1]
+            if area > largest_area:
+                largest, largest_area = index, area
+        image.seek(largest)
+        return largest
+    if not isinstance(frame, int) or not 0 <= frame < count:
+        raise ValueError(f"フレーム {frame} は存在しません（フレーム数: {count}）")
+    image.seek(frame)
+    return frame
 
 
 def get_file_extension(file_path: str) -> str:
@@ -55,5 +165,5 @@ def get_file_extension(file_path: str) -> str:
 def is_transparency_supported(file_path: str) -> bool:
     """ファイル形式が透明化をサポートしているかチェック"""
     ext = get_file_extension(file_path)
-    # PNG、GIF、WebPは透明化をサポート
-    return ext in [".png", ".gif", ".webp"]
+    # PNG、GIF、WebP、SVG、ICO、ICNSは透明化をサポート
+    return ext in [".png", ".gif", ".webp", ".svg", ".ico", ".icns"]
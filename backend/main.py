@@ -1,9 +1,11 @@
 """FastAPI application for Image to ICO converter."""
 
+import asyncio
+import contextlib
 import os
 import time
 import uuid
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, Response
@@ -13,13 +15,18 @@ from loguru import logger
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from core.logger import setup_logger
+from core.logger import setup_logger, should_sample
+from core.metrics import ERRORS
+from core.tracing import setup_tracing, start_trace
+from core.tracing import shutdown as shutdown_tracing
 from exceptions import (
     ConversionFailedError,
     FileSizeExceededError,
     InvalidFileFormatError,
 )
-from routers import convert, health
+from routers import convert, health, metrics
+from services.canary import CANARY_INTERVAL_SECONDS, CanaryProbe
+from services.loop_monitor import LOOP_MONITOR_INTERVAL_SECONDS, LoopMonitor, track_request
 
 # .envファイルを読み込む
 load_dotenv()
@@ -28,9 +35,36 @@ load_dotenv()
 log_level = os.getenv("LOG_LEVEL", "INFO")
 setup_logger(log_level)
 
+# トレーシングのセットアップ（TRACE_ENABLED=true のときのみ）
+setup_tracing()
+
 # レート制限の設定
 limiter = Limiter(key_func=get_remote_address)
 
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """アプリケーションの起動・終了処理
+
+    起動時にカナリア変換とイベントループ監視のバックグラウンドタスクを開始し、終了時に停止する。
+    """
+    logger.info("Starting Image to ICO Converter API v2.0.0")
+    tasks = []
+    if CANARY_INTERVAL_SECONDS > 0:
+        probe = CanaryProbe(convert.conversion_service.converter)
+        tasks.append(asyncio.create_task(probe.run_forever(CANARY_INTERVAL_SECONDS)))
+    if LOOP_MONITOR_INTERVAL_SECONDS > 0:
+        monitor = LoopMonitor(convert.conversion_service.executor)
+        tasks.append(asyncio.create_task(monitor.run_forever()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    shutdown_tracing()
+    logger.info("Shutting down Image to ICO Converter API")
+
+
 # アプリケーションインスタンスの作成
 app = FastAPI(
     title="Image to ICO Converter API",
@@ -38,6 +72,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # レート制限をアプリケーションに追加
@@ -101,56 +136,72 @@ async def logging_middleware(request: Request, call_next: Callable[[Request], Aw
     # リクエスト開始時刻
     start_time = time.time()
 
-    # リクエスト情報をログに記録
-    logger.info(
-        "Request started",
-        extra={
-            "request_id": request_id,
-            "method": request.method,
-            "url": str(request.url),
-            "client_host": request.client.host if request.client else None,
-        },
-    )
-
-    # 次の処理を実行
-    try:
-        response = await call_next(request)
-
-        # 処理時間を計算
-        process_time = time.time() - start_time
-
-        # レスポンス情報をログに記録
+    # このリクエストのログ全体にリクエストIDと成功ログのサンプリング可否を付加する
+    # （WARNING以上のログはサンプリングに関係なく出力される）
+    # トレースのルートスパンは trace_id にリクエストIDを使う（無効時は何もしないスパン）
+    # イベントループの遅延が大きいときに処理中だったリクエストとして記録できるよう登録する
+    with (
+        logger.contextualize(request_id=request_id, sampled=should_sample()),
+        start_trace(request_id, "http.request") as root_span,
+        track_request(request_id),
+    ):
+        if root_span.recording:
+            root_span.set_attribute("http.method", request.method)
+            root_span.set_attribute("http.target", request.url.path)
+        # リクエスト情報をログに記録
         logger.info(
-            "Request completed",
+            "Request started",
             extra={
                 "request_id": request_id,
                 "method": request.method,
                 "url": str(request.url),
-                "status_code": response.status_code,
-                "process_time": f"{process_time:.3f}s",
+                "client_host": request.client.host if request.client else None,
             },
         )
 
-        # レスポンスヘッダーにリクエストIDを追加
-        response.headers["X-Request-ID"] = request_id
-
-        return response
-
-    except Exception as exc:
-        # エラー情報をログに記録
-        process_time = time.time() - start_time
-        logger.error(
-            "Request failed",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "url": str(request.url),
-                "error": str(exc),
-                "error_type": type(exc).__name__,
-                "process_time": f"{process_time:.3f}s",
-            },
-        )
-        raise
+        # 次の処理を実行
+        try:
+            response = await call_next(request)
+
+            # 処理時間を計算
+            process_time = time.time() - start_time
+
+            # レスポンス情報をログに記録（エラー応答はサンプリング対象外のリクエストでも記録する）
+            completed_logger = logger.bind(sampled=True) if response.status_code >= 400 else logger
+            completed_logger.info(
+                "Request completed",
+                extra={
+                    "request_id": request_id,
+                    "method": request.method,
+                    "url": str(request.url),
+                    "status_code": response.status_code,
+                    "process_time": f"{process_time:.3f}s",
+                },
+            )
+
+            if root_span.recording:
+                root_span.set_attribute("http.status_code", response.status_code)
+
+            # レスポンスヘッダーにリクエストIDを追加
+            response.headers["X-Request-ID"] = request_id
+
+            return response
+
+        except Exception as exc:
+            # エラー情報をログに記録
+            process_time = time.time() - start_time
+            logger.error(
+                "Request failed",
+                extra={
+                    "request_id": request_id,
+                    "method": request.method,
+                    "url": str(request.url),
+                    "error": str(exc),
+                    "error_type": type(exc).__name__,
+                    "process_time": f"{process_time:.3f}s",
+                },
+            )
+            raise
 
 
 # CORS設定
@@ -167,21 +218,10 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-async def startup_event() -> None:
-    """アプリケーション起動時の処理."""
-    logger.info("Starting Image to ICO Converter API v2.0.0")
-
-
-@app.on_event("shutdown")
-async def shutdown_event() -> None:
-    """アプリケーション終了時の処理."""
-    logger.info("Shutting down Image to ICO Converter API")
-
-
 # ルーターを登録
 app.include_router(convert.router)
 app.include_router(health.router)
+app.include_router(metrics.router)
 
 
 # カスタム例外ハンドラー
@@ -196,7 +236,8 @@ async def invalid_format_handler(request: Request, exc: InvalidFileFormatError)
     Returns:
         JSONResponse: エラーレスポンス（415 Unsupported Media Type）
     """
-    logger.warning(f"Invalid file format: {exc}")
+    logger.warning("Invalid file format: {}", exc)
+    ERRORS.labels("INVALID_FORMAT").inc()
     return JSONResponse(
         status_code=415,
         content={
@@ -218,7 +259,8 @@ async def file_size_handler(request: Request, exc: FileSizeExceededError) -> JSO
     Returns:
         JSONResponse: エラーレスポンス（413 Payload Too Large）
     """
-    logger.warning(f"File size exceeded: {exc}")
+    logger.warning("File size exceeded: {}", exc)
+    ERRORS.labels("FILE_TOO_LARGE").inc()
     return JSONResponse(
         status_code=413,
         content={
@@ -240,7 +282,8 @@ async def conversion_failed_handler(request: Request, exc: ConversionFailedError
     Returns:
         JSONResponse: エラーレスポンス（500 Internal Server Error）
     """
-    logger.error(f"Conversion failed: {exc}")
+    logger.error("Conversion failed: {}", exc)
+    ERRORS.labels("CONVERSION_FAILED").inc()
     return JSONResponse(
         status_code=500,
         content={
@@ -103,3 +103,43 @@ class ErrorResponse(BaseModel):
                 "error_code": "INVALID_FORMAT",
             },
         }
+
+
+class ReadinessResponse(BaseModel):
+    """レディネスチェックレスポンスモデル.
+
+    Attributes:
+        status: 新しいリクエストを受け付けられるか
+        saturation: 実行スレッドの飽和度（(実行中 + 待機中) / 最大スレッド数）
+        queue_depth: 実行スレッドを待っている変換タスク数
+        active_workers: 変換を実行中のスレッド数
+        max_workers: 実行スレッドの上限
+        p95_latency_seconds: 直近の変換レイテンシのp95（秒）
+        latency_samples: p95の算出に使った変換数
+        reasons: 受付不可と判定した理由
+    """
+
+    status: Literal["ready", "not_ready"] = Field(description="新しいリクエストを受け付けられるか")
+    saturation: float = Field(description="実行スレッドの飽和度（(実行中 + 待機中) / 最大スレッド数）", ge=0)
+    queue_depth: int = Field(description="実行スレッドを待っている変換タスク数", ge=0)
+    active_workers: int = Field(description="変換を実行中のスレッド数", ge=0)
+    max_workers: int = Field(description="実行スレッドの上限", ge=0)
+    p95_latency_seconds: float | None = Field(default=None, description="直近の変換レイテンシのp95（秒）")
+    latency_samples: int = Field(default=0, description="p95の算出に使った変換数", ge=0)
+    reasons: list[str] = Field(default_factory=list, description="受付不可と判定した理由")
+
+    class Config:
+        """Pydantic設定."""
+
+        json_schema_extra = {
+            "example": {
+                "status": "ready",
+                "saturation": 0.5,
+                "queue_depth": 0,
+                "active_workers": 2,
+                "max_workers": 4,
+                "p95_latency_seconds": 0.42,
+                "latency_samples": 37,
+                "reasons": [],
+            },
+        }
@@ -1,10 +1,12 @@
 """画像変換エンドポイント
 
 POST /api/convert - 画像をICOファイルに変換
+POST /api/ico/update - 既存のICOの指定したサイズの項目だけを差し替え
 """
 
 import os
 import time
+import uuid
 from io import BytesIO
 from pathlib import Path
 from urllib.parse import quote
@@ -15,6 +17,10 @@ from loguru import logger
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from core.metrics import INPUT_BYTES, format_label
+from core.profiling import PROFILE_HEADER, should_profile
+from core.stats import ConversionStats
+from core.utils import FRAME_FIRST, parse_frame_selector
 from exceptions import ConversionFailedError, FileSizeExceededError, InvalidFileFormatError
 from services.conversion import ImageConversionService
 from services.validation import ValidationService
@@ -31,6 +37,35 @@ validation_service = ValidationService()
 conversion_service = ImageConversionService()
 
 
+def _content_disposition(output_filename: str) -> str:
+    """ダウンロード用の Content-Disposition ヘッダーを生成"""
+    # ファイル名を ASCII-safe にエンコード（RFC 5987に従う）
+    # Starlette は latin-1 エンコーディングのみをサポートするため、
+    # 日本語などの非ASCII文字は quote でエンコードする
+    filename_utf8 = quote(output_filename, safe="")
+    # ファイル名にASCII以外の文字が含まれていない場合のみ日本語を使用
+    try:
+        output_filename.encode("ascii")
+        # ASCII対応の場合は日本語ファイル名を使う
+        return f"attachment; filename=\"{output_filename}\"; filename*=UTF-8''{filename_utf8}"
+    except UnicodeEncodeError:
+        # ASCII非対応の場合はエンコード済みファイル名のみを使用
+        return f'attachment; filename="{filename_utf8}"'
+
+
+def _ico_response(ico_data: bytes, output_filename: str, server_timing: str) -> StreamingResponse:
+    """ICOファイルをダウンロードさせるレスポンスを生成"""
+    return StreamingResponse(
+        BytesIO(ico_data),
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": _content_disposition(output_filename),
+            "Content-Length": str(len(ico_data)),
+            "Server-Timing": server_timing,
+        },
+    )
+
+
 @router.post(
     "/convert",
     response_class=StreamingResponse,
@@ -62,6 +97,20 @@ async def convert_image(
         default=False,
         description="自動背景透明化（四隅のピクセルから単色背景を検出）",
     ),
+    frame: str = Form(  # noqa: B008
+        default=FRAME_FIRST,
+        pattern=r"^(first|largest|\d{1,6})$",
+        description="複数フレームの画像で変換するフレーム（first: 先頭、largest: 最大、数値: 0始まりの番号）",
+    ),
+    profile: str | None = Form(  # noqa: B008
+        default=None,
+        pattern=r"^(fast|balanced|small)$",
+        description="エンコードプロファイル（fast: 高速、balanced: 標準、small: 最小サイズ。省略時は既定）",
+    ),
+    palettize: bool = Form(  # noqa: B008
+        default=False,
+        description="256色以下でアルファが0か255だけのサイズを8bitのパレット形式で格納する",
+    ),
 ) -> StreamingResponse:
     """画像をICOファイルに変換するエンドポイント
 
@@ -72,6 +121,9 @@ async def convert_image(
         file: アップロードされた画像ファイル
         preserve_transparency: 透明化を保持するか
         auto_transparent_bg: 自動背景透明化を行うか
+        frame: 複数フレームの画像で変換するフレーム
+        profile: エンコードプロファイル
+        palettize: 8bitのパレット形式で格納できるサイズをパレット化するか
 
     Returns:
         StreamingResponse: ICOファイルのバイナリストリーム
@@ -79,78 +131,80 @@ async def convert_image(
     Raises:
         HTTPException: バリデーションエラーまたは変換エラー
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
+    stats = ConversionStats(input_format=format_label(file.filename or ""))
+    frame_selector = parse_frame_selector(frame)
 
     logger.info(
-        f"Received conversion request: filename={file.filename}, "
-        f"content_type={file.content_type}, "
-        f"preserve_transparency={preserve_transparency}, "
-        f"auto_transparent_bg={auto_transparent_bg}",
+        "Received conversion request: filename={}, content_type={}, preserve_transparency={}, "
+        "auto_transparent_bg={}, profile={}, palettize={}",
+        file.filename,
+        file.content_type,
+        preserve_transparency,
+        auto_transparent_bg,
+        profile,
+        palettize,
     )
 
     try:
         # ファイルコンテンツを読み込み
-        read_start = time.time()
-        file_content = await file.read()
+        with stats.measure("read"):
+            file_content = await file.read()
         file_size = len(file_content)
-        read_time = time.time() - read_start
+        stats.input_bytes = file_size
 
         # BytesIOでラップ
         file_stream = BytesIO(file_content)
 
         # バリデーション
-        validation_start = time.time()
-        validation_service.validate_uploaded_file(
-            filename=file.filename or "unknown",
-            file_size=file_size,
-            file_content=file_stream,
-            content_type=file.content_type,
-        )
-        validation_time = time.time() - validation_start
+        with stats.measure("validate"):
+            validation_service.validate_uploaded_file(
+                filename=file.filename or "unknown",
+                file_size=file_size,
+                file_content=file_stream,
+                content_type=file.content_type,
+                frame=frame_selector,
+            )
+        INPUT_BYTES.labels(stats.input_format).inc(file_size)
 
-        # 変換処理（非同期）
-        conversion_start = time.time()
+        # プロファイリング対象ならリクエストIDをプロファイル名に使う（無効時はフラグ確認のみ）
+        cprofile_id = None
+        if should_profile(request.headers.get(PROFILE_HEADER)):
+            cprofile_id = getattr(request.state, "request_id", None) or str(uuid.uuid4())
+
+        # 変換処理（非同期）: decode / key / resize / encode は stats に記録される
         ico_data = await conversion_service.convert_to_ico_async(
             file_content=file_stream,
             filename=file.filename or "image.png",
             preserve_transparency=preserve_transparency,
             auto_transparent_bg=auto_transparent_bg,
+            stats=stats,
+            frame=frame_selector,
+            profile=profile,
+            palettize=palettize,
+            cprofile_id=cprofile_id,
         )
-        conversion_time = time.time() - conversion_start
 
         # 出力ファイル名を生成（元のファイル名から拡張子を除いて.icoを追加）
         original_name = Path(file.filename or "output").stem
         output_filename = f"{original_name}.ico"
 
-        total_time = time.time() - start_time
-        logger.info(
-            f"Conversion successful: {file.filename} -> {output_filename} "
-            f"({len(ico_data)} bytes, read: {read_time:.3f}s, validation: {validation_time:.3f}s, "
-            f"conversion: {conversion_time:.3f}s, total: {total_time:.3f}s)",
+        stats.add("total", time.perf_counter() - start_time)
+        stats.record_metrics()
+        server_timing = stats.server_timing()
+        logger.bind(**stats.resource_fields()).info(
+            "Conversion successful: {} -> {} ({} bytes, {})",
+            file.filename,
+            output_filename,
+            len(ico_data),
+            server_timing,
         )
 
-        # ファイル名を ASCII-safe にエンコード（RFC 5987に従う）
-        # Starlette は latin-1 エンコーディングのみをサポートするため、
-        # 日本語などの非ASCII文字は quote でエンコードする
-        filename_utf8 = quote(output_filename, safe="")
-        # ファイル名にASCII以外の文字が含まれていない場合のみ日本語を使用
-        try:
-            output_filename.encode("ascii")
-            # ASCII対応の場合は日本語ファイル名を使う
-            content_disposition = f"attachment; filename=\"{output_filename}\"; filename*=UTF-8''{filename_utf8}"
-        except UnicodeEncodeError:
-            # ASCII非対応の場合はエンコード済みファイル名のみを使用
-            content_disposition = f'attachment; filename="{filename_utf8}"'
-
         # StreamingResponseでICOファイルを返却
-        return StreamingResponse(
-            BytesIO(ico_data),
-            media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": content_disposition,
-                "Content-Length": str(len(ico_data)),
-            },
-        )
+        response = _ico_response(ico_data, output_filename, server_timing)
+        if palettize:
+            response.headers["X-Palette-Savings"] = stats.palette_savings()
+        return response
 
     except (InvalidFileFormatError, FileSizeExceededError, ConversionFailedError):
         # カスタム例外はそのまま再送出（例外ハンドラーで処理）
@@ -169,3 +223,106 @@ async def convert_image(
             f"画像の変換に失敗しました。別の画像ファイルをお試しください。"
             f"問題が解決しない場合は、サポートにお問い合わせください。（エラー詳細: {safe_error}）",
         ) from e
+
+
+@router.post(
+    "/ico/update",
+    response_class=StreamingResponse,
+    summary="既存のICOの指定したサイズの項目を差し替え",
+    description=(
+        "既存のICOファイルのうち、差し替え画像と同じサイズの項目だけを更新します。"
+        "同じサイズの項目がない画像は追加されます。他の項目は再エンコードせずにそのままコピーされます。"
+    ),
+    responses={
+        200: {
+            "description": "更新成功",
+            "content": {"application/octet-stream": {}},
+        },
+        413: {"description": "ファイルサイズ超過"},
+        415: {"description": "サポートされていないファイル形式、または格納できないサイズ"},
+        429: {"description": "レート制限超過"},
+        500: {"description": "サーバーエラー"},
+    },
+)
+@limiter.limit("10/minute")
+async def update_ico(
+    request: Request,
+    file: UploadFile = File(..., description="更新するICOファイル"),  # noqa: B008
+    replacements: list[UploadFile] = File(  # noqa: B008
+        ...,
+        description="差し替える画像（画像のサイズと同じサイズの項目を置き換える。256px以下）",
+    ),
+) -> StreamingResponse:
+    """既存のICOの指定したサイズの項目だけを差し替えるエンドポイント
+
+    レート制限: 10リクエスト/分
+
+    Args:
+        request: リクエストオブジェクト（レート制限に必要）
+        file: 更新するICOファイル
+        replacements: 差し替える画像
+
+    Returns:
+        StreamingResponse: 更新されたICOファイルのバイナリストリーム
+
+    Raises:
+        HTTPException: バリデーションエラーまたは更新エラー
+    """
+    start_time = time.perf_counter()
+    stats = ConversionStats(input_format=format_label(file.filename or ""))
+    filename = file.filename or "icon.ico"
+
+    logger.info("Received ICO update request: filename={}, replacements={}", filename, len(replacements))
+
+    try:
+        with stats.measure("read"):
+            ico_content = await file.read()
+            replacement_streams = [BytesIO(await replacement.read()) for replacement in replacements]
+        stats.input_bytes = len(ico_content)
+
+        with stats.measure("validate"):
+            validation_service.validate_ico_update(filename, [r.filename or "unknown" for r in replacements])
+            validation_service.validate_uploaded_file(
+                filename=filename,
+                file_size=len(ico_content),
+                file_content=BytesIO(ico_content),
+                content_type=file.content_type,
+            )
+            for replacement, stream in zip(replacements, replacement_streams, strict=True):
+                validation_service.validate_uploaded_file(
+                    filename=replacement.filename or "unknown",
+                    file_size=len(stream.getbuffer()),
+                    file_content=stream,
+                    content_type=replacement.content_type,
+                )
+        INPUT_BYTES.labels(stats.input_format).inc(len(ico_content))
+
+        ico_data = await conversion_service.update_ico_async(ico_content, replacement_streams, stats)
+
+        stats.add("total", time.perf_counter() - start_time)
+        stats.record_metrics()
+        server_timing = stats.server_timing()
+        logger.bind(**stats.resource_fields()).info(
+            "ICO update successful: {} ({} bytes, {})",
+            filename,
+            len(ico_data),
+            server_timing,
+        )
+        return _ico_response(ico_data, Path(filename).name, server_timing)
+
+    except (InvalidFileFormatError, FileSizeExceededError, ConversionFailedError):
+        # カスタム例外はそのまま再送出（例外ハンドラーで処理）
+        raise
+
+    except Exception as e:
+        # 予期しないエラー（詳細をログに記録）
+        import traceback
+
+        error_str = str(e)
+        safe_error = error_str.encode("utf-8", errors="replace").decode("utf-8")
+        traceback_str = traceback.format_exc()
+        logger.error("Unexpected error during ICO update: {}\n{}", safe_error, traceback_str, exc_info=True)
+        raise ConversionFailedError(
+            f"ICOの更新に失敗しました。別のファイルをお試しください。"
+            f"問題が解決しない場合は、サポートにお問い合わせください。（エラー詳細: {safe_error}）",
+        ) from e
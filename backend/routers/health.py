@@ -1,15 +1,29 @@
 """ヘルスチェックエンドポイント
 
 GET /api/health - サービスの状態を確認
+GET /api/health/live - ライブネスチェック（プロセスが応答できるか）
+GET /api/health/ready - レディネスチェック（変換処理の受付余力があるか）
 """
 
+import os
+
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from loguru import logger
 
-from models import HealthResponse
+from core.metrics import EXECUTOR_ACTIVE_WORKERS, EXECUTOR_MAX_WORKERS, EXECUTOR_QUEUE_DEPTH, RECENT_LATENCY
+from models import HealthResponse, ReadinessResponse
 
 router = APIRouter(prefix="/api", tags=["health"])
 
+# レディネス判定のしきい値（環境変数で制御、0以下で無効）
+# 飽和度 = (実行中 + 待機中) / 最大スレッド数。2.0 はスレッド数と同じ数の変換が待機している状態
+READY_MAX_SATURATION = float(os.getenv("READY_MAX_SATURATION", "2.0"))
+READY_MAX_QUEUE_DEPTH = int(os.getenv("READY_MAX_QUEUE_DEPTH", "8"))
+READY_MAX_P95_SECONDS = float(os.getenv("READY_MAX_P95_SECONDS", "5.0"))
+# p95の判定に必要な最小の変換数（少数の外れ値で受付を止めないため）
+READY_MIN_LATENCY_SAMPLES = int(os.getenv("READY_MIN_LATENCY_SAMPLES", "5"))
+
 
 @router.get(
     "/health",
@@ -45,3 +59,85 @@ async def health_check() -> HealthResponse:
         status="healthy",
         version="2.0.0",
     )
+
+
+@router.get(
+    "/health/live",
+    response_model=HealthResponse,
+    summary="ライブネスチェック",
+    description="プロセスが応答できるかだけを確認します。変換処理の負荷状況には影響されません。",
+)
+async def liveness_check() -> HealthResponse:
+    """ライブネスチェックエンドポイント
+
+    イベントループが応答できれば常に成功する。再起動の判定に使用する。
+
+    Returns:
+        HealthResponse: サービスの状態とバージョン情報
+    """
+    return HealthResponse(status="healthy", version="2.0.0")
+
+
+def evaluate_readiness() -> ReadinessResponse:
+    """実行スレッドの状況と直近のレイテンシから受付可否を判定
+
+    Returns:
+        ReadinessResponse: 判定結果と判定に使った値
+    """
+    queue_depth = max(int(EXECUTOR_QUEUE_DEPTH.get()), 0)
+    active_workers = max(int(EXECUTOR_ACTIVE_WORKERS.get()), 0)
+    max_workers = int(EXECUTOR_MAX_WORKERS.get())
+    saturation = (active_workers + queue_depth) / max_workers if max_workers > 0 else 0.0
+    latencies = RECENT_LATENCY.values()
+    p95 = RECENT_LATENCY.percentile(95) if latencies else None
+
+    reasons = []
+    if READY_MAX_SATURATION > 0 and saturation >= READY_MAX_SATURATION:
+        reasons.append(f"saturation {saturation:.2f} >= {READY_MAX_SATURATION:.2f}")
+    if READY_MAX_QUEUE_DEPTH > 0 and queue_depth >= READY_MAX_QUEUE_DEPTH:
+        reasons.append(f"queue depth {queue_depth} >= {READY_MAX_QUEUE_DEPTH}")
+    if (
+        READY_MAX_P95_SECONDS > 0
+        and p95 is not None
+        and len(latencies) >= READY_MIN_LATENCY_SAMPLES
+        and p95 >= READY_MAX_P95_SECONDS
+    ):
+        reasons.append(f"p95 latency {p95:.2f}s >= {READY_MAX_P95_SECONDS:.2f}s")
+
+    return ReadinessResponse(
+        status="not_ready" if reasons else "ready",
+        saturation=round(saturation, 3),
+        queue_depth=queue_depth,
+        active_workers=active_workers,
+        max_workers=max_workers,
+        p95_latency_seconds=round(p95, 4) if p95 is not None else None,
+        latency_samples=len(latencies),
+        reasons=reasons,
+    )
+
+
+@router.get(
+    "/health/ready",
+    response_model=ReadinessResponse,
+    summary="レディネスチェック",
+    description=(
+        "実行スレッドの飽和度・待機中の変換数・直近の変換レイテンシ（p95）を返します。"
+        "しきい値を超えている場合は503を返し、ロードバランサーに新しいリクエストの振り分けを止めさせます。"
+    ),
+    responses={
+        503: {"description": "変換処理の受付余力がありません", "model": ReadinessResponse},
+    },
+)
+async def readiness_check() -> JSONResponse:
+    """レディネスチェックエンドポイント
+
+    Returns:
+        JSONResponse: 判定結果（受付不可の場合はステータス503）
+    """
+    readiness = evaluate_readiness()
+    if readiness.status == "not_ready":
+        logger.warning("Readiness check failed: {}", ", ".join(readiness.reasons))
+    return JSONResponse(
+        status_code=200 if readiness.status == "ready" else 503,
+        content=readiness.model_dump(),
+    )
@@ -0,0 +1,26 @@
+"""メトリクスエンドポイント
+
+GET /metrics - Prometheus形式のメトリクスを返す
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import CONTENT_TYPE_LATEST, REGISTRY
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="メトリクス",
+    description="変換ステージごとの処理時間ヒストグラム、実行キューの状態、入出力バイト数、エラー数をPrometheus形式で返します。",
+)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus形式のメトリクスエンドポイント
+
+    Returns:
+        PlainTextResponse: Prometheusテキスト形式（0.0.4）のメトリクス
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
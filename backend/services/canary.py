@@ -0,0 +1,138 @@
+"""合成カナリア変換
+
+小さな画像を一定間隔で IconConverter の変換処理全体（decode / 背景透明化 / リサイズ / エンコード）に通し、
+その処理時間をSLO指標として公開します。ユーザーのリクエストがなくても、Pillow・numpy の性能退行や
+同居するプロセスによるCPUスロットリングを検出できます。
+
+カナリアはユーザー向けのスレッドプールやメトリクス（stage_duration 等）を使わず、
+専用のメトリクス（iconconv_canary_*）にだけ記録します。
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from core.logic import IconConverter
+from core.metrics import CANARY_DURATION, CANARY_FAILURES, CANARY_P99, CANARY_SLO_BREACHED, LatencyWindow
+
+# カナリア設定（環境変数で制御）
+# 実行間隔（秒、0以下で無効）
+CANARY_INTERVAL_SECONDS = float(os.getenv("CANARY_INTERVAL_SECONDS", "30"))
+# SLO指標（p99）の集計期間（秒）
+CANARY_WINDOW_SECONDS = float(os.getenv("CANARY_WINDOW_SECONDS", "300"))
+# p99の目標値（秒）
+CANARY_SLO_P99_SECONDS = float(os.getenv("CANARY_SLO_P99_SECONDS", "0.5"))
+
+# カナリア画像の一辺のピクセル数（ICOの最大サイズ256pxを生成できる最小の大きさ）
+_CANARY_SIZE = 256
+
+
+def _canary_png() -> bytes:
+    """単色背景にグラデーションの図形を描いたカナリア用PNGを生成"""
+    y, x = np.mgrid[0:_CANARY_SIZE, 0:_CANARY_SIZE]
+    pixels = np.full((_CANARY_SIZE, _CANARY_SIZE, 3), 255, dtype=np.uint8)
+    inside = (x - _CANARY_SIZE / 2) ** 2 + (y - _CANARY_SIZE / 2) ** 2 < (_CANARY_SIZE * 0.4) ** 2
+    pixels[inside, 0] = x[inside]
+    pixels[inside, 1] = y[inside]
+    pixels[inside, 2] = 128
+    buffer = BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class CanaryProbe:
+    """カナリア変換の実行とSLO指標の管理"""
+
+    def __init__(
+        self,
+        converter: IconConverter | None = None,
+        window_seconds: float = CANARY_WINDOW_SECONDS,
+        slo_p99_seconds: float = CANARY_SLO_P99_SECONDS,
+    ) -> None:
+        """CanaryProbeを初期化
+
+        Args:
+            converter: 変換に使う IconConverter（省略時は新規作成）
+            window_seconds: p99の集計期間（秒）
+            slo_p99_seconds: p99の目標値（秒）
+        """
+        self.converter = converter or IconConverter()
+        self.window = LatencyWindow(max_age=window_seconds)
+        self.slo_p99_seconds = slo_p99_seconds
+        self._image = _canary_png()
+        CANARY_P99.set_function(lambda: self.p99() or 0.0)
+        CANARY_SLO_BREACHED.set_function(lambda: float(self.slo_breached()))
+
+    def p99(self) -> float | None:
+        """集計期間内のカナリア変換のp99（秒）"""
+        return self.window.percentile(99)
+
+    def slo_breached(self) -> bool:
+        """p99が目標値を超えているか"""
+        p99 = self.p99()
+        return p99 is not None and p99 > self.slo_p99_seconds
+
+    def run_once(self) -> float:
+        """カナリア変換を1回実行（同期版）
+
+        Returns:
+            float: 変換の処理時間（秒）
+        """
+        # 定期実行のたびに成功ログが出ないよう、サンプリング対象外として扱う（失敗ログは出力される）
+        with logger.contextualize(sampled=False), tempfile.TemporaryDirectory(prefix="iconconv_canary_") as temp_dir:
+            input_path = Path(temp_dir) / "canary.png"
+            input_path.write_bytes(self._image)
+            start = time.perf_counter()
+            self.converter.convert_image_to_ico(
+                str(input_path),
+                str(Path(temp_dir) / "canary.ico"),
+                preserve_transparency=False,
+                auto_transparent_bg=True,
+            )
+            elapsed = time.perf_counter() - start
+
+        CANARY_DURATION.observe(elapsed)
+        self.window.observe(elapsed)
+        return elapsed
+
+    async def probe(self) -> float | None:
+        """カナリア変換を1回実行（非同期版）
+
+        ユーザー向けのスレッドプールを使わないよう、asyncio のデフォルトスレッドプールで実行する。
+
+        Returns:
+            float | None: 変換の処理時間（秒）。失敗した場合はNone
+        """
+        try:
+            elapsed = await asyncio.to_thread(self.run_once)
+        except Exception as e:
+            CANARY_FAILURES.inc()
+            logger.error("Canary conversion failed: {}", e)
+            return None
+
+        if self.slo_breached():
+            logger.warning(
+                "Canary p99 {:.3f}s exceeds SLO {:.3f}s (last run {:.3f}s)",
+                self.p99(),
+                self.slo_p99_seconds,
+                elapsed,
+            )
+        return elapsed
+
+    async def run_forever(self, interval: float = CANARY_INTERVAL_SECONDS) -> None:
+        """キャンセルされるまで一定間隔でカナリア変換を実行
+
+        Args:
+            interval: 実行間隔（秒）
+        """
+        logger.info("Canary probe started (interval={}s, slo_p99={}s)", interval, self.slo_p99_seconds)
+        while True:
+            await self.probe()
+            await asyncio.sleep(interval)
@@ -5,18 +5,65 @@
 """
 
 import asyncio
+import contextvars
+import functools
 import tempfile
-from concurrent.futures import ThreadPoolExecutor
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import BinaryIO
+from typing import Any, BinaryIO, TypeVar
 
 from loguru import logger
+from PIL import Image
 
+from core.ico import update_ico
 from core.logic import IconConverter
-from exceptions import ConversionFailedError
+from core.metrics import EXECUTOR_ACTIVE_WORKERS, EXECUTOR_MAX_WORKERS, EXECUTOR_QUEUE_DEPTH
+from core.profiling import run_profiled
+from core.stats import ConversionStats
+from core.tracing import record_span, span
+from core.utils import FRAME_FIRST
+from exceptions import ConversionFailedError, InvalidFileFormatError
+
+T = TypeVar("T")
+
+
+def _on_task_done(future: Future[Any]) -> None:
+    """実行前にキャンセルされたタスクをキュー待ち数から除外"""
+    if future.cancelled():
+        EXECUTOR_QUEUE_DEPTH.dec()
+
+
+class _InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """キュー待ち数と稼働ワーカー数をメトリクスに反映し、呼び出し元のコンテキストを引き継ぐスレッドプール"""
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        # 呼び出し元のコンテキスト（リクエストIDやログのサンプリング可否）をワーカースレッドに引き継ぐ
+        context = contextvars.copy_context()
+
+        def run() -> T:
+            EXECUTOR_QUEUE_DEPTH.dec()
+            EXECUTOR_ACTIVE_WORKERS.inc()
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                EXECUTOR_ACTIVE_WORKERS.dec()
+
+        EXECUTOR_QUEUE_DEPTH.inc()
+        try:
+            future = super().submit(run)
+        except BaseException:
+            EXECUTOR_QUEUE_DEPTH.dec()
+            raise
+        future.add_done_callback(_on_task_done)
+        return future
+
 
 # CPU集約的な処理用のスレッドプール（最大4ワーカー）
-_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="iconconv")
+_MAX_WORKERS = 4
+_executor = _InstrumentedThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="iconconv")
+EXECUTOR_MAX_WORKERS.set(_MAX_WORKERS)
 
 
 class ImageConversionService:
@@ -26,6 +73,9 @@ class ImageConversionService:
     - 一時ファイル管理（作成・削除）
     - 非同期変換処理
     - エラーハンドリングとログ記録
+
+    インスタンスは変換ごとの状態を持たない（一時ファイルと統計は呼び出しごとに作成する）ため、
+    ``routers.convert.conversion_service`` のように1つのインスタンスを全実行スレッドで共有できる。
     """
 
     def __init__(self):
@@ -33,6 +83,11 @@ class ImageConversionService:
         self.converter = IconConverter()
         logger.info("ImageConversionService initialized")
 
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """変換処理を実行するスレッドプール（全インスタンスで共有）"""
+        return _executor
+
     def _create_temp_file(self, suffix: str) -> Path:
         """一時ファイルを作成
 
@@ -46,7 +101,7 @@ class ImageConversionService:
         temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False, prefix="iconconv_")
         temp_file.close()
         temp_path = Path(temp_file.name)
-        logger.debug(f"Created temporary file: {temp_path}")
+        logger.debug("Created temporary file: {}", temp_path)
         return temp_path
 
     def _cleanup_temp_file(self, file_path: Path) -> None:
@@ -58,9 +113,9 @@ class ImageConversionService:
         try:
             if file_path.exists():
                 file_path.unlink()
-                logger.debug(f"Deleted temporary file: {file_path}")
+                logger.debug("Deleted temporary file: {}", file_path)
         except Exception as e:
-            logger.warning(f"Failed to delete temporary file {file_path}: {e}")
+            logger.warning("Failed to delete temporary file {}: {}", file_path, e)
 
     def _save_uploaded_file(self, file_content: BinaryIO, temp_path: Path) -> None:
         """アップロードされたファイルを一時ファイルに保存
@@ -79,9 +134,9 @@ class ImageConversionService:
                     if not chunk:
                         break
                     f.write(chunk)
-            logger.debug(f"Saved uploaded file to: {temp_path}")
+            logger.debug("Saved uploaded file to: {}", temp_path)
         except Exception as e:
-            logger.error(f"Failed to save uploaded file: {e}")
+            logger.error("Failed to save uploaded file: {}", e)
             raise ConversionFailedError(f"ファイルの保存に失敗しました: {str(e)}") from e
 
     def _read_ico_file(self, ico_path: Path) -> bytes:
@@ -97,7 +152,7 @@ class ImageConversionService:
             with open(ico_path, "rb") as f:
                 return f.read()
         except Exception as e:
-            logger.error(f"Failed to read ICO file: {e}")
+            logger.error("Failed to read ICO file: {}", e)
             raise ConversionFailedError(f"ICOファイルの読み込みに失敗しました: {str(e)}") from e
 
     def convert_to_ico(
@@ -106,6 +161,11 @@ class ImageConversionService:
         filename: str,
         preserve_transparency: bool = True,
         auto_transparent_bg: bool = False,
+        *,
+        stats: ConversionStats | None = None,
+        frame: int | str = FRAME_FIRST,
+        profile: str | None = None,
+        palettize: bool = False,
     ) -> bytes:
         """画像をICOファイルに変換（同期版）
 
@@ -114,6 +174,10 @@ class ImageConversionService:
             filename: 元のファイル名
             preserve_transparency: 透明化を保持するか
             auto_transparent_bg: 自動背景透明化を行うか
+            stats: ステージ別の処理時間を記録する変換統計（オプション）
+            frame: 複数フレームの画像で変換するフレーム（first / largest / インデックス）
+            profile: エンコードプロファイル（fast / balanced / small、省略時は既定のプロファイル）
+            palettize: 256色以下でアルファが0か255だけのサイズを8bitのパレット形式で格納するか
 
         Returns:
             bytes: 変換されたICOファイルのバイナリデータ
@@ -121,9 +185,8 @@ class ImageConversionService:
         Raises:
             ConversionFailedError: 変換処理が失敗した場合
         """
-        import time
-
-        start_time = time.time()
+        if stats is None:
+            stats = ConversionStats()
         input_temp_path = None
         output_temp_path = None
 
@@ -139,28 +202,34 @@ class ImageConversionService:
             self._save_uploaded_file(file_content, input_temp_path)
 
             logger.info(
-                f"Starting conversion: {filename} "
-                f"(preserve_transparency={preserve_transparency}, "
-                f"auto_transparent_bg={auto_transparent_bg})",
+                "Starting conversion: {} (preserve_transparency={}, auto_transparent_bg={})",
+                filename,
+                preserve_transparency,
+                auto_transparent_bg,
             )
 
-            # IconConverterで変換
-            conversion_start = time.time()
-            self.converter.convert_image_to_ico(
-                input_path=str(input_temp_path),
-                output_ico_path=str(output_temp_path),
-                preserve_transparency=preserve_transparency,
-                auto_transparent_bg=auto_transparent_bg,
-            )
-            conversion_time = time.time() - conversion_start
+            # IconConverterで変換（ステージ別の処理時間・CPU時間・メモリは stats に記録される）
+            with span("convert"), stats.measure_resources():
+                self.converter.convert_image_to_ico(
+                    input_path=str(input_temp_path),
+                    output_ico_path=str(output_temp_path),
+                    preserve_transparency=preserve_transparency,
+                    auto_transparent_bg=auto_transparent_bg,
+                    stats=stats,
+                    frame=frame,
+                    profile=profile,
+                    palettize=palettize,
+                )
 
             # 変換されたICOファイルを読み込み
             ico_data = self._read_ico_file(output_temp_path)
+            stats.output_bytes = len(ico_data)
 
-            total_time = time.time() - start_time
             logger.info(
-                f"Conversion completed successfully: {filename} -> ICO "
-                f"({len(ico_data)} bytes, conversion: {conversion_time:.3f}s, total: {total_time:.3f}s)",
+                "Conversion completed successfully: {} -> ICO ({} bytes, {})",
+                filename,
+                len(ico_data),
+                stats.server_timing(),
             )
 
             return ico_data
@@ -171,7 +240,7 @@ class ImageConversionService:
         except Exception as e:
             error_str = str(e)
             safe_error = error_str.encode("utf-8", errors="replace").decode("utf-8")
-            logger.error(f"Conversion failed for {filename}: {safe_error}")
+            logger.error("Conversion failed for {}: {}", filename, safe_error)
             raise ConversionFailedError(f"画像の変換に失敗しました: {safe_error}") from e
 
         finally:
@@ -187,6 +256,12 @@ class ImageConversionService:
         filename: str,
         preserve_transparency: bool = True,
         auto_transparent_bg: bool = False,
+        *,
+        stats: ConversionStats | None = None,
+        frame: int | str = FRAME_FIRST,
+        profile: str | None = None,
+        palettize: bool = False,
+        cprofile_id: str | None = None,
     ) -> bytes:
         """画像をICOファイルに変換（非同期版）
 
@@ -195,6 +270,11 @@ class ImageConversionService:
             filename: 元のファイル名
             preserve_transparency: 透明化を保持するか
             auto_transparent_bg: 自動背景透明化を行うか
+            stats: ステージ別の処理時間を記録する変換統計（オプション）
+            frame: 複数フレームの画像で変換するフレーム（first / largest / インデックス）
+            profile: エンコードプロファイル（fast / balanced / small、省略時は既定のプロファイル）
+            palettize: 256色以下でアルファが0か255だけのサイズを8bitのパレット形式で格納するか
+            cprofile_id: 指定した場合、変換処理を cProfile で計測しこのIDでプロファイルを保存する
 
         Returns:
             bytes: 変換されたICOファイルのバイナリデータ
@@ -202,13 +282,116 @@ class ImageConversionService:
         Raises:
             ConversionFailedError: 変換処理が失敗した場合
         """
+        if stats is None:
+            stats = ConversionStats()
+
         # CPU集約的な処理を専用スレッドプールで実行（パフォーマンス最適化）
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            _executor,
-            self.convert_to_ico,
-            file_content,
-            filename,
-            preserve_transparency,
-            auto_transparent_bg,
+        # 計測区間をこの変換の処理に合わせるため、ワーカースレッド側でラップする
+        # （Python 3.12以降の cProfile はプロセス全体を計測するため、同時に実行中の処理も含まれる）
+        convert = (
+            self.convert_to_ico
+            if cprofile_id is None
+            else functools.partial(run_profiled, cprofile_id, self.convert_to_ico)
         )
+        submitted = time.perf_counter()
+
+        def run() -> bytes:
+            # スレッドプールの空きを待った時間（処理時間と区別してキャパシティ計画に使う）
+            stats.queue_wait = time.perf_counter() - submitted
+            record_span("queue_wait", stats.queue_wait)
+            return convert(
+                file_content,
+                filename,
+                preserve_transparency=preserve_transparency,
+                auto_transparent_bg=auto_transparent_bg,
+                stats=stats,
+                frame=frame,
+                profile=profile,
+                palettize=palettize,
+            )
+
+        return await loop.run_in_executor(_executor, run)
+
+    def update_ico(
+        self,
+        ico_content: bytes,
+        replacements: Sequence[BinaryIO],
+        stats: ConversionStats | None = None,
+    ) -> bytes:
+        """既存のICOのうち差し替え画像と同じサイズの項目だけを更新（同期版）
+
+        差し替えない項目は圧縮済みのデータのままコピーするため、全サイズのデコード・再エンコードは行わない。
+
+        Args:
+            ico_content: 既存のICOファイルのバイナリデータ
+            replacements: 差し替える画像のバイナリストリーム（サイズごとに1枚）
+            stats: ステージ別の処理時間を記録する変換統計（オプション）
+
+        Returns:
+            bytes: 更新されたICOファイルのバイナリデータ
+
+        Raises:
+            InvalidFileFormatError: ICOや差し替え画像のサイズが不正な場合
+            ConversionFailedError: 更新処理が失敗した場合
+        """
+        if stats is None:
+            stats = ConversionStats()
+        try:
+            with span("convert"), stats.measure_resources():
+                with stats.measure("decode"):
+                    images = []
+                    for replacement in replacements:
+                        replacement.seek(0)
+                        with Image.open(replacement) as image:
+                            images.append(image.convert("RGBA"))
+                with stats.measure("encode"):
+                    ico_data = update_ico(ico_content, images)
+        except ValueError as e:
+            raise InvalidFileFormatError(f"ICOファイルを更新できません。（エラー詳細: {e}）") from e
+        except Exception as e:
+            error_str = str(e)
+            safe_error = error_str.encode("utf-8", errors="replace").decode("utf-8")
+            logger.error("ICO update failed: {}", safe_error)
+            raise ConversionFailedError(f"ICOファイルの更新に失敗しました: {safe_error}") from e
+
+        stats.output_bytes = len(ico_data)
+        logger.info(
+            "ICO update completed: {} sizes replaced ({} bytes, {})",
+            len(images),
+            len(ico_data),
+            stats.server_timing(),
+        )
+        return ico_data
+
+    async def update_ico_async(
+        self,
+        ico_content: bytes,
+        replacements: Sequence[BinaryIO],
+        stats: ConversionStats | None = None,
+    ) -> bytes:
+        """既存のICOのうち差し替え画像と同じサイズの項目だけを更新（非同期版）
+
+        Args:
+            ico_content: 既存のICOファイルのバイナリデータ
+            replacements: 差し替える画像のバイナリストリーム（サイズごとに1枚）
+            stats: ステージ別の処理時間を記録する変換統計（オプション）
+
+        Returns:
+            bytes: 更新されたICOファイルのバイナリデータ
+
+        Raises:
+            InvalidFileFormatError: ICOや差し替え画像のサイズが不正な場合
+            ConversionFailedError: 更新処理が失敗した場合
+        """
+        if stats is None:
+            stats = ConversionStats()
+        loop = asyncio.get_event_loop()
+        submitted = time.perf_counter()
+
+        def run() -> bytes:
+            stats.queue_wait = time.perf_counter() - submitted
+            record_span("queue_wait", stats.queue_wait)
+            return self.update_ico(ico_content, replacements, stats)
+
+        return await loop.run_in_executor(_executor, run)
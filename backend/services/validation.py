@@ -8,12 +8,18 @@ import os
 from pathlib import Path
 from typing import BinaryIO
 
-from PIL import Image
+from PIL import Image, TiffImagePlugin
 
+from core.config import MAX_ICON_EDGE
+from core.svg import get_renderer, parse_svg, renderer_available
+from core.tiff import verify_tiff
+from core.utils import FRAME_FIRST, frame_count, get_file_extension, select_frame
 from exceptions import FileSizeExceededError, InvalidFileFormatError
 
 # 定数
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # デフォルト: 10MB
+# 複数フレームの画像（アニメーションGIF・WebP、複数ページのTIFF）の最大フレーム数
+MAX_FRAMES = int(os.getenv("MAX_FRAMES", "1000"))
 ALLOWED_MIME_TYPES = {
     "image/png",
     "image/jpeg",
@@ -21,8 +27,33 @@ ALLOWED_MIME_TYPES = {
     "image/gif",
     "image/tiff",
     "image/webp",
+    "image/svg+xml",
+    "image/x-icon",
+    "image/vnd.microsoft.icon",
+    "image/icns",
+    "image/x-icns",
 }
-ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff", ".tif", ".webp"}
+ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff", ".tif", ".webp", ".svg", ".ico", ".icns"}
+# SVGレンダラーを利用できない環境では受け付けない拡張子・MIMEタイプ
+SVG_EXTENSIONS = {".svg"}
+SVG_MIME_TYPES = {"image/svg+xml"}
+# エラーメッセージに示す対応形式
+_FORMAT_NAMES = ("PNG", "JPEG", "BMP", "GIF", "TIFF", "WebP", "SVG", "ICO", "ICNS")
+# ICOの項目の差し替えに使える画像（そのサイズのまま格納するため、ラスター画像のみ）
+REPLACEMENT_EXTENSIONS = ALLOWED_EXTENSIONS - {".svg", ".ico", ".icns"}
+# 1回のICO更新で差し替えられる画像の最大数
+MAX_REPLACEMENTS = 16
+
+
+def allowed_extensions() -> set[str]:
+    """受け付ける拡張子（SVGレンダラーを利用できない環境ではSVGを除く）"""
+    return ALLOWED_EXTENSIONS if renderer_available() else ALLOWED_EXTENSIONS - SVG_EXTENSIONS
+
+
+def _format_names() -> str:
+    """エラーメッセージに示す対応形式（SVGレンダラーを利用できない環境ではSVGを除く）"""
+    svg_available = renderer_available()
+    return "、".join(name for name in _FORMAT_NAMES if name != "SVG" or svg_available)
 
 
 class ValidationService:
@@ -59,37 +90,59 @@ class ValidationService:
         """
         # 拡張子チェック
         file_extension = Path(filename).suffix.lower()
-        if file_extension not in ALLOWED_EXTENSIONS:
+        if file_extension not in allowed_extensions():
             raise InvalidFileFormatError(
                 f"サポートされていないファイル形式です（{file_extension}）。"
-                f"対応形式: PNG、JPEG、BMP、GIF、TIFF、WebP形式の画像をご使用ください。",
+                f"対応形式: {_format_names()}形式の画像をご使用ください。",
             )
 
         # MIMEタイプチェック（提供されている場合）
         if content_type:
-            if content_type not in ALLOWED_MIME_TYPES:
+            if content_type not in ALLOWED_MIME_TYPES or (content_type in SVG_MIME_TYPES and not renderer_available()):
                 raise InvalidFileFormatError(
-                    f"サポートされていないMIMEタイプです（{content_type}）。"
-                    f"PNG、JPEG、BMP、GIF、TIFF、WebP形式の画像をご使用ください。",
+                    f"サポートされていないMIMEタイプです（{content_type}）。{_format_names()}形式の画像をご使用ください。",
                 )
         else:
             # MIMEタイプが提供されていない場合は拡張子から推測
             guessed_type, _ = mimetypes.guess_type(filename)
             if guessed_type and guessed_type not in ALLOWED_MIME_TYPES:
                 raise InvalidFileFormatError(
-                    f"サポートされていないファイル形式です（{guessed_type}）。"
-                    f"PNG、JPEG、BMP、GIF、TIFF、WebP形式の画像をご使用ください。",
+                    f"サポートされていないファイル形式です（{guessed_type}）。{_format_names()}形式の画像をご使用ください。",
                 )
 
     @staticmethod
-    def validate_image_content(file_content: BinaryIO) -> None:
+    def validate_frames(image: Image.Image, frame: int | str = FRAME_FIRST) -> None:
+        """フレーム数と変換するフレームの指定を検証
+
+        ピクセルデータをデコードする前に呼び出し、フレーム数が極端に多い画像を早い段階で拒否する。
+
+        Args:
+            image: ``Image.open`` で開いた画像
+            frame: 変換するフレーム（first / largest / インデックス）
+
+        Raises:
+            InvalidFileFormatError: フレーム数が上限を超える、または指定したフレームが存在しない場合
+        """
+        count = frame_count(image)
+        if count > MAX_FRAMES:
+            raise InvalidFileFormatError(
+                f"フレーム数が多すぎます。最大{MAX_FRAMES}フレームまでです。（現在のフレーム数: {count}）",
+            )
+        if isinstance(frame, int) and frame >= count:
+            raise InvalidFileFormatError(
+                f"指定されたフレーム（{frame}）がありません。フレームは0〜{count - 1}で指定してください。",
+            )
+
+    @classmethod
+    def validate_image_content(cls, file_content: BinaryIO, frame: int | str = FRAME_FIRST) -> None:
         """画像ファイルの内容を検証（Pillowで実際に開けるか確認）
 
         Args:
             file_content: ファイルコンテンツ（バイナリストリーム）
+            frame: 変換するフレーム（first / largest / インデックス）
 
         Raises:
-            InvalidFileFormatError: 画像として開けない、または破損している場合
+            InvalidFileFormatError: 画像として開けない、破損している、またはフレームの指定が不正な場合
         """
         try:
             # ファイルポインタを先頭に戻す
@@ -103,13 +156,22 @@ class ValidationService:
             # verifyの後はファイルを再度開く必要があるため、ポインタを先頭に戻す
             file_content.seek(0)
 
-            # 実際に画像を読み込めるか確認
+            # フレーム数を確認してから、変換するフレームを実際に読み込めるか確認（そのフレームのみデコード）
             with Image.open(file_content) as img:
-                img.load()
+                cls.validate_frames(img, frame)
+                select_frame(img, frame)
+                if isinstance(img, TiffImagePlugin.TiffImageFile):
+                    # 大きなTIFFは変換と同じ縮小画像を選び、元の解像度の全画素を展開せずに確認する
+                    verify_tiff(img, MAX_ICON_EDGE)
+                else:
+                    img.load()
 
             # 検証後、ファイルポインタを先頭に戻す
             file_content.seek(0)
 
+        except InvalidFileFormatError:
+            file_content.seek(0)
+            raise
         except Exception as e:
             error_msg = str(e)
             raise InvalidFileFormatError(
@@ -117,6 +179,60 @@ class ValidationService:
                 f"別の画像ファイルをお試しください。（エラー詳細: {error_msg}）",
             ) from e
 
+    @staticmethod
+    def validate_svg_content(file_content: BinaryIO, frame: int | str = FRAME_FIRST) -> None:
+        """SVGファイルの内容を検証（外部実体・外部リソースを参照しないSVGか確認）
+
+        Args:
+            file_content: ファイルコンテンツ（バイナリストリーム）
+            frame: 変換するフレーム（SVGは先頭フレームのみ）
+
+        Raises:
+            InvalidFileFormatError: SVGとして読み込めない、安全でない参照を含む、またはSVGを変換できない場合
+        """
+        if isinstance(frame, int) and frame >= 1:
+            raise InvalidFileFormatError(
+                f"指定されたフレーム（{frame}）がありません。フレームは0〜0で指定してください。",
+            )
+        try:
+            get_renderer()
+        except RuntimeError as e:
+            raise InvalidFileFormatError(f"SVGファイルの変換は現在利用できません。（エラー詳細: {e}）") from e
+
+        try:
+            file_content.seek(0)
+            parse_svg(file_content.read())
+        except ValueError as e:
+            raise InvalidFileFormatError(
+                f"SVGファイルとして読み込めないか、安全でない参照を含んでいます。（エラー詳細: {e}）",
+            ) from e
+        finally:
+            file_content.seek(0)
+
+    @staticmethod
+    def validate_ico_update(filename: str, replacement_filenames: list[str]) -> None:
+        """ICO更新の対象ファイルと差し替え画像の組み合わせを検証
+
+        Args:
+            filename: 更新するICOのファイル名
+            replacement_filenames: 差し替える画像のファイル名
+
+        Raises:
+            InvalidFileFormatError: 更新対象がICOではない、または差し替え画像の形式・枚数が不正な場合
+        """
+        if get_file_extension(filename) != ".ico":
+            raise InvalidFileFormatError("更新できるのはICOファイルのみです。")
+        if not replacement_filenames:
+            raise InvalidFileFormatError("差し替える画像を1枚以上指定してください。")
+        if len(replacement_filenames) > MAX_REPLACEMENTS:
+            raise InvalidFileFormatError(f"差し替える画像が多すぎます。最大{MAX_REPLACEMENTS}枚までです。")
+        for name in replacement_filenames:
+            if get_file_extension(name) not in REPLACEMENT_EXTENSIONS:
+                raise InvalidFileFormatError(
+                    f"差し替える画像の形式が対応していません（{name}）。"
+                    f"PNG、JPEG、BMP、GIF、TIFF、WebP形式の画像をご使用ください。",
+                )
+
     @classmethod
     def validate_uploaded_file(
         cls,
@@ -124,6 +240,7 @@ class ValidationService:
         file_size: int,
         file_content: BinaryIO,
         content_type: str | None = None,
+        frame: int | str = FRAME_FIRST,
     ) -> None:
         """アップロードされたファイルを包括的に検証
 
@@ -132,6 +249,7 @@ class ValidationService:
             file_size: ファイルサイズ（バイト）
             file_content: ファイルコンテンツ（バイナリストリーム）
             content_type: MIMEタイプ（オプション）
+            frame: 変換するフレーム（first / largest / インデックス）
 
         Raises:
             FileSizeExceededError: ファイルサイズが制限を超えた場合
@@ -143,5 +261,8 @@ class ValidationService:
         # ファイル形式検証（拡張子とMIMEタイプ）
         cls.validate_file_format(filename, content_type)
 
-        # 画像内容検証（Pillowで実際に開けるか）
-        cls.validate_image_content(file_content)
+        # 画像内容検証（SVGは安全に描画できるか、それ以外はPillowで実際に開けるか）
+        if get_file_extension(filename) == ".svg":
+            cls.validate_svg_content(file_content, frame)
+        else:
+            cls.validate_image_content(file_content, frame)
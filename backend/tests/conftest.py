@@ -1,6 +1,7 @@
 """Pytest configuration and fixtures for backend tests."""
 
 import io
+from collections.abc import Iterator
 
 import pytest
 from PIL import Image
@@ -68,6 +69,24 @@ def invalid_file_bytes() -> bytes:
     return b"This is not an image file"
 
 
+@pytest.fixture
+def corrupt_second_page_tiff_bytes() -> bytes:
+    """2ページ目の画素データだけが破損した2ページのTIFFを生成するフィクスチャ
+
+    Returns:
+        bytes: 1ページ目は読み込め、2ページ目はデコードに失敗するTIFF形式の画像データ
+    """
+    pages = [Image.new("RGB", (64, 64), (255, 0, 0)), Image.new("RGB", (64, 64), (0, 255, 0))]
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="TIFF", save_all=True, append_images=pages[1:], compression="tiff_lzw")
+    data = bytearray(buffer.getvalue())
+    with Image.open(io.BytesIO(bytes(data))) as image:
+        image.seek(1)
+        offset, count = image.tag_v2[273][0], image.tag_v2[279][0]
+    data[offset : offset + count] = b"\xff" * count
+    return bytes(data)
+
+
 @pytest.fixture
 def large_file_bytes() -> bytes:
     """大きなファイルデータを生成するフィクスチャ（11MB）
@@ -76,3 +95,44 @@ def large_file_bytes() -> bytes:
         bytes: 11MBのバイナリデータ
     """
     return b"x" * (11 * 1024 * 1024)
+
+
+@pytest.fixture
+def sample_svg_bytes() -> bytes:
+    """SVG画像のバイナリデータを生成するフィクスチャ
+
+    Returns:
+        bytes: 横長（2:1）のSVGデータ
+    """
+    return (
+        b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 200 100">'
+        b'<rect width="200" height="100" fill="#ff0000"/></svg>'
+    )
+
+
+class _SolidSvgRenderer:
+    """要求されたサイズの単色画像を返すテスト用のSVGレンダラー"""
+
+    def __init__(self) -> None:
+        self.sizes: list[tuple[int, int]] = []
+
+    def render(self, data: bytes, size: tuple[int, int]) -> Image.Image:
+        self.sizes.append(size)
+        return Image.new("RGBA", size, (255, 0, 0, 255))
+
+
+@pytest.fixture
+def svg_renderer(monkeypatch) -> Iterator[_SolidSvgRenderer]:
+    """テスト用のSVGレンダラーを登録して既定のレンダラーにするフィクスチャ
+
+    Yields:
+        _SolidSvgRenderer: 描画したサイズを記録するレンダラー
+    """
+    from core import svg
+
+    renderer = _SolidSvgRenderer()
+    svg.register_renderer("test", lambda: renderer)
+    monkeypatch.setattr(svg, "SVG_RENDERER", "test")
+    yield renderer
+    svg._RENDERERS.pop("test", None)
+    svg._instances.pop("test", None)
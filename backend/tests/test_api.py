@@ -3,11 +3,14 @@
 import io
 import os
 
+import pytest
 from fastapi.testclient import TestClient
+from PIL import Image
 
 # テスト環境であることを示す環境変数を設定（レート制限を無効化）
 os.environ["TESTING"] = "true"
 
+from core.metrics import EXECUTOR_QUEUE_DEPTH, RECENT_LATENCY
 from main import app
 
 client = TestClient(app)
@@ -37,6 +40,69 @@ class TestHealthEndpoint:
         assert isinstance(data["version"], str)
 
 
+class TestReadinessEndpoints:
+    """ライブネス・レディネスチェックのテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def _reset_latency(self):
+        """直近のレイテンシを他のテストの影響から切り離す"""
+        RECENT_LATENCY.clear()
+        yield
+        RECENT_LATENCY.clear()
+
+    def test_liveness(self):
+        """ライブネスチェックのテスト"""
+        response = client.get("/api/health/live")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+
+    def test_ready_when_idle(self):
+        """待機中の変換がない場合のレディネスチェックのテスト"""
+        response = client.get("/api/health/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["queue_depth"] == 0
+        assert data["max_workers"] > 0
+        assert data["p95_latency_seconds"] is None
+        assert data["reasons"] == []
+
+    def test_not_ready_when_queue_is_deep(self):
+        """待機中の変換数がしきい値を超えた場合に503を返すテスト"""
+        EXECUTOR_QUEUE_DEPTH.inc(100)
+        try:
+            response = client.get("/api/health/ready")
+        finally:
+            EXECUTOR_QUEUE_DEPTH.dec(100)
+
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "not_ready"
+        assert data["queue_depth"] == 100
+        assert any("queue depth" in reason for reason in data["reasons"])
+        assert any("saturation" in reason for reason in data["reasons"])
+
+    def test_not_ready_when_p95_is_slow(self):
+        """直近のp95がしきい値を超えた場合に503を返すテスト"""
+        for _ in range(10):
+            RECENT_LATENCY.observe(60.0)
+
+        response = client.get("/api/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["p95_latency_seconds"] == 60.0
+
+    def test_convert_records_recent_latency(self, sample_png_bytes):
+        """変換成功時に直近のレイテンシが記録されるテスト"""
+        client.post("/api/convert", files={"file": ("test.png", io.BytesIO(sample_png_bytes), "image/png")})
+
+        data = client.get("/api/health/ready").json()
+        assert data["latency_samples"] == 1
+        assert data["p95_latency_seconds"] > 0
+
+
 class TestConvertEndpoint:
     """画像変換エンドポイントのテストクラス"""
 
@@ -135,6 +201,27 @@ class TestConvertEndpoint:
         ico_data = response.content
         assert ico_data[:4] == b"\x00\x00\x01\x00"
 
+    def test_convert_svg_success(self, sample_svg_bytes, svg_renderer):
+        """SVG画像が各アイコンサイズで直接ラスタライズされる変換テスト"""
+        files = {"file": ("logo.svg", io.BytesIO(sample_svg_bytes), "image/svg+xml")}
+
+        response = client.post("/api/convert", files=files)
+
+        assert response.status_code == 200
+        assert "logo.ico" in response.headers["content-disposition"]
+        assert response.content[:4] == b"\x00\x00\x01\x00"
+        assert (256, 128) in svg_renderer.sizes
+
+    def test_convert_svg_external_reference(self, svg_renderer):
+        """外部リソースを参照するSVGが拒否されるテスト"""
+        data = b'<svg xmlns="http://www.w3.org/2000/svg"><image href="http://example.com/a.png"/></svg>'
+        files = {"file": ("evil.svg", io.BytesIO(data), "image/svg+xml")}
+
+        response = client.post("/api/convert", files=files)
+
+        assert response.status_code == 415
+        assert svg_renderer.sizes == []
+
     def test_convert_invalid_file_format(self, invalid_file_bytes):
         """無効なファイル形式のエラーテスト"""
         files = {"file": ("test.txt", io.BytesIO(invalid_file_bytes), "text/plain")}
@@ -215,6 +302,18 @@ class TestConvertEndpoint:
         content_length = int(response.headers["content-length"])
         assert content_length == len(response.content)
 
+    def test_convert_server_timing_header(self, sample_png_bytes):
+        """Server-Timingヘッダーにステージ別の処理時間が含まれることのテスト"""
+        files = {"file": ("timing.png", io.BytesIO(sample_png_bytes), "image/png")}
+
+        response = client.post("/api/convert", files=files)
+
+        assert response.status_code == 200
+        entries = [entry.strip() for entry in response.headers["server-timing"].split(",")]
+        names = [entry.split(";")[0] for entry in entries]
+        assert names == ["read", "validate", "decode", "resize", "encode", "total"]
+        assert all(";dur=" in entry for entry in entries)
+
     def test_convert_filename_without_extension(self, sample_png_bytes):
         """拡張子なしのファイル名の変換テスト"""
         files = {"file": ("image", io.BytesIO(sample_png_bytes), "image/png")}
@@ -230,6 +329,70 @@ class TestConvertEndpoint:
         data = response.json()
         assert "サポートされていないファイル形式です" in data["detail"]
 
+    def test_convert_animated_gif_frame(self):
+        """アニメーションGIFの指定フレームを変換するテスト"""
+        frames = [Image.new("RGB", (64, 64), color) for color in ((255, 0, 0), (0, 0, 255))]
+        buffer = io.BytesIO()
+        frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:])
+        files = {"file": ("anim.gif", io.BytesIO(buffer.getvalue()), "image/gif")}
+
+        response = client.post("/api/convert", files=files, data={"frame": "1"})
+
+        assert response.status_code == 200
+        icon = Image.open(io.BytesIO(response.content))
+        assert icon.convert("RGB").getpixel((0, 0)) == (0, 0, 255)
+
+        response = client.post("/api/convert", files=files, data={"frame": "2"})
+        assert response.status_code == 415
+
+    def test_convert_corrupt_selected_frame(self, corrupt_second_page_tiff_bytes):
+        """指定したフレームが破損している場合は変換エラーではなくバリデーションエラーになるテスト"""
+        files = {"file": ("pages.tiff", io.BytesIO(corrupt_second_page_tiff_bytes), "image/tiff")}
+
+        assert client.post("/api/convert", files=files, data={"frame": "0"}).status_code == 200
+        response = client.post("/api/convert", files=files, data={"frame": "1"})
+
+        assert response.status_code == 415
+        assert "画像ファイルとして読み込めません" in response.json()["detail"]
+
+    def test_convert_invalid_frame_option(self, sample_png_bytes):
+        """不正なフレーム指定のテスト"""
+        files = {"file": ("test.png", io.BytesIO(sample_png_bytes), "image/png")}
+
+        response = client.post("/api/convert", files=files, data={"frame": "last"})
+
+        assert response.status_code == 422
+
+    def test_convert_encoding_profile(self, sample_png_bytes):
+        """エンコードプロファイルを指定した変換テスト"""
+        files = {"file": ("test.png", io.BytesIO(sample_png_bytes), "image/png")}
+
+        response = client.post("/api/convert", files=files, data={"profile": "fast"})
+
+        assert response.status_code == 200
+        assert response.content[:4] == b"\x00\x00\x01\x00"
+
+        files = {"file": ("test.png", io.BytesIO(sample_png_bytes), "image/png")}
+        response = client.post("/api/convert", files=files, data={"profile": "tiny"})
+        assert response.status_code == 422
+
+    def test_convert_palettize(self):
+        """パレット化した場合に削減量がレスポンスヘッダーで返されるテスト"""
+        image = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+        image.paste((255, 0, 0, 255), (8, 8, 56, 56))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        files = {"file": ("flat.png", io.BytesIO(buffer.getvalue()), "image/png")}
+
+        response = client.post("/api/convert", files=files, data={"palettize": "true"})
+
+        assert response.status_code == 200
+        assert response.headers["X-Palette-Savings"].startswith("entries=")
+
+        files = {"file": ("flat.png", io.BytesIO(buffer.getvalue()), "image/png")}
+        response = client.post("/api/convert", files=files)
+        assert "X-Palette-Savings" not in response.headers
+
     def test_convert_multiple_requests(self, sample_png_bytes, sample_jpeg_bytes):
         """複数リクエストの連続実行テスト"""
         # 1回目: PNG
@@ -247,6 +410,114 @@ class TestConvertEndpoint:
         assert response2.content[:4] == b"\x00\x00\x01\x00"
 
 
+class TestUpdateIcoEndpoint:
+    """ICO更新エンドポイントのテストクラス"""
+
+    def _ico(self) -> bytes:
+        buffer = io.BytesIO()
+        image = Image.new("RGBA", (256, 256), (255, 0, 0, 255))
+        image.save(buffer, format="ICO", sizes=[(16, 16), (32, 32), (256, 256)])
+        return buffer.getvalue()
+
+    def _png(self, size: int) -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGBA", (size, size), (0, 0, 255, 255)).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_update_success(self):
+        """指定したサイズの項目だけが差し替えられるテスト"""
+        original = self._ico()
+        files = [
+            ("file", ("app.ico", io.BytesIO(original), "image/x-icon")),
+            ("replacements", ("16.png", io.BytesIO(self._png(16)), "image/png")),
+        ]
+
+        response = client.post("/api/ico/update", files=files)
+
+        assert response.status_code == 200
+        assert "app.ico" in response.headers["content-disposition"]
+        assert "Server-Timing" in response.headers
+        icon = Image.open(io.BytesIO(response.content))
+        assert icon.info["sizes"] == {(16, 16), (32, 32), (256, 256)}
+        icon.size = (16, 16)
+        assert icon.convert("RGB").getpixel((0, 0)) == (0, 0, 255)
+        icon.size = (256, 256)
+        assert icon.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+
+    def test_update_requires_ico(self):
+        """ICO以外のファイルは更新できないテスト"""
+        files = [
+            ("file", ("app.png", io.BytesIO(self._png(32)), "image/png")),
+            ("replacements", ("16.png", io.BytesIO(self._png(16)), "image/png")),
+        ]
+
+        response = client.post("/api/ico/update", files=files)
+
+        assert response.status_code == 415
+
+    def test_update_oversized_replacement(self):
+        """256pxを超える差し替え画像が拒否されるテスト"""
+        files = [
+            ("file", ("app.ico", io.BytesIO(self._ico()), "image/x-icon")),
+            ("replacements", ("512.png", io.BytesIO(self._png(512)), "image/png")),
+        ]
+
+        response = client.post("/api/ico/update", files=files)
+
+        assert response.status_code == 415
+        assert response.json()["error_code"] == "INVALID_FORMAT"
+
+    def test_update_unexpected_error(self, monkeypatch):
+        """予期しない例外が変換エラーの形式のレスポンスになるテスト"""
+        from routers import convert
+
+        async def fail(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(convert.conversion_service, "update_ico_async", fail)
+        files = [
+            ("file", ("app.ico", io.BytesIO(self._ico()), "image/x-icon")),
+            ("replacements", ("16.png", io.BytesIO(self._png(16)), "image/png")),
+        ]
+
+        response = client.post("/api/ico/update", files=files)
+
+        assert response.status_code == 500
+        assert response.json()["error_code"] == "CONVERSION_FAILED"
+        assert "ICOの更新に失敗しました" in response.json()["detail"]
+
+
+class TestMetricsEndpoint:
+    """メトリクスエンドポイントのテストクラス"""
+
+    def test_metrics_after_conversion(self, sample_png_bytes):
+        """変換後にステージ別ヒストグラムが出力されることのテスト"""
+        files = {"file": ("metrics.png", io.BytesIO(sample_png_bytes), "image/png")}
+        assert client.post("/api/convert", files=files).status_code == 200
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        for stage in ("read", "validate", "decode", "resize", "encode", "total"):
+            labels = f'stage="{stage}",format="png",size_bucket="lt_100k"'
+            assert f"iconconv_stage_duration_seconds_count{{{labels}}}" in body
+        assert 'iconconv_input_bytes_total{format="png"}' in body
+        assert "iconconv_executor_queue_depth 0" in body
+        assert "iconconv_executor_active_workers 0" in body
+        assert "iconconv_executor_max_workers 4" in body
+
+    def test_metrics_error_counter(self, invalid_file_bytes):
+        """エラーコード別カウンターのテスト"""
+        files = {"file": ("test.txt", io.BytesIO(invalid_file_bytes), "text/plain")}
+        assert client.post("/api/convert", files=files).status_code == 415
+
+        body = client.get("/metrics").text
+
+        assert 'iconconv_errors_total{error_code="INVALID_FORMAT"}' in body
+
+
 class TestRootEndpoint:
     """ルートエンドポイントのテストクラス"""
 
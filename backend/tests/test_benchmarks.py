@@ -0,0 +1,206 @@
+"""benchmarksパッケージのユニットテスト"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.__main__ import main  # noqa: E402
+from benchmarks.color import iter_color_benchmarks  # noqa: E402
+from benchmarks.frames import iter_frame_benchmarks  # noqa: E402
+from benchmarks.modes import MODES, iter_mode_benchmarks  # noqa: E402
+from benchmarks.parallel import iter_key_benchmarks, iter_parallel_benchmarks  # noqa: E402
+from benchmarks.profiles import format_profile_table, iter_profile_benchmarks  # noqa: E402
+from benchmarks.runner import (  # noqa: E402
+    Benchmark,
+    build_report,
+    compare_reports,
+    load_report,
+    measure,
+    save_report,
+)
+from benchmarks.stages import STAGES, iter_stage_benchmarks  # noqa: E402
+from benchmarks.threads import format_thread_table, iter_thread_benchmarks  # noqa: E402
+
+
+def _report(**medians: float) -> dict:
+    """比較テスト用の最小レポートを作成"""
+    return {
+        "version": 1,
+        "results": {name: {"min": value, "median": value, "mean": value} for name, value in medians.items()},
+    }
+
+
+class TestRunner:
+    """計測・保存・比較のテストクラス"""
+
+    def test_measure_respects_min_rounds(self):
+        """最小ラウンド数とsetupの呼び出しのテスト"""
+        calls = []
+        benchmark = Benchmark("noop", lambda: (1,), calls.append)
+
+        result = measure(benchmark, min_time=0.0, min_rounds=5, warmup=2)
+
+        assert result.rounds == 5
+        assert len(calls) == 7
+        assert 0 <= result.min <= result.median
+
+    def test_save_and_load_report(self, tmp_path):
+        """レポートのJSON保存と読み込みのテスト"""
+        result = measure(Benchmark("noop", tuple, lambda: None, {"stage": "decode"}), min_time=0.0)
+        path = tmp_path / "nested" / "result.json"
+
+        save_report(build_report([result]), path)
+        report = load_report(path)
+
+        assert report["results"]["noop"]["params"] == {"stage": "decode"}
+        assert "pillow" in report["machine"]
+
+    def test_load_report_version_mismatch(self, tmp_path):
+        """未対応バージョンの結果ファイルのテスト"""
+        path = tmp_path / "old.json"
+        path.write_text('{"version": 0, "results": {}}', encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            load_report(path)
+
+    def test_compare_flags_regression(self):
+        """しきい値を超えた退行の検出テスト"""
+        comparisons = compare_reports(
+            _report(a=1.0, b=1.0, removed=1.0),
+            _report(a=1.05, b=1.5, added=1.0),
+            threshold=0.1,
+        )
+
+        assert [item.name for item in comparisons] == ["a", "b"]
+        assert not comparisons[0].regressed
+        assert comparisons[1].regressed
+
+    def test_compare_min_delta(self):
+        """計測誤差レベルの差を無視するテスト"""
+        comparisons = compare_reports(_report(a=0.0001), _report(a=0.0002), threshold=0.1, min_delta=0.001)
+
+        assert not comparisons[0].regressed
+
+
+class TestStageBenchmarks:
+    """ステージ別ベンチマーク定義のテストクラス"""
+
+    def test_all_stages_runnable(self):
+        """全ステージのベンチマークが実行できることのテスト"""
+        benchmarks = list(iter_stage_benchmarks(formats=["png", "gif"], sizes=[64]))
+
+        assert len(benchmarks) == 2 * len(STAGES)
+        for benchmark in benchmarks:
+            benchmark.func(*benchmark.setup())
+            assert benchmark.params["size"] == 64
+
+    def test_cli_run_and_compare(self, tmp_path):
+        """CLIでの実行と比較のテスト"""
+        output = tmp_path / "latest.json"
+        args = ["run", "--formats", "png", "--sizes", "64", "--stages", "decode", "--min-time", "0"]
+
+        assert main([*args, "--output", str(output)]) == 0
+        assert main(["compare", str(output), str(output)]) == 0
+
+
+class TestFrameBenchmarks:
+    """フレーム選択ベンチマーク定義のテストクラス"""
+
+    def test_all_runnable(self):
+        """全フレーム選択のベンチマークが実行できることのテスト"""
+        benchmarks = list(iter_frame_benchmarks(formats=["gif", "tiff"], size=32, frames=3))
+
+        assert [benchmark.name for benchmark in benchmarks[:4]] == [
+            "count_frames[gif-32x3]",
+            "decode_frame[gif-32x3-first]",
+            "decode_frame[gif-32x3-largest]",
+            "decode_frame[gif-32x3-last]",
+        ]
+        assert benchmarks[0].func(*benchmarks[0].setup()) == 3
+        for benchmark in benchmarks[1:]:
+            benchmark.func(*benchmark.setup())
+
+
+class TestProfileBenchmarks:
+    """エンコードプロファイルベンチマーク定義のテストクラス"""
+
+    def test_all_runnable(self):
+        """全プロファイルのベンチマークが実行でき、出力サイズが記録されることのテスト"""
+        benchmarks = list(iter_profile_benchmarks(kinds=["logo"], size=64))
+
+        assert [benchmark.name for benchmark in benchmarks] == [
+            "encode_profile[logo-fast]",
+            "encode_profile[logo-balanced]",
+            "encode_profile[logo-small]",
+        ]
+        for benchmark in benchmarks:
+            assert len(benchmark.func(*benchmark.setup())) == benchmark.params["output_bytes"]
+        table = format_profile_table([measure(benchmarks[0], min_time=0.0)])
+        assert "encode_profile[logo-fast]" in table
+
+
+class TestColorBenchmarks:
+    """ICC色変換ベンチマーク定義のテストクラス"""
+
+    def test_all_runnable(self):
+        """cold・warmのベンチマークが実行でき、sRGBに変換されることのテスト"""
+        benchmarks = list(iter_color_benchmarks(sizes=[32], modes=["RGB"]))
+
+        assert [benchmark.name for benchmark in benchmarks] == ["icc_cold[rgb-32]", "icc_warm[rgb-32]"]
+        for benchmark in benchmarks:
+            assert "icc_profile" not in benchmark.func(*benchmark.setup()).info
+
+
+class TestModeBenchmarks:
+    """入力モード別ベンチマーク定義のテストクラス"""
+
+    def test_all_runnable(self):
+        """全モードのベンチマークが実行でき、同じサイズのRGBA画像を生成することのテスト"""
+        benchmarks = list(iter_mode_benchmarks(size=32))
+
+        assert len(benchmarks) == 2 * len(MODES)
+        assert benchmarks[0].name == "prepare[rgb-32]"
+        for prepare, convert_first in zip(benchmarks[::2], benchmarks[1::2], strict=True):
+            frames = prepare.func(*prepare.setup())
+            expected = convert_first.func(*convert_first.setup())
+            assert [frame.size for frame in frames] == [frame.size for frame in expected]
+            assert all(frame.mode == "RGBA" for frame in frames)
+
+
+class TestThreadBenchmarks:
+    """スレッド数別ベンチマーク定義のテストクラス"""
+
+    def test_all_runnable(self):
+        """スレッド数ごとのベンチマークが実行でき、倍率付きの表に整形されることのテスト"""
+        benchmarks = list(iter_thread_benchmarks(threads=[1, 2], size=32, conversions=2))
+
+        assert [benchmark.params["threads"] for benchmark in benchmarks] == [1, 2]
+        results = [measure(benchmark, min_time=0.0, min_rounds=1, max_rounds=1, warmup=0) for benchmark in benchmarks]
+        table = format_thread_table(results)
+        assert "1.00x" in table
+        assert "convert_threads[photo-png-32-t2]" in table
+
+
+class TestParallelBenchmarks:
+    """サイズごとの並列処理のベンチマーク定義のテストクラス"""
+
+    def test_all_runnable(self):
+        """上限ごとのベンチマークが実行でき、同じICOを出力することのテスト"""
+        benchmarks = list(iter_parallel_benchmarks(limits=[1, 4], size=64))
+
+        assert [benchmark.name for benchmark in benchmarks] == ["fan_out[balanced-64-p1]", "fan_out[balanced-64-p4]"]
+        outputs = [benchmark.func(*benchmark.setup()) for benchmark in benchmarks]
+        assert all(output[:4] == b"\x00\x00\x01\x00" for output in outputs)
+
+    def test_key_runnable(self):
+        """背景色の透明化のベンチマークが実行でき、上限によらず同じピクセル数を透明にすることのテスト"""
+        benchmarks = list(iter_key_benchmarks(limits=[1, 4], size=64))
+
+        assert [benchmark.name for benchmark in benchmarks] == ["key_tiles[64-p1]", "key_tiles[64-p4]"]
+        keyed = [benchmark.func(*benchmark.setup()) for benchmark in benchmarks]
+        assert keyed[0] == keyed[1] >= 64 * 32
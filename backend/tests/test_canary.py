@@ -0,0 +1,101 @@
+"""合成カナリア変換のユニットテスト"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# テスト環境を設定（レート制限を無効化）
+os.environ["TESTING"] = "true"
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core.metrics import (  # noqa: E402
+    CANARY_DURATION,
+    CANARY_FAILURES,
+    CANARY_P99,
+    CANARY_SLO_BREACHED,
+    EXECUTOR_QUEUE_DEPTH,
+    STAGE_DURATION,
+)
+from main import app  # noqa: E402
+from services.canary import CanaryProbe  # noqa: E402
+
+
+@pytest.fixture
+def probe():
+    """カナリアを作成"""
+    return CanaryProbe(slo_p99_seconds=10.0)
+
+
+def _stage_samples() -> list[str]:
+    """ユーザー向けステージ別ヒストグラムの出力"""
+    return STAGE_DURATION.collect()
+
+
+class TestCanaryProbe:
+    """CanaryProbeのテストクラス"""
+
+    def test_run_once_records_latency(self, probe):
+        """カナリア変換の処理時間が記録されるテスト"""
+        before = sum(CANARY_DURATION._default_child().snapshot()[0])
+
+        elapsed = probe.run_once()
+
+        assert elapsed > 0
+        assert probe.p99() == elapsed
+        assert sum(CANARY_DURATION._default_child().snapshot()[0]) == before + 1
+        assert CANARY_P99.get() == elapsed
+
+    def test_excluded_from_user_metrics(self, probe):
+        """カナリア変換がユーザー向けメトリクスに記録されないテスト"""
+        before = _stage_samples()
+
+        asyncio.run(probe.probe())
+
+        assert _stage_samples() == before
+        assert EXECUTOR_QUEUE_DEPTH.get() == 0
+
+    def test_slo_breached(self, probe):
+        """p99が目標値を超えた場合のテスト"""
+        assert probe.slo_breached() is False
+
+        probe.slo_p99_seconds = 0.0
+        probe.run_once()
+
+        assert probe.slo_breached() is True
+        assert CANARY_SLO_BREACHED.get() == 1.0
+
+    def test_failure_is_counted(self, probe, monkeypatch):
+        """変換失敗時に失敗数が加算され、処理時間は記録されないテスト"""
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(probe.converter, "convert_image_to_ico", fail)
+        before = CANARY_FAILURES._default_child().get()
+
+        assert asyncio.run(probe.probe()) is None
+        assert CANARY_FAILURES._default_child().get() == before + 1
+        assert probe.p99() is None
+
+
+class TestCanaryLifespan:
+    """アプリケーション起動時のカナリア実行のテストクラス"""
+
+    def test_canary_runs_on_startup(self):
+        """起動時にカナリア変換が実行されるテスト"""
+        before = sum(CANARY_DURATION._default_child().snapshot()[0])
+
+        with TestClient(app):
+            deadline = time.monotonic() + 10
+            while sum(CANARY_DURATION._default_child().snapshot()[0]) == before and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+        assert sum(CANARY_DURATION._default_child().snapshot()[0]) > before
@@ -0,0 +1,170 @@
+"""core/color.pyのユニットテスト"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageCms
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.color import adobe_rgb_profile, rgb_profile  # noqa: E402
+from core import color  # noqa: E402
+from core.logic import IconConverter  # noqa: E402
+from core.stats import ConversionStats  # noqa: E402
+
+
+def _srgb_profile() -> bytes:
+    return ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+
+def _tagged(mode: str, icc_profile: bytes, color_value=(100, 150, 200)) -> Image.Image:
+    image = Image.new(mode, (8, 8), color_value)
+    image.info["icc_profile"] = icc_profile
+    return image
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    color.transform_cache.clear()
+    yield
+    color.transform_cache.clear()
+
+
+class TestConvertToSrgb:
+    """sRGBへの変換のテストクラス"""
+
+    def test_adobe_rgb_converted(self):
+        """Adobe RGBの画像の色がsRGBに変換され、ICCプロファイルが取り除かれるテスト"""
+        image = _tagged("RGB", adobe_rgb_profile())
+        image.info["dpi"] = (72, 72)
+
+        converted = color.convert_to_srgb(image)
+
+        assert converted.mode == "RGB"
+        assert converted.getpixel((0, 0)) != (100, 150, 200)
+        assert "icc_profile" not in converted.info
+        assert converted.info["dpi"] == (72, 72)
+
+    def test_rgba_keeps_alpha(self):
+        """RGBAの画像はアルファを保ったまま変換されるテスト"""
+        converted = color.convert_to_srgb(_tagged("RGBA", adobe_rgb_profile(), (100, 150, 200, 128)))
+
+        assert converted.mode == "RGBA"
+        assert converted.getpixel((0, 0))[3] == 128
+
+    def test_mismatched_profile_unchanged(self):
+        """モードと合わないプロファイル（CMYKの画像にRGBのプロファイル）ではそのまま返されるテスト"""
+        image = _tagged("CMYK", adobe_rgb_profile(), (10, 20, 30, 40))
+
+        assert color.convert_to_srgb(image) is image
+
+    @pytest.mark.parametrize("icc_profile", [b"", b"not an icc profile"])
+    def test_missing_or_invalid_profile_unchanged(self, icc_profile):
+        """ICCプロファイルがない、または読み込めない場合はそのまま返されるテスト"""
+        image = _tagged("RGB", icc_profile)
+
+        assert color.convert_to_srgb(image) is image
+
+    def test_srgb_profile_unchanged(self):
+        """sRGBのプロファイルの画像は変換されないテスト"""
+        image = _tagged("RGB", _srgb_profile())
+
+        assert color.convert_to_srgb(image) is image
+
+    def test_unsupported_mode_unchanged(self):
+        """対象外のモードの画像は変換されないテスト"""
+        image = _tagged("L", adobe_rgb_profile(), 100)
+
+        assert not color.has_icc_profile(image)
+        assert color.convert_to_srgb(image) is image
+
+
+class TestTransformCache:
+    """ICC変換のキャッシュのテストクラス"""
+
+    def test_transform_reused(self, monkeypatch):
+        """同じプロファイルとモードでは変換が1回だけ作成されるテスト"""
+        built = []
+        original = color._build_transform
+        monkeypatch.setattr(color, "_build_transform", lambda data, mode: built.append(mode) or original(data, mode))
+
+        first = color.convert_to_srgb(_tagged("RGB", adobe_rgb_profile()))
+        second = color.convert_to_srgb(_tagged("RGB", adobe_rgb_profile()))
+        color.convert_to_srgb(_tagged("RGBA", adobe_rgb_profile(), (1, 2, 3, 4)))
+
+        assert built == ["RGB", "RGBA"]
+        assert len(color.transform_cache) == 2
+        assert first.tobytes() == second.tobytes()
+
+    def test_lru_eviction(self):
+        """上限を超えると最も長く使われていない変換が破棄されるテスト"""
+        cache = color.TransformCache(maxsize=2)
+        profiles = [rgb_profile(f"Test {gamma}", gamma=gamma) for gamma in (1.8, 2.0, 2.4)]
+
+        first = cache.get(profiles[0], "RGB")
+        cache.get(profiles[1], "RGB")
+        assert cache.get(profiles[0], "RGB") is first
+        cache.get(profiles[2], "RGB")
+
+        assert len(cache) == 2
+        assert cache.get(profiles[0], "RGB") is first
+        assert cache.get(profiles[1], "RGB") is not None
+
+    def test_no_op_result_cached(self, monkeypatch):
+        """変換不要（sRGB）という判定結果もキャッシュされるテスト"""
+        calls = []
+        original = color._build_transform
+        monkeypatch.setattr(color, "_build_transform", lambda data, mode: calls.append(mode) or original(data, mode))
+
+        for _ in range(3):
+            color.convert_to_srgb(_tagged("RGB", _srgb_profile()))
+
+        assert calls == ["RGB"]
+
+    def test_shared_transform_across_threads(self):
+        """複数のスレッドで同じ変換を同時に適用しても結果が変わらないテスト"""
+        rng = np.random.default_rng(0)
+        images = []
+        for _ in range(8):
+            pixels = np.repeat(rng.integers(0, 256, (64, 16, 3), dtype=np.uint8), 4, axis=1)
+            image = Image.fromarray(pixels)
+            image.info["icc_profile"] = adobe_rgb_profile()
+            images.append(image)
+        expected = [color.convert_to_srgb(image).tobytes() for image in images]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda image: color.convert_to_srgb(image).tobytes(), images * 8))
+
+        assert results == expected * 8
+        assert len(color.transform_cache) == 1
+
+
+class TestConversionColorStage:
+    """変換パイプラインでの色変換のテストクラス"""
+
+    def test_color_stage_recorded(self, tmp_path):
+        """ICCプロファイル付きの入力で color ステージが記録されるテスト"""
+        input_path = tmp_path / "input.png"
+        Image.new("RGB", (64, 64), (100, 150, 200)).save(input_path, icc_profile=adobe_rgb_profile())
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(str(input_path), str(tmp_path / "output.ico"), stats=stats)
+
+        assert "color" in stats.stages
+        with Image.open(tmp_path / "output.ico") as output:
+            assert output.convert("RGB").getpixel((0, 0)) != (100, 150, 200)
+
+    def test_untagged_input_skips_color_stage(self, tmp_path):
+        """ICCプロファイルのない入力では color ステージが記録されないテスト"""
+        input_path = tmp_path / "input.png"
+        Image.new("RGB", (64, 64), (100, 150, 200)).save(input_path)
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(str(input_path), str(tmp_path / "output.ico"), stats=stats)
+
+        assert "color" not in stats.stages
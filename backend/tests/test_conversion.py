@@ -244,6 +244,17 @@ class TestImageConversionService:
                 filename="invalid.png",
             )
 
+    @pytest.mark.asyncio
+    async def test_added_options_are_keyword_only(self, service, sample_png_bytes):
+        """従来の位置引数はそのまま使え、追加したオプションは位置引数で渡せないテスト"""
+        assert service.convert_to_ico(io.BytesIO(sample_png_bytes), "test.png", True, False)[:4] == b"\x00\x00\x01\x00"
+        ico_data = await service.convert_to_ico_async(io.BytesIO(sample_png_bytes), "test.png", True, False)
+        assert ico_data[:4] == b"\x00\x00\x01\x00"
+        with pytest.raises(TypeError):
+            service.convert_to_ico(io.BytesIO(sample_png_bytes), "test.png", True, False, None)
+        with pytest.raises(TypeError):
+            await service.convert_to_ico_async(io.BytesIO(sample_png_bytes), "test.png", True, False, None)
+
     def test_convert_to_ico_with_mock(self, service, sample_png_bytes):
         """IconConverterをモックした変換テスト"""
         file_stream = io.BytesIO(sample_png_bytes)
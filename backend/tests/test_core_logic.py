@@ -4,6 +4,7 @@ import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from PIL import Image
 
@@ -96,6 +97,16 @@ class TestIconConverter:
         assert result.getpixel((0, 0))[3] == 0
         assert result.getpixel((30, 30))[3] == 0
 
+    def test_make_color_transparent_keeps_input(self, converter):
+        """RGBA画像を透明化しても渡した画像は書き換えないテスト"""
+        img = Image.new("RGBA", (10, 10), color=(255, 0, 0, 255))
+
+        result = converter._make_color_transparent(img, (255, 0, 0))
+
+        assert result is not img
+        assert result.getpixel((0, 0))[3] == 0
+        assert img.getpixel((0, 0))[3] == 255
+
     def test_convert_image_to_ico_success(self, converter, temp_image_path, temp_output_path):
         """画像からICOへの変換成功テスト"""
         converter.convert_image_to_ico(
@@ -204,6 +215,7 @@ class TestIconConverter:
             mock_image = MagicMock(spec=Image.Image)
             mock_image.mode = "RGBA"
             mock_image.size = (100, 100)
+            mock_image.info = {}
             mock_open.return_value = mock_image
 
             converter.convert_image_to_ico(
@@ -215,3 +227,71 @@ class TestIconConverter:
             mock_open.assert_called_once_with(temp_image_path)
             # saveが呼ばれたことを確認
             mock_image.save.assert_called_once()
+
+    @pytest.mark.parametrize("mode", ["L", "LA", "RGB"])
+    def test_prepare_frames_after_resize(self, converter, mode):
+        """縮小後に前処理した各サイズの画像が、前処理してから縮小した場合と一致するテスト"""
+        rng = np.random.default_rng(0)
+        img = Image.fromarray(rng.integers(0, 256, (96, 96, 4), dtype=np.uint8), "RGBA").convert(mode)
+
+        image, frames = converter._prepare_frames(img, preserve_transparency=True)
+        expected = converter._resize_for_icon(img.convert("RGBA"))
+
+        assert image is frames[-1]
+        assert [frame.mode for frame in frames] == ["RGBA"] * len(expected)
+        for frame, reference in zip(frames, expected, strict=True):
+            assert np.array_equal(np.asarray(frame), np.asarray(reference))
+
+    def test_convert_sixteen_bit_png(self, converter, tmp_path, temp_output_path):
+        """16bitのグレースケールPNGが白に切り詰められずに変換されるテスト"""
+        input_path = tmp_path / "gray16.png"
+        Image.fromarray(np.full((64, 64), 0x4000, dtype=np.uint16)).save(input_path)
+
+        converter.convert_image_to_ico(str(input_path), temp_output_path)
+
+        with Image.open(temp_output_path) as output:
+            assert output.convert("RGBA").getpixel((0, 0)) == (64, 64, 64, 255)
+
+    def test_convert_palette_auto_transparent_bg(self, converter, tmp_path, temp_output_path):
+        """パレット画像でも背景色がRGBAで推定され、透明化されるテスト"""
+        input_path = tmp_path / "palette.gif"
+        img = Image.new("P", (64, 64), 1)
+        img.putpalette([255, 0, 0, 255, 255, 255])
+        img.paste(0, (16, 16, 48, 48))
+        img.save(input_path)
+
+        converter.convert_image_to_ico(
+            str(input_path), temp_output_path, preserve_transparency=False, auto_transparent_bg=True
+        )
+
+        with Image.open(temp_output_path) as output:
+            rgba = output.convert("RGBA")
+            assert rgba.getpixel((0, 0))[3] == 0
+            assert rgba.getpixel((32, 32)) == (255, 0, 0, 255)
+
+    def test_convert_applies_exif_orientation(self, converter, tmp_path, temp_output_path):
+        """EXIFの向き（6: 時計回りに90度）が縮小後の各サイズに適用されるテスト"""
+        img = Image.new("RGB", (128, 64), (255, 0, 0))
+        img.paste((0, 0, 255), (64, 0, 128, 64))
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        input_path = tmp_path / "rotated.png"
+        img.save(input_path, exif=exif.tobytes())
+
+        converter.convert_image_to_ico(str(input_path), temp_output_path)
+
+        with Image.open(temp_output_path) as output:
+            assert output.info["sizes"] == {(8, 16), (16, 32), (24, 48), (32, 64)}
+            output.size = (32, 64)
+            rgba = output.convert("RGBA")
+            assert rgba.getpixel((16, 8)) == (255, 0, 0, 255)
+            assert rgba.getpixel((16, 56)) == (0, 0, 255, 255)
+
+    def test_normal_orientation_not_transposed(self, converter, temp_image_path, temp_output_path, monkeypatch):
+        """向きが正常な画像では回転・反転が行われないテスト"""
+        calls = []
+        monkeypatch.setattr("core.logic.apply_orientation", lambda image, orientation: calls.append(orientation))
+
+        converter.convert_image_to_ico(temp_image_path, temp_output_path)
+
+        assert calls == []
@@ -1,8 +1,11 @@
 """core/utils.pyのユニットテスト"""
 
 import sys
+from io import BytesIO
 from pathlib import Path
 
+import numpy as np
+import pytest
 from PIL import Image
 
 # backend ディレクトリをパスに追加
@@ -10,23 +13,28 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from core.utils import (  # noqa: E402
+    FRAME_FIRST,
+    FRAME_LARGEST,
+    apply_orientation,
+    can_prepare_after_resize,
+    exif_orientation,
+    frame_count,
     get_file_extension,
     is_transparency_supported,
+    parse_frame_selector,
     prepare_image_for_conversion,
-    setup_logger,
+    select_frame,
+    working_mode,
 )
 
 
-class TestSetupLogger:
-    """setup_logger関数のテストクラス"""
-
-    def test_setup_logger(self):
-        """ロガーのセットアップテスト"""
-        # エラーが発生しないことを確認
-        setup_logger("test_logger")
-
-        # logsディレクトリが作成されることを確認
-        assert Path("logs").exists()
+def _multi_frame(fmt: str, sizes: list[int]) -> Image.Image:
+    """フレームごとに色（とTIFFではサイズ）が異なる複数フレームの画像を作成して開く"""
+    frames = [Image.new("RGB", (size, size), (index * 40, 0, 0)) for index, size in enumerate(sizes)]
+    buffer = BytesIO()
+    frames[0].save(buffer, format=fmt, save_all=True, append_images=frames[1:])
+    buffer.seek(0)
+    return Image.open(buffer)
 
 
 class TestPrepareImageForConversion:
@@ -75,6 +83,139 @@ class TestPrepareImageForConversion:
         # Lモードは変換されない（RGBAでもRGBでもない）
         assert result.mode == "L"
 
+    @pytest.mark.parametrize(
+        ("mode", "preserve_transparency", "expected"),
+        [
+            ("CMYK", True, "RGBA"),
+            ("CMYK", False, "RGB"),
+            ("P", False, "RGB"),
+            ("PA", True, "RGBA"),
+            ("LA", False, "L"),
+            ("1", False, "L"),
+            ("I;16", False, "L"),
+            ("YCbCr", False, "RGB"),
+        ],
+    )
+    def test_working_mode(self, mode, preserve_transparency, expected):
+        """各モードが1回の変換で作業モードになるテスト"""
+        img = Image.new(mode, (8, 8))
+
+        assert working_mode(img, preserve_transparency) == expected
+        assert prepare_image_for_conversion(img, preserve_transparency).mode == expected
+
+    def test_prepare_cmyk(self):
+        """CMYK画像がRGBAに直接変換されるテスト"""
+        img = Image.new("CMYK", (8, 8), color=(0, 255, 255, 0))
+        result = prepare_image_for_conversion(img, preserve_transparency=True)
+
+        assert result.getpixel((0, 0)) == (255, 0, 0, 255)
+
+    def test_prepare_la_keeps_alpha(self):
+        """LA画像のアルファがRGBAのアルファになるテスト"""
+        img = Image.new("LA", (8, 8), color=(100, 30))
+        result = prepare_image_for_conversion(img, preserve_transparency=True)
+
+        assert result.getpixel((0, 0)) == (100, 100, 100, 30)
+
+    @pytest.mark.parametrize("mode", ["P", "L", "RGB"])
+    def test_prepare_transparency_key(self, mode):
+        """透明色の指定（transparency）がRGBAのアルファになるテスト"""
+        img = Image.new(mode, (8, 8))
+        if mode == "P":
+            img.putpalette([255, 0, 0, 0, 0, 255])
+            img.putpixel((0, 0), 1)
+            img.info["transparency"] = 0
+        else:
+            img.info["transparency"] = 0 if mode == "L" else (0, 0, 0)
+            img.putpixel((0, 0), 200 if mode == "L" else (0, 0, 255))
+        result = prepare_image_for_conversion(img, preserve_transparency=True)
+
+        assert result.getpixel((1, 1))[3] == 0
+        assert result.getpixel((0, 0))[3] == 255
+
+    @pytest.mark.parametrize("preserve_transparency", [True, False])
+    def test_prepare_sixteen_bit(self, preserve_transparency):
+        """16bitのグレースケール画像が255に切り詰められず上位8bitで変換されるテスト"""
+        img = Image.fromarray(np.array([[0, 0x1000], [0x8000, 0xFFFF]], dtype=np.uint16))
+        img.info["transparency"] = 0x1000
+        result = prepare_image_for_conversion(img, preserve_transparency)
+
+        pixels = np.asarray(result)
+        if preserve_transparency:
+            assert pixels[..., 0].tolist() == [[0, 16], [128, 255]]
+            assert pixels[..., 3].tolist() == [[255, 0], [255, 255]]
+        else:
+            assert result.mode == "L"
+            assert pixels.tolist() == [[0, 16], [128, 255]]
+
+
+class TestCanPrepareAfterResize:
+    """can_prepare_after_resize関数のテストクラス"""
+
+    @pytest.mark.parametrize(
+        ("mode", "preserve_transparency", "expected"),
+        [
+            ("L", True, True),
+            ("L", False, False),
+            ("LA", True, True),
+            ("LA", False, False),
+            ("RGB", True, True),
+            ("RGBA", False, False),
+            ("CMYK", False, False),
+            ("P", True, False),
+            ("I;16", True, False),
+        ],
+    )
+    def test_modes(self, mode, preserve_transparency, expected):
+        """チャンネルの複製と不透明なアルファの追加だけの変換が対象になるテスト"""
+        assert can_prepare_after_resize(Image.new(mode, (8, 8)), preserve_transparency) is expected
+
+    def test_transparency_key_excluded(self):
+        """透明色の指定がある画像は対象外になるテスト"""
+        img = Image.new("RGB", (8, 8))
+        img.info["transparency"] = (0, 0, 0)
+
+        assert not can_prepare_after_resize(img, preserve_transparency=True)
+
+
+class TestOrientation:
+    """EXIFの向きの取得と適用のテストクラス"""
+
+    @staticmethod
+    def _with_orientation(orientation: int) -> Image.Image:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        buffer = BytesIO()
+        Image.new("RGB", (4, 2)).save(buffer, format="JPEG", exif=exif.tobytes())
+        buffer.seek(0)
+        return Image.open(buffer)
+
+    @pytest.mark.parametrize(("orientation", "expected"), [(6, 6), (8, 8), (1, 1), (0, 1), (9, 1)])
+    def test_exif_orientation(self, orientation, expected):
+        """EXIFの向きが取得でき、不正な値は1（正常）になるテスト"""
+        assert exif_orientation(self._with_orientation(orientation)) == expected
+
+    def test_exif_orientation_missing(self):
+        """EXIFがない画像は1（正常）になるテスト"""
+        assert exif_orientation(Image.new("RGB", (4, 2))) == 1
+
+    @pytest.mark.parametrize(("orientation", "size"), [(2, (4, 2)), (3, (4, 2)), (5, (2, 4)), (6, (2, 4))])
+    def test_apply_orientation(self, orientation, size):
+        """向きに応じて反転・回転され、90度回転では縦横が入れ替わるテスト"""
+        img = Image.new("L", (4, 2))
+        img.putpixel((0, 0), 255)
+
+        result = apply_orientation(img, orientation)
+
+        assert result.size == size
+        assert np.asarray(result).sum() == 255
+
+    def test_apply_normal_orientation_returns_same_image(self):
+        """向きが正常な場合はコピーせずにそのまま返すテスト"""
+        img = Image.new("RGB", (4, 2))
+
+        assert apply_orientation(img, 1) is img
+
 
 class TestGetFileExtension:
     """get_file_extension関数のテストクラス"""
@@ -140,3 +281,71 @@ class TestIsTransparencySupported:
         """未知の形式の透明度非サポートテスト"""
         assert is_transparency_supported("test.txt") is False
         assert is_transparency_supported("test.pdf") is False
+
+
+class TestParseFrameSelector:
+    """parse_frame_selector関数のテストクラス"""
+
+    def test_keywords(self):
+        """first / largest の解釈テスト"""
+        assert parse_frame_selector("first") == FRAME_FIRST
+        assert parse_frame_selector(" LARGEST ") == FRAME_LARGEST
+
+    def test_index(self):
+        """数値のインデックスの解釈テスト"""
+        assert parse_frame_selector("3") == 3
+
+    def test_invalid(self):
+        """不正な指定のテスト"""
+        with pytest.raises(ValueError):
+            parse_frame_selector("-1")
+        with pytest.raises(ValueError):
+            parse_frame_selector("last")
+
+
+class TestSelectFrame:
+    """select_frame関数のテストクラス"""
+
+    def test_first_does_not_count_frames(self):
+        """先頭フレームの指定ではフレーム数を数えないテスト"""
+        image = _multi_frame("GIF", [32, 32, 32])
+
+        assert select_frame(image, FRAME_FIRST) == 0
+        assert image.tell() == 0
+        assert image._n_frames is None
+
+    def test_gif_index(self):
+        """GIFの指定フレームへのシークテスト"""
+        image = _multi_frame("GIF", [32, 32, 32])
+
+        assert select_frame(image, 2) == 2
+        image.load()
+        assert image.convert("RGB").getpixel((0, 0))[0] == 80
+
+    def test_tiff_largest(self):
+        """複数ページのTIFFで最も大きいページを選ぶテスト"""
+        image = _multi_frame("TIFF", [16, 64, 32])
+
+        assert select_frame(image, FRAME_LARGEST) == 1
+        assert image.size == (64, 64)
+
+    def test_canvas_formats_largest_is_first(self):
+        """アニメーションGIFの最大フレームは先頭フレームになるテスト"""
+        image = _multi_frame("GIF", [32, 32])
+
+        assert select_frame(image, FRAME_LARGEST) == 0
+
+    def test_out_of_range(self):
+        """存在しないフレームの指定テスト"""
+        image = _multi_frame("TIFF", [16, 16])
+
+        assert frame_count(image) == 2
+        with pytest.raises(ValueError):
+            select_frame(image, 2)
+
+    def test_single_frame(self):
+        """単一フレームの画像のテスト"""
+        image = Image.new("RGB", (8, 8))
+
+        assert frame_count(image) == 1
+        assert select_frame(image, FRAME_LARGEST) == 0
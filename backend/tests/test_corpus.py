@@ -0,0 +1,106 @@
+"""benchmarks/corpus.pyのユニットテスト"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.corpus import (  # noqa: E402
+    FORMATS,
+    generate,
+    generate_frames,
+    generate_image,
+    generate_sized,
+    write_corpus,
+)
+from core.logic import IconConverter  # noqa: E402
+
+
+class TestCorpus:
+    """コーパス生成のテストクラス"""
+
+    def test_deterministic(self):
+        """同じシードから同じ画像が生成されることのテスト"""
+        first = generate("photo", "png", 128, seed=3)
+        second = generate("photo", "png", 128, seed=3)
+        other = generate("photo", "png", 128, seed=4)
+
+        assert first.data == second.data
+        assert first.data != other.data
+
+    @pytest.mark.parametrize("fmt", FORMATS)
+    def test_all_formats_decodable(self, fmt):
+        """全形式で生成画像をPillowで読み込めることのテスト"""
+        image = generate("photo", fmt, 96)
+
+        with Image.open(io.BytesIO(image.data)) as decoded:
+            decoded.load()
+            assert decoded.size == (96, 96)
+
+    def test_logo_has_solid_background(self):
+        """ロゴ画像の四隅が同じ背景色であることのテスト"""
+        image = generate_image("logo", 200)
+        corners = {image.getpixel(xy) for xy in ((0, 0), (199, 0), (0, 199), (199, 199))}
+
+        assert len(corners) == 1
+        assert IconConverter()._detect_background_color(image) == corners.pop()
+
+    def test_alpha_gradient(self):
+        """アルファグラデーション画像が中間のアルファ値を持つことのテスト"""
+        image = generate_image("alpha_gradient", 64)
+
+        low, high = image.getchannel("A").getextrema()
+        assert image.mode == "RGBA"
+        assert low < 128 < high
+
+    def test_palette_mode(self):
+        """パレット画像のモードテスト"""
+        assert generate_image("palette", 64).mode == "P"
+
+    @pytest.mark.parametrize("fmt", ["gif", "tiff", "webp"])
+    def test_animated_frames(self, fmt):
+        """複数フレーム画像のフレーム数テスト"""
+        frames = generate_frames("animated", 32, 32)
+        image = generate("animated", fmt, 32)
+
+        with Image.open(io.BytesIO(image.data)) as decoded:
+            assert decoded.n_frames == len(frames) == image.frames
+
+    def test_animated_rejects_single_frame_format(self):
+        """複数フレームを保存できない形式の拒否テスト"""
+        with pytest.raises(ValueError):
+            generate_sized("animated", "jpeg", 1024)
+
+    def test_unknown_kind(self):
+        """未知の種類の拒否テスト"""
+        with pytest.raises(ValueError):
+            generate_frames("unknown", 16, 16)
+
+    def test_generate_sized_hits_target(self):
+        """目標ファイルサイズへの到達テスト"""
+        target = 300 * 1024
+        image = generate_sized("photo", "jpeg", target)
+
+        assert abs(len(image.data) / target - 1.0) <= 0.1
+        assert image.target_bytes == target
+
+    def test_generate_sized_respects_max_side(self):
+        """圧縮しやすい画像が寸法上限で打ち切られることのテスト"""
+        image = generate_sized("logo", "png", 50 * 1024 * 1024, max_side=512)
+
+        assert image.width == 512
+
+    def test_write_corpus(self, tmp_path):
+        """コーパスのファイル書き出しテスト"""
+        images = [generate("logo", "gif", 40), generate("photo", "jpeg", 40)]
+
+        paths = write_corpus(images, tmp_path / "corpus")
+
+        assert [path.name for path in paths] == ["logo-40x40-s0.gif", "photo-40x40-s0.jpg"]
+        assert paths[0].read_bytes() == images[0].data
@@ -0,0 +1,178 @@
+"""core/encoding.pyのユニットテスト"""
+
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import encoding, ico  # noqa: E402
+from core.logic import IconConverter  # noqa: E402
+from core.stats import ConversionStats  # noqa: E402
+
+
+def _noise(size: int, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (size, size, 4), dtype=np.uint8), "RGBA")
+
+
+def _flat(size: int) -> Image.Image:
+    """4色だけの画像（半透明の色を含む）"""
+    image = Image.new("RGBA", (size, size), (255, 255, 255, 0))
+    image.paste((255, 0, 0, 255), (0, 0, size // 2, size // 2))
+    image.paste((0, 0, 255, 128), (size // 2, 0, size, size // 2))
+    image.paste((0, 128, 0, 255), (0, size // 2, size // 2, size))
+    return image
+
+
+def _encode(frames: list[Image.Image], profile: str) -> bytes:
+    buffer = BytesIO()
+    IconConverter()._encode_ico(frames[-1], frames, buffer, encoding.get_profile(profile))  # type: ignore[arg-type]
+    return buffer.getvalue()
+
+
+class TestGetProfile:
+    """プロファイルの取得のテストクラス"""
+
+    def test_default_profile(self):
+        """既定のプロファイルが balanced で、Pillowの既定の設定であるテスト"""
+        profile = encoding.get_profile()
+
+        assert profile.name == "balanced"
+        assert profile.uses_pillow_defaults
+        assert not encoding.get_profile("fast").uses_pillow_defaults
+
+    def test_unknown_profile(self):
+        """存在しないプロファイル名で ValueError になるテスト"""
+        with pytest.raises(ValueError, match="fast, balanced, small"):
+            encoding.get_profile("tiny")
+
+
+class TestEncodeProfiles:
+    """プロファイル別のエンコードのテストクラス"""
+
+    def test_balanced_matches_pillow(self):
+        """balanced の出力がPillowのICO保存と同一であるテスト"""
+        frames = [_noise(size) for size in (16, 32, 256)]
+        expected = BytesIO()
+        frames[-1].save(expected, format="ICO", sizes=[f.size for f in frames], append_images=frames)
+
+        assert _encode(frames, "balanced") == expected.getvalue()
+
+    @pytest.mark.parametrize("profile", ["fast", "small"])
+    def test_lossless(self, profile):
+        """fast / small の各項目が元の画素のまま読み込めるテスト"""
+        frames = [_noise(16), _flat(32), _noise(48, seed=1), _flat(256)]
+
+        entries = ico.read_ico(_encode(frames, profile))
+
+        assert [entry.size for entry in entries] == [frame.size for frame in frames]
+        for entry, frame in zip(entries, frames, strict=True):
+            decoded = ico.decode_entry(entry).convert("RGBA")
+            assert np.array_equal(np.asarray(decoded), np.asarray(frame))
+
+    def test_fast_stores_small_sizes_as_bmp(self):
+        """fast は32px以下をBMP、それより大きいサイズをPNGで格納するテスト"""
+        frames = [_noise(16), _noise(32), _noise(48)]
+
+        entries = ico.read_ico(_encode(frames, "fast"))
+
+        assert [entry.is_png for entry in entries] == [False, False, True]
+        with Image.open(BytesIO(_encode(frames, "fast"))) as image:
+            assert image.info["sizes"] == {(16, 16), (32, 32), (48, 48)}
+
+    def test_small_palettizes_flat_images(self):
+        """small は256色以下の画像をパレット化し、balanced より小さくなるテスト"""
+        frames = [_flat(size) for size in (16, 32, 48, 256)]
+
+        small = _encode(frames, "small")
+
+        assert len(small) < len(_encode(frames, "balanced"))
+        for entry in ico.read_ico(small):
+            with Image.open(BytesIO(entry.data)) as png:
+                assert png.mode == "P"
+
+    def test_rgb_frames(self):
+        """透明度を保持しないRGBの画像はアルファなしで格納されるテスト"""
+        frames = [_noise(16).convert("RGB"), _noise(64).convert("RGB")]
+
+        entries = ico.read_ico(_encode(frames, "fast"))
+
+        assert entries[0].bit_count == 24
+        assert ico.decode_entry(entries[1]).mode == "RGB"
+
+    def test_conversion_profile(self, tmp_path):
+        """変換時にプロファイルを指定でき、不正な名前は ValueError になるテスト"""
+        input_path = tmp_path / "input.png"
+        _flat(256).save(input_path)
+        converter = IconConverter()
+
+        converter.convert_image_to_ico(str(input_path), str(tmp_path / "small.ico"), profile="small")
+        converter.convert_image_to_ico(str(input_path), str(tmp_path / "balanced.ico"))
+
+        assert (tmp_path / "small.ico").stat().st_size < (tmp_path / "balanced.ico").stat().st_size
+        with pytest.raises(ValueError):
+            converter.convert_image_to_ico(str(input_path), str(tmp_path / "x.ico"), profile="tiny")
+
+
+class TestQuantize:
+    """8bitのパレット形式への量子化のテストクラス"""
+
+    def _binary(self, size: int, colors: int, seed: int = 0) -> Image.Image:
+        """アルファが0か255だけの、指定した色数の画像"""
+        rng = np.random.default_rng(seed)
+        palette = rng.integers(0, 256, (colors, 4), dtype=np.uint8)
+        palette[:, 3] = np.where(np.arange(colors) % 4 == 0, 0, 255)
+        pixels = palette[rng.integers(0, colors, (size, size))]
+        pixels[pixels[..., 3] == 0] = 0
+        return Image.fromarray(pixels, "RGBA")
+
+    @pytest.mark.parametrize("size", [16, 20, 48])
+    def test_binary_alpha_quantized(self, size):
+        """256色以下でアルファが0か255だけの画像が8bitの項目になり、画素が変わらないテスト"""
+        image = self._binary(size, 200)
+        profile = encoding.get_profile("fast")
+
+        entry, saved = encoding.quantize_frame(image, profile)
+
+        assert entry.bit_count == 8
+        assert saved == len(encoding.encode_frame(image, profile).data) - len(entry.data) > 0
+        assert np.array_equal(np.asarray(ico.decode_entry(entry).convert("RGBA")), np.asarray(image))
+
+    def test_paletted_bmp_mask(self):
+        """8bitのBMPの項目で透明な画素がANDマスクで表されるテスト"""
+        image = self._binary(33, 40)
+        paletted, transparent = encoding._palettize(image)
+
+        entry = encoding._encode_paletted_bmp(paletted, transparent)
+
+        assert not entry.is_png
+        assert np.array_equal(np.asarray(ico.decode_entry(entry).convert("RGBA")), np.asarray(image))
+
+    @pytest.mark.parametrize("image", [_flat(32), _noise(32)])
+    def test_not_quantized(self, image):
+        """半透明の画素を含む画像や256色を超える画像はRGBAのまま格納されるテスト"""
+        profile = encoding.get_profile()
+
+        entry, saved = encoding.quantize_frame(image, profile)
+
+        assert saved == 0
+        assert entry == encoding.encode_frame(image, profile)
+
+    def test_conversion_records_savings(self, tmp_path):
+        """変換時にパレット化した項目数と削減量が stats に記録されるテスト"""
+        input_path = tmp_path / "input.png"
+        Image.fromarray(np.repeat(np.asarray(self._binary(16, 100)), 16, axis=0).repeat(16, axis=1)).save(input_path)
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(str(input_path), str(tmp_path / "out.ico"), stats=stats, palettize=True)
+
+        assert stats.palettized_entries >= 1
+        assert stats.palette_savings() == f"entries={stats.palettized_entries}; bytes={stats.palette_saved_bytes}"
+        assert stats.palette_saved_bytes > 0
@@ -0,0 +1,212 @@
+"""core/ico.pyのユニットテスト"""
+
+import struct
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import ico  # noqa: E402
+from core.logic import IconConverter  # noqa: E402
+from core.stats import ConversionStats  # noqa: E402
+
+
+def _noise(size: int, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (size, size, 4), dtype=np.uint8), "RGBA")
+
+
+def _ico(sizes: list[int], bitmap_format: str = "png") -> bytes:
+    buffer = BytesIO()
+    _noise(max(sizes)).save(buffer, format="ICO", sizes=[(s, s) for s in sizes], bitmap_format=bitmap_format)
+    return buffer.getvalue()
+
+
+class TestReadIcon:
+    """ICO / ICNS の読み込みのテストクラス"""
+
+    def test_png_entries(self):
+        """PNGの項目のサイズとビット数が読み取れるテスト"""
+        entries = ico.read_ico(_ico([16, 32, 256]))
+
+        assert [entry.size for entry in entries] == [(16, 16), (32, 32), (256, 256)]
+        assert all(entry.is_png and entry.bit_count == 32 for entry in entries)
+
+    def test_bmp_entries(self):
+        """BMPの項目はANDマスクを除いた高さで読み取られ、デコードできるテスト"""
+        entries = ico.read_ico(_ico([16, 48], bitmap_format="bmp"))
+
+        assert [entry.size for entry in entries] == [(16, 16), (48, 48)]
+        assert not entries[0].is_png
+        image = ico.decode_entry(entries[1])
+        assert image.size == (48, 48)
+        assert image.mode == "RGBA"
+
+    def test_icns_png_entries(self):
+        """ICNSのPNGの項目だけが読み取られるテスト"""
+        buffer = BytesIO()
+        _noise(256).save(buffer, format="ICNS")
+
+        entries = ico.read_icns(buffer.getvalue())
+
+        assert {entry.size for entry in entries} >= {(32, 32), (64, 64), (128, 128), (256, 256), (512, 512)}
+        assert all(entry.is_png for entry in entries)
+
+    @pytest.mark.parametrize("data", [b"\x00\x00", b"\x00\x00\x02\x00\x01\x00", b"icns\x00\x00\x00\x10"])
+    def test_invalid_ico(self, data):
+        """ICOではないデータで ValueError になるテスト"""
+        with pytest.raises(ValueError):
+            ico.read_ico(data)
+
+    def test_unreadable_entries_skipped(self):
+        """ファイルの範囲外を指す項目や、宣言だけでディレクトリにない項目は読み飛ばされるテスト"""
+        data = bytearray(_ico([16, 32]))
+        data[4:6] = struct.pack("<H", 3)
+        # 2つ目の項目のオフセットをファイルの範囲外にする
+        struct.pack_into("<I", data, 6 + 16 + 12, len(data))
+
+        assert [entry.size for entry in ico.read_ico(bytes(data))] == [(16, 16)]
+
+
+class TestWriteIco:
+    """ICOの書き出しのテストクラス"""
+
+    def test_round_trip(self):
+        """書き出した項目がそのまま読み込め、Pillowでも開けるテスト"""
+        entries = ico.read_ico(_ico([16, 32, 256]))
+        buffer = BytesIO()
+
+        ico.write_ico(entries, buffer)
+
+        assert ico.read_ico(buffer.getvalue()) == entries
+        with Image.open(BytesIO(buffer.getvalue())) as image:
+            assert image.info["sizes"] == {(16, 16), (32, 32), (256, 256)}
+
+    def test_rejects_large_entry(self):
+        """256pxを超える項目は書き出せないテスト"""
+        with pytest.raises(ValueError):
+            ico.write_ico([ico.encode_entry(_noise(512))], BytesIO())
+
+
+class TestRepack:
+    """既存アイコンの再パックのテストクラス"""
+
+    def _convert(self, tmp_path, data: bytes, suffix: str = ".ico", **options) -> tuple[list[ico.IconEntry], list]:
+        input_path = tmp_path / f"input{suffix}"
+        input_path.write_bytes(data)
+        output_path = tmp_path / "output.ico"
+        stats = ConversionStats()
+        IconConverter().convert_image_to_ico(str(input_path), str(output_path), stats=stats, **options)
+        return ico.read_ico(output_path.read_bytes()), list(stats.stages)
+
+    def test_matching_entries_copied(self, tmp_path):
+        """同じサイズの項目が圧縮済みデータのままコピーされるテスト"""
+        data = _ico([16, 32, 48, 64, 128, 256], bitmap_format="bmp")
+
+        output, _ = self._convert(tmp_path, data)
+
+        assert output == ico.read_ico(data)
+
+    def test_missing_sizes_resampled(self, tmp_path, monkeypatch):
+        """足りないサイズだけが、そのサイズ以上で最も小さい項目から生成されるテスト"""
+        data = _ico([16, 64, 256])
+        decoded = []
+        original = ico.decode_entry
+        monkeypatch.setattr("core.logic.decode_entry", lambda entry: decoded.append(entry.size) or original(entry))
+
+        output, stages = self._convert(tmp_path, data)
+
+        inputs = {entry.size: entry for entry in ico.read_ico(data)}
+        assert [entry.size for entry in output] == [(16, 16), (32, 32), (48, 48), (64, 64), (128, 128), (256, 256)]
+        for entry in output:
+            if entry.size in inputs:
+                assert entry.data == inputs[entry.size].data
+        # 32px・48pxは64pxから、128pxは256pxから生成し、同じ項目は1回だけデコードする
+        assert decoded == [(64, 64), (256, 256)]
+        assert {"decode", "resize", "encode"} <= set(stages)
+
+    def test_no_upscaling(self, tmp_path):
+        """入力の最大の項目より大きいサイズは生成しないテスト"""
+        output, _ = self._convert(tmp_path, _ico([16, 48]))
+
+        assert [entry.size for entry in output] == [(16, 16), (32, 32), (48, 48)]
+
+    def test_icns(self, tmp_path):
+        """ICNSのPNGの項目がICOにコピーされるテスト"""
+        buffer = BytesIO()
+        _noise(256).save(buffer, format="ICNS")
+        inputs = {entry.size: entry.data for entry in ico.read_icns(buffer.getvalue())}
+
+        output, _ = self._convert(tmp_path, buffer.getvalue(), suffix=".icns")
+
+        assert [entry.size for entry in output][-1] == (256, 256)
+        assert output[-1].data == inputs[(256, 256)]
+
+    def test_pixel_options_use_full_conversion(self, tmp_path):
+        """画素を変更するオプションでは通常の変換を行うテスト"""
+        data = _ico([16, 256])
+
+        output, stages = self._convert(tmp_path, data, preserve_transparency=False, auto_transparent_bg=True)
+
+        assert "key" in stages
+        assert all(entry.data not in data for entry in output)
+
+    def test_unreadable_icon_falls_back(self, tmp_path, monkeypatch):
+        """項目を読み取れないアイコンは通常の変換に任せるテスト"""
+
+        def unreadable(data):
+            raise ValueError("broken")
+
+        monkeypatch.setattr("core.logic.read_icon_entries", unreadable)
+
+        output, stages = self._convert(tmp_path, _ico([16, 32]))
+
+        assert [entry.size for entry in output] == [(16, 16), (32, 32)]
+
+
+class TestUpdateIco:
+    """既存のICOの項目の差し替えのテストクラス"""
+
+    def test_only_matching_sizes_replaced(self):
+        """同じサイズの項目だけが差し替えられ、他の項目はそのままコピーされるテスト"""
+        data = _ico([16, 32, 48, 256], bitmap_format="bmp")
+        before = ico.read_ico(data)
+
+        after = ico.read_ico(ico.update_ico(data, [_noise(16, seed=1), _noise(32, seed=2)]))
+
+        assert [entry.size for entry in after] == [(16, 16), (32, 32), (48, 48), (256, 256)]
+        assert after[0].is_png and after[1].is_png
+        assert np.array_equal(np.asarray(ico.decode_entry(after[0])), np.asarray(_noise(16, seed=1)))
+        assert after[2:] == before[2:]
+
+    def test_new_size_appended(self):
+        """同じサイズの項目がない画像は末尾に追加されるテスト"""
+        data = _ico([16, 256])
+
+        after = ico.read_ico(ico.update_ico(data, [_noise(24).convert("RGB")]))
+
+        assert [entry.size for entry in after] == [(16, 16), (256, 256), (24, 24)]
+        assert ico.decode_entry(after[2]).mode == "RGBA"
+
+    def test_duplicate_size_entries_collapsed(self):
+        """同じサイズの項目が複数ある場合は最初の位置の1項目に差し替えられるテスト"""
+        entries = ico.read_ico(_ico([16, 32]))
+        duplicated = [entries[0], entries[1], ico.IconEntry(size=(16, 16), bit_count=8, data=entries[0].data)]
+
+        replaced = ico.replace_entries(duplicated, [_noise(16, seed=3)])
+
+        assert [entry.size for entry in replaced] == [(16, 16), (32, 32)]
+        assert replaced[1] == entries[1]
+
+    @pytest.mark.parametrize("images", [[_noise(512)], [_noise(16), _noise(16, seed=1)]])
+    def test_invalid_replacements(self, images):
+        """256pxを超える画像や同じサイズの画像の重複で ValueError になるテスト"""
+        with pytest.raises(ValueError):
+            ico.update_ico(_ico([16, 32]), images)
@@ -0,0 +1,105 @@
+"""core/keying.pyのユニットテスト"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import parallel  # noqa: E402
+from core.keying import key_color  # noqa: E402
+from core.metrics import EXECUTOR_ACTIVE_WORKERS, EXECUTOR_QUEUE_DEPTH  # noqa: E402
+
+
+def _image(size: int = 200) -> Image.Image:
+    """上半分が背景色に近い色、下半分が乱数の色のRGBA画像"""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    pixels[: size // 2, :, :3] = rng.integers(245, 256, (size // 2, size, 3), dtype=np.uint8)
+    return Image.fromarray(pixels, "RGBA")
+
+
+def _reference(image: Image.Image, target_color, tolerance) -> bytes:
+    """画像全体を1つのnumpy式で処理する従来の実装"""
+    pixels = np.array(image)
+    distance = np.sqrt(np.sum((pixels[:, :, :3] - np.array(target_color[:3])) ** 2, axis=2))
+    pixels[distance <= tolerance, 3] = 0
+    return pixels.tobytes()
+
+
+class TestKeyColor:
+    """背景色の透明化のテストクラス"""
+
+    @pytest.mark.parametrize("tolerance", [0, 10, 10.5, 30])
+    def test_matches_whole_image_computation(self, tolerance):
+        """タイル単位の結果が画像全体を1つの式で処理した場合と一致するテスト"""
+        image = _image()
+        expected = _reference(image, (255, 255, 255), tolerance)
+
+        key_color(image, (255, 255, 255), tolerance, tile_pixels=1000)
+
+        assert image.tobytes() == expected
+
+    @pytest.mark.parametrize("tile_pixels", [1, 199, 200, 4000, 1 << 20])
+    def test_tile_size_does_not_change_result(self, tile_pixels):
+        """タイルの大きさ（1行未満・端数の行を含む）によらず結果が同じテスト"""
+        image = _image()
+        expected = _reference(image, (250, 250, 250, 255), 10)
+
+        key_color(image, (250, 250, 250, 255), 10, tile_pixels=tile_pixels)
+
+        assert image.tobytes() == expected
+
+    def test_returns_keyed_count_and_keeps_other_alpha(self):
+        """透明にしたピクセル数を返し、対象外のピクセルのアルファは変えないテスト"""
+        image = Image.new("RGBA", (10, 4), (255, 0, 0, 255))
+        image.paste((0, 0, 255, 128), (0, 2, 10, 4))
+
+        assert key_color(image, (255, 0, 0), tile_pixels=10) == 20
+        assert image.getpixel((0, 0)) == (255, 0, 0, 0)
+        assert image.getpixel((0, 3)) == (0, 0, 255, 128)
+
+    def test_negative_tolerance_keys_nothing(self):
+        """許容範囲が負の場合は何も透明にしないテスト"""
+        image = Image.new("RGBA", (8, 8), (255, 0, 0, 255))
+
+        assert key_color(image, (255, 0, 0), -1) == 0
+        assert image.getpixel((0, 0))[3] == 255
+
+    def test_requires_rgba(self):
+        """RGBA以外の画像を拒否するテスト"""
+        with pytest.raises(ValueError):
+            key_color(Image.new("RGB", (8, 8)), (0, 0, 0))
+
+    def test_parallel_tiles_match_sequential(self, monkeypatch):
+        """タイルをヘルパーで並列に処理しても結果が同じテスト"""
+        monkeypatch.setattr(parallel, "_CPU_COUNT", 8)
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 4)
+        monkeypatch.setattr(EXECUTOR_ACTIVE_WORKERS, "get", lambda: 0)
+        monkeypatch.setattr(EXECUTOR_QUEUE_DEPTH, "get", lambda: 0)
+        image = _image()
+        expected = _reference(image, (255, 255, 255), 10)
+
+        assert key_color(image, (255, 255, 255), 10, tile_pixels=2000) > 0
+        assert image.tobytes() == expected
+
+    def test_working_memory_bounded_by_tile(self):
+        """作業用のメモリがタイルの大きさに収まり、画像全体の大きさのアルファのプレーンも作らないテスト"""
+        image = _image(1024)
+
+        tracemalloc.start()
+        try:
+            key_color(image, (255, 255, 255), 10, tile_pixels=16384)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        # 画像全体を1つの式で処理すると1ピクセルあたり数十バイト（1024pxで30MiB以上）、
+        # 画像全体のアルファのプレーンを作るだけでも1MiBになる
+        assert peak < 1024 * 1024
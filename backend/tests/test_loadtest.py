@@ -0,0 +1,94 @@
+"""負荷試験ツールのユニットテスト"""
+
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# テスト環境を設定（レート制限を無効化）
+os.environ["TESTING"] = "true"
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.loadtest import (  # noqa: E402
+    Upload,
+    build_report,
+    format_table,
+    load_uploads,
+    percentile,
+    run_sweep,
+    summarize,
+)
+from main import app  # noqa: E402
+
+
+class TestSummary:
+    """集計処理のテストクラス"""
+
+    def test_percentile_interpolates(self):
+        """線形補間によるパーセンタイル計算のテスト"""
+        values = [10.0, 20.0, 30.0, 40.0]
+
+        assert percentile(values, 0) == 10.0
+        assert percentile(values, 50) == 25.0
+        assert percentile(values, 100) == 40.0
+        assert percentile([], 99) == 0.0
+
+    def test_summarize_counts_statuses(self):
+        """ステータス別の集計のテスト"""
+        result = summarize(4, [0.1, 0.2, 0.3, 0.4], [200, 429, 503, 0], duration=2.0)
+
+        assert result.requests == 4
+        assert result.requests_per_s == 2.0
+        assert result.success == 1
+        assert result.errors == 3
+        assert result.error_rate == 0.75
+        assert result.status_429 == 1
+        assert result.status_503 == 1
+        assert result.transport_errors == 1
+        assert result.max_ms == 400.0
+
+    def test_load_uploads_from_directory(self, tmp_path, sample_png_bytes):
+        """ディレクトリからの画像読み込みのテスト（画像以外は除外）"""
+        (tmp_path / "a.png").write_bytes(sample_png_bytes)
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        uploads = load_uploads(tmp_path)
+
+        assert [upload.filename for upload in uploads] == ["a.png"]
+        assert uploads[0].content_type == "image/png"
+
+    def test_load_uploads_empty_directory(self, tmp_path):
+        """画像のないディレクトリのテスト"""
+        with pytest.raises(ValueError):
+            load_uploads(tmp_path)
+
+
+class TestSweep:
+    """同時実行数スイープのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_run_sweep_against_app(self, sample_png_bytes, invalid_file_bytes):
+        """アプリに対するスイープ実行のテスト"""
+        uploads = [
+            Upload("test.png", "image/png", sample_png_bytes),
+            Upload("test.txt", "text/plain", invalid_file_bytes),
+        ]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            results = await run_sweep(client, uploads, levels=[1, 2], requests=4, warmup=0)
+
+        assert [result.concurrency for result in results] == [1, 2]
+        for result in results:
+            assert result.requests == 4
+            assert result.success == 2
+            assert result.errors == 2
+            assert result.p50_ms <= result.p95_ms <= result.p99_ms <= result.max_ms
+
+        report = build_report(results, "http://test", uploads)
+        assert len(report["levels"]) == 2
+        assert format_table(results).count("\n") == 2
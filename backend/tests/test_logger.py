@@ -0,0 +1,180 @@
+"""core/logger.pyのユニットテスト"""
+
+import io
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+
+# テスト環境を設定（レート制限を無効化）
+os.environ["TESTING"] = "true"
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import logger as logger_module  # noqa: E402
+from core.logger import flush, setup_logger, should_sample  # noqa: E402
+from core.metrics import LOG_LINES_DROPPED  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture
+def sink():
+    """ログの出力先を差し替え、テスト後に元の設定に戻す"""
+    previous = logger_module._applied_config
+    stream = io.StringIO()
+    yield stream
+    if previous is not None:
+        setup_logger(*previous)
+
+
+def _records(stream: io.StringIO) -> list[dict]:
+    """出力されたJSONログを読み込む（バックグラウンドの書き込み完了を待つ）"""
+    flush()
+    return [json.loads(line)["record"] for line in stream.getvalue().splitlines()]
+
+
+class TestSetupLogger:
+    """setup_logger関数のテストクラス"""
+
+    def test_idempotent(self, sink):
+        """同じ設定での再呼び出しでハンドラーが重複しないテスト"""
+        setup_logger("INFO", sink=sink, sample_rate=1.0)
+        setup_logger("INFO", sink=sink, sample_rate=1.0)
+        logger.info("hello")
+
+        messages = [record["message"] for record in _records(sink)]
+        assert messages.count("hello") == 1
+        assert sum(message.startswith("Logger initialized") for message in messages) == 1
+
+    def test_concurrent_setup(self, sink):
+        """複数のスレッドから同時に呼び出してもハンドラーが1つだけ登録されるテスト"""
+        barrier = threading.Barrier(8)
+
+        def setup():
+            barrier.wait()
+            setup_logger("INFO", sink=sink, sample_rate=1.0)
+
+        threads = [threading.Thread(target=setup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.info("hello")
+
+        messages = [record["message"] for record in _records(sink)]
+        assert messages.count("hello") == 1
+        assert sum(message.startswith("Logger initialized") for message in messages) == 1
+
+    def test_lazy_formatting(self, sink):
+        """引数付きメッセージが出力時に整形されるテスト"""
+        setup_logger("INFO", sink=sink, sample_rate=1.0)
+        logger.info("value={} name={}", 42, "x")
+
+        assert _records(sink)[-1]["message"] == "value=42 name=x"
+
+    def test_sampling_keeps_warnings(self, sink):
+        """サンプリング対象外でもWARNING以上は出力されるテスト"""
+        setup_logger("INFO", sink=sink, sample_rate=0.0)
+        with logger.contextualize(sampled=should_sample()):
+            logger.info("dropped")
+            logger.warning("kept warning")
+            logger.error("kept error")
+
+        messages = [record["message"] for record in _records(sink)]
+        assert "dropped" not in messages
+        assert "kept warning" in messages
+        assert "kept error" in messages
+
+    def test_should_sample(self, sink):
+        """サンプリング率の境界値のテスト"""
+        setup_logger("INFO", sink=sink, sample_rate=1.0)
+        assert should_sample() is True
+
+        setup_logger("INFO", sink=sink, sample_rate=0.0)
+        assert should_sample() is False
+
+
+class TestBackgroundWriter:
+    """バックグラウンド書き込みのテストクラス"""
+
+    def test_full_queue_drops_lines(self):
+        """出力先が詰まってキューが一杯になると、あふれた行を破棄して数えるテスト"""
+        release = threading.Event()
+
+        class StalledStream(io.StringIO):
+            def write(self, message):
+                release.wait(5)
+                return super().write(message)
+
+        stream = StalledStream()
+        writer = logger_module._BackgroundWriter(stream, max_lines=2)
+        dropped = LOG_LINES_DROPPED.labels("queue_full").get()
+        try:
+            writer.write("first\n")
+            # 書き込みスレッドが1行目を取り出して出力先で止まるまで待つ
+            while not writer._queue.empty():
+                threading.Event().wait(0.01)
+            for index in range(5):
+                writer.write(f"line-{index}\n")
+
+            assert LOG_LINES_DROPPED.labels("queue_full").get() - dropped == 3
+        finally:
+            release.set()
+            writer.drain()
+            writer.stop()
+        assert stream.getvalue() == "first\nline-0\nline-1\n"
+
+    def test_write_failure_reported_once(self, monkeypatch):
+        """書き込みの失敗を標準エラー出力に1回だけ報告し、失敗した行を数えるテスト"""
+
+        class BrokenStream(io.StringIO):
+            def write(self, message):
+                raise OSError("disk full")
+
+        stderr = io.StringIO()
+        monkeypatch.setattr(sys, "__stderr__", stderr)
+        failed = LOG_LINES_DROPPED.labels("write_error").get()
+        writer = logger_module._BackgroundWriter(BrokenStream())
+        try:
+            for index in range(3):
+                writer.write(f"line-{index}\n")
+            writer.drain()
+        finally:
+            writer.stop()
+
+        assert LOG_LINES_DROPPED.labels("write_error").get() - failed == 3
+        assert stderr.getvalue().count("Log writer failed") == 1
+        assert "disk full" in stderr.getvalue()
+
+
+class TestRequestLogging:
+    """リクエスト単位のログのテストクラス"""
+
+    def test_request_id_reaches_worker_thread(self, sink, sample_png_bytes):
+        """変換スレッドのログにもリクエストIDが付加されるテスト"""
+        setup_logger("INFO", sink=sink, sample_rate=1.0)
+        response = TestClient(app).post("/api/convert", files={"file": ("test.png", sample_png_bytes, "image/png")})
+
+        records = [record for record in _records(sink) if record["message"].startswith("変換成功")]
+        assert len(records) == 1
+        assert records[0]["extra"]["request_id"] == response.headers["X-Request-ID"]
+
+    def test_unsampled_request_keeps_errors(self, sink, sample_png_bytes, invalid_file_bytes):
+        """サンプリング対象外のリクエストでも失敗は記録されるテスト"""
+        setup_logger("INFO", sink=sink, sample_rate=0.0)
+        client = TestClient(app)
+        client.post("/api/convert", files={"file": ("test.png", sample_png_bytes, "image/png")})
+        failed = client.post("/api/convert", files={"file": ("test.txt", invalid_file_bytes, "text/plain")})
+
+        records = _records(sink)
+        assert not any(record["message"].startswith("変換成功") for record in records)
+        completed = [record for record in records if record["message"] == "Request completed"]
+        assert [record["extra"]["request_id"] for record in completed] == [failed.headers["X-Request-ID"]]
+        assert any(record["level"]["name"] == "WARNING" for record in records)
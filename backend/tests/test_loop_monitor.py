@@ -0,0 +1,150 @@
+"""イベントループ監視のユニットテスト"""
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from loguru import logger
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core.metrics import (  # noqa: E402
+    EVENT_LOOP_LAG,
+    EVENT_LOOP_STALLS,
+    EXECUTOR_ACTIVE_WORKERS,
+    EXECUTOR_QUEUE_DEPTH,
+    EXECUTOR_START_DELAY,
+)
+from services.conversion import _InstrumentedThreadPoolExecutor  # noqa: E402
+from services.loop_monitor import LoopMonitor, in_flight_requests, track_request  # noqa: E402
+
+
+@pytest.fixture
+def warnings():
+    """WARNING以上のログメッセージを収集"""
+    messages: list[str] = []
+    handler_id = logger.add(lambda message: messages.append(message.record["message"]), level="WARNING")
+    yield messages
+    logger.remove(handler_id)
+
+
+def _count(histogram) -> float:
+    return sum(histogram._default_child().snapshot()[0])
+
+
+class TestTrackRequest:
+    """処理中リクエストの登録のテストクラス"""
+
+    def test_registered_while_in_block(self):
+        """`with` ブロックの間だけ処理中として登録されるテスト"""
+        with track_request("req-1"):
+            assert [request_id for request_id, _ in in_flight_requests()] == ["req-1"]
+
+        assert in_flight_requests() == []
+
+    def test_removed_on_error(self):
+        """例外が発生しても登録が解除されるテスト"""
+        with pytest.raises(RuntimeError), track_request("req-1"):
+            raise RuntimeError("boom")
+
+        assert in_flight_requests() == []
+
+
+class TestObserveLag:
+    """イベントループの遅延の記録のテストクラス"""
+
+    def test_below_threshold(self, warnings):
+        """しきい値未満では警告しないテスト"""
+        monitor = LoopMonitor(lag_threshold=0.1)
+        before_lag = _count(EVENT_LOOP_LAG)
+        before_stalls = EVENT_LOOP_STALLS._default_child().get()
+
+        monitor.observe_lag(0.01)
+
+        assert _count(EVENT_LOOP_LAG) == before_lag + 1
+        assert EVENT_LOOP_STALLS._default_child().get() == before_stalls
+        assert warnings == []
+
+    def test_logs_in_flight_requests(self, warnings):
+        """しきい値を超えた場合に処理中のリクエストIDが警告ログに出力されるテスト"""
+        monitor = LoopMonitor(lag_threshold=0.1)
+        before_stalls = EVENT_LOOP_STALLS._default_child().get()
+
+        with track_request("slow-request"):
+            monitor.observe_lag(0.25)
+
+        assert EVENT_LOOP_STALLS._default_child().get() == before_stalls + 1
+        assert len(warnings) == 1
+        assert "0.250s" in warnings[0]
+        assert "slow-request" in warnings[0]
+
+
+class TestProbeExecutor:
+    """スレッドプールの実行開始遅延の計測のテストクラス"""
+
+    def test_records_start_delay(self):
+        """プローブの実行開始までの時間が記録されるテスト"""
+        before = _count(EXECUTOR_START_DELAY)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            LoopMonitor(executor).probe_executor()
+
+        assert _count(EXECUTOR_START_DELAY) == before + 1
+
+    def test_does_not_pile_up_when_saturated(self):
+        """飽和中は前回のプローブが実行されるまで次のプローブを投入しないテスト"""
+        release = threading.Event()
+        before = _count(EXECUTOR_START_DELAY)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(release.wait)
+            monitor = LoopMonitor(executor)
+            monitor.probe_executor()
+            monitor.probe_executor()
+            time.sleep(0.05)
+            release.set()
+
+        assert _count(EXECUTOR_START_DELAY) == before + 1
+
+
+class TestRunForever:
+    """バックグラウンドでの計測のテストクラス"""
+
+    def test_detects_blocked_loop(self, warnings):
+        """イベントループを同期処理で止めると検出されるテスト"""
+
+        async def scenario():
+            monitor = LoopMonitor(interval=0.01, lag_threshold=0.05)
+            task = asyncio.create_task(monitor.run_forever())
+            await asyncio.sleep(0.03)
+            with track_request("blocking-request"):
+                time.sleep(0.15)  # イベントループを止める同期処理
+                await asyncio.sleep(0.03)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+
+        assert any("blocking-request" in message for message in warnings)
+
+    def test_not_counted_as_conversion(self):
+        """プローブが変換用スレッドプールのキュー待ち数・稼働ワーカー数に含まれないテスト"""
+        release = threading.Event()
+        before = _count(EXECUTOR_START_DELAY)
+        with _InstrumentedThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(release.wait)
+            try:
+                gauges = EXECUTOR_QUEUE_DEPTH.get(), EXECUTOR_ACTIVE_WORKERS.get()
+                LoopMonitor(executor).probe_executor()
+                # 変換の実行中にキューで待っているプローブも数えない
+                assert (EXECUTOR_QUEUE_DEPTH.get(), EXECUTOR_ACTIVE_WORKERS.get()) == gauges
+            finally:
+                release.set()
+
+        assert _count(EXECUTOR_START_DELAY) == before + 1
+        assert (EXECUTOR_QUEUE_DEPTH.get(), EXECUTOR_ACTIVE_WORKERS.get()) == (gauges[0], gauges[1] - 1)
@@ -0,0 +1,162 @@
+"""core/metrics.pyのユニットテスト"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core.metrics import (  # noqa: E402
+    Counter,
+    Gauge,
+    Histogram,
+    LatencyWindow,
+    MetricsRegistry,
+    format_label,
+    size_bucket,
+)
+
+
+class TestMetricTypes:
+    """Counter / Gauge / Histogramのテストクラス"""
+
+    def test_counter_with_labels(self):
+        """ラベル付きカウンターの加算テスト"""
+        counter = Counter("test_errors_total", "Errors.", ("error_code",))
+        counter.labels("INVALID_FORMAT").inc()
+        counter.labels("INVALID_FORMAT").inc(2)
+
+        lines = counter.collect()
+        assert "# TYPE test_errors_total counter" in lines
+        assert 'test_errors_total{error_code="INVALID_FORMAT"} 3' in lines
+
+    def test_counter_rejects_negative(self):
+        """カウンターの減算が拒否されることのテスト"""
+        counter = Counter("test_counter_total", "Counter.")
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_labels_count_mismatch(self):
+        """ラベル数不一致のテスト"""
+        counter = Counter("test_labelled_total", "Counter.", ("a", "b"))
+        with pytest.raises(ValueError):
+            counter.labels("only-one")
+
+    def test_gauge_inc_dec_and_function(self):
+        """ゲージの増減と収集時評価関数のテスト"""
+        gauge = Gauge("test_queue_depth", "Queue depth.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        assert gauge.get() == 1
+
+        gauge.set_function(lambda: 7)
+        assert "test_queue_depth 7" in gauge.collect()
+
+    def test_histogram_cumulative_buckets(self):
+        """ヒストグラムの累積バケット出力テスト"""
+        histogram = Histogram("test_duration_seconds", "Duration.", ("stage",), buckets=(0.1, 1.0))
+        child = histogram.labels("decode")
+        child.observe(0.05)
+        child.observe(0.5)
+        child.observe(5.0)
+
+        lines = histogram.collect()
+        assert 'test_duration_seconds_bucket{stage="decode",le="0.1"} 1' in lines
+        assert 'test_duration_seconds_bucket{stage="decode",le="1"} 2' in lines
+        assert 'test_duration_seconds_bucket{stage="decode",le="+Inf"} 3' in lines
+        assert 'test_duration_seconds_sum{stage="decode"} 5.55' in lines
+        assert 'test_duration_seconds_count{stage="decode"} 3' in lines
+
+    def test_histogram_timer(self):
+        """ヒストグラムのタイマーテスト"""
+        histogram = Histogram("test_timer_seconds", "Timer.")
+        with histogram.labels().time():
+            pass
+
+        assert "test_timer_seconds_count 1" in histogram.collect()
+
+    def test_label_value_escaping(self):
+        """ラベル値のエスケープテスト"""
+        counter = Counter("test_escape_total", "Escape.", ("value",))
+        counter.labels('a"b\\c').inc()
+
+        assert 'test_escape_total{value="a\\"b\\\\c"} 1' in counter.collect()
+
+
+class TestMetricsRegistry:
+    """MetricsRegistryのテストクラス"""
+
+    def test_render(self):
+        """レジストリのテキスト出力テスト"""
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("test_render_total", "Render."))
+        counter.inc()
+
+        text = registry.render()
+        assert "# HELP test_render_total Render." in text
+        assert "test_render_total 1" in text
+        assert text.endswith("\n")
+
+    def test_duplicate_registration(self):
+        """同名メトリクスの重複登録テスト"""
+        registry = MetricsRegistry()
+        registry.register(Counter("test_dup_total", "Dup."))
+        with pytest.raises(ValueError):
+            registry.register(Counter("test_dup_total", "Dup."))
+
+
+class TestLabelHelpers:
+    """ラベル値ヘルパーのテストクラス"""
+
+    def test_format_label(self):
+        """拡張子からformatラベルへの変換テスト"""
+        assert format_label("photo.JPG") == "jpeg"
+        assert format_label("/tmp/iconconv_abc.tif") == "tiff"
+        assert format_label("icon.png") == "png"
+        assert format_label("unknown.xyz") == "other"
+        assert format_label("") == "other"
+
+    def test_size_bucket(self):
+        """サイズバケットの境界テスト"""
+        assert size_bucket(0) == "lt_100k"
+        assert size_bucket(100 * 1024) == "100k_1m"
+        assert size_bucket(3 * 1024 * 1024) == "1m_5m"
+        assert size_bucket(10 * 1024 * 1024 - 1) == "5m_10m"
+        assert size_bucket(10 * 1024 * 1024) == "ge_10m"
+
+
+class TestLatencyWindow:
+    """LatencyWindowのテストクラス"""
+
+    def test_percentile(self):
+        """最近傍順位法によるパーセンタイルのテスト"""
+        window = LatencyWindow()
+        for value in range(1, 101):
+            window.observe(value / 100)
+
+        assert window.percentile(95) == 0.95
+        assert window.percentile(50) == 0.5
+        assert window.percentile(0) == 0.01
+
+    def test_empty(self):
+        """観測値がない場合のテスト"""
+        assert LatencyWindow().percentile(95) is None
+
+    def test_expired_samples_are_dropped(self):
+        """期限切れの観測値が破棄されることのテスト"""
+        window = LatencyWindow(max_age=0.0)
+        window.observe(1.0)
+
+        assert window.values() == []
+
+    def test_max_samples(self):
+        """最大件数を超えた古い観測値が破棄されることのテスト"""
+        window = LatencyWindow(max_samples=3)
+        for value in (5.0, 1.0, 2.0, 3.0):
+            window.observe(value)
+
+        assert window.values() == [1.0, 2.0, 3.0]
@@ -15,6 +15,7 @@ from models import (  # noqa: E402
     ConversionResponse,
     ErrorResponse,
     HealthResponse,
+    ReadinessResponse,
 )
 
 
@@ -178,6 +179,23 @@ class TestHealthResponse:
         assert json_data["version"] == "2.0.0"
 
 
+class TestReadinessResponse:
+    """ReadinessResponseモデルのテストクラス"""
+
+    def test_defaults(self):
+        """省略可能なフィールドのデフォルト値のテスト"""
+        response = ReadinessResponse(status="ready", saturation=0.0, queue_depth=0, active_workers=0, max_workers=4)
+
+        assert response.p95_latency_seconds is None
+        assert response.latency_samples == 0
+        assert response.reasons == []
+
+    def test_invalid_status(self):
+        """無効なステータスのテスト"""
+        with pytest.raises(ValidationError):
+            ReadinessResponse(status="healthy", saturation=0.0, queue_depth=0, active_workers=0, max_workers=4)
+
+
 class TestErrorResponse:
     """ErrorResponseモデルのテストクラス"""
 
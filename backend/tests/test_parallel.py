@@ -0,0 +1,187 @@
+"""core/parallel.pyのユニットテスト"""
+
+import contextvars
+import sys
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import ico, parallel  # noqa: E402
+from core.encoding import get_profile  # noqa: E402
+from core.logic import IconConverter  # noqa: E402
+from core.metrics import EXECUTOR_ACTIVE_WORKERS, EXECUTOR_QUEUE_DEPTH, RESIZE_HELPERS_ACTIVE  # noqa: E402
+from core.stats import ConversionStats  # noqa: E402
+
+_request = contextvars.ContextVar("request", default=None)
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    """8CPU・並列数4の環境とし、実行スレッドのゲージを空にする（テスト後に元に戻す）"""
+    monkeypatch.setattr(parallel, "_CPU_COUNT", 8)
+    monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 4)
+    previous = EXECUTOR_ACTIVE_WORKERS.get(), EXECUTOR_QUEUE_DEPTH.get()
+    EXECUTOR_ACTIVE_WORKERS.set(0)
+    EXECUTOR_QUEUE_DEPTH.set(0)
+    yield
+    EXECUTOR_ACTIVE_WORKERS.set(previous[0])
+    EXECUTOR_QUEUE_DEPTH.set(previous[1])
+
+
+class TestFanOut:
+    """ヘルパーの予約のテストクラス"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """RESIZE_PARALLELISM が1以下なら並列化しないテスト"""
+        monkeypatch.setattr(parallel, "_CPU_COUNT", 8)
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 0)
+
+        with parallel.fan_out(6) as workers:
+            assert workers == 1
+
+    def test_reserves_up_to_limit(self, cpus):
+        """上限までヘルパーを予約し、終了時に解放するテスト"""
+        with parallel.fan_out(6) as workers:
+            assert workers == 4
+            assert RESIZE_HELPERS_ACTIVE.get() == 3
+        assert RESIZE_HELPERS_ACTIVE.get() == 0
+
+    def test_limited_by_tasks(self, cpus):
+        """サイズの数より多くは予約しないテスト"""
+        with parallel.fan_out(2) as workers:
+            assert workers == 2
+
+    def test_queued_conversions_disable_fan_out(self, cpus):
+        """実行スレッドを待っている変換があれば並列化しないテスト"""
+        EXECUTOR_QUEUE_DEPTH.set(1)
+
+        with parallel.fan_out(6) as workers:
+            assert workers == 1
+
+    @pytest.mark.parametrize(("active", "expected"), [(1, 4), (4, 2), (7, 1), (8, 1)])
+    def test_idle_cpus_shared_by_active_workers(self, cpus, active, expected):
+        """空いているCPUを変換中の実行スレッドで等分した数までしか予約しないテスト"""
+        EXECUTOR_ACTIVE_WORKERS.set(active)
+
+        with parallel.fan_out(6) as workers:
+            assert workers == expected
+
+    def test_concurrent_reservations_do_not_oversubscribe(self, cpus, monkeypatch):
+        """他の変換が予約中のヘルパーを除いたCPUだけが予約されるテスト"""
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 8)
+
+        with parallel.fan_out(6) as first, parallel.fan_out(6) as second:
+            assert first == 6
+            assert second == 3
+            assert RESIZE_HELPERS_ACTIVE.get() == 7
+
+
+class TestRunParallel:
+    """サイズごとの並列処理のテストクラス"""
+
+    def test_order_preserved_and_helpers_used(self, cpus):
+        """結果が入力の順序で返り、呼び出し元とヘルパーのスレッドで分担されるテスト"""
+        threads = set()
+
+        def work(item):
+            threads.add(threading.current_thread().name)
+            return item * 2
+
+        assert parallel.run_parallel(work, list(range(7)), 3) == [0, 2, 4, 6, 8, 10, 12]
+        assert threading.current_thread().name in threads
+        assert any(name.startswith("iconconv-resize") for name in threads)
+
+    def test_context_propagated(self, cpus):
+        """ヘルパーに呼び出し元のコンテキストが引き継がれるテスト"""
+        token = _request.set("req-1")
+        try:
+            assert parallel.run_parallel(lambda _: _request.get(), [0, 1, 2], 3) == ["req-1"] * 3
+        finally:
+            _request.reset(token)
+
+    def test_exception_propagated(self, cpus):
+        """ヘルパーでの例外が呼び出し元に伝わるテスト"""
+
+        def work(item):
+            if item == 2:
+                raise ValueError("boom")
+            return item
+
+        with pytest.raises(ValueError, match="boom"):
+            parallel.run_parallel(work, [0, 1, 2, 3], 4)
+
+
+class TestParallelConversion:
+    """並列化した変換のテストクラス"""
+
+    @staticmethod
+    def _image() -> Image.Image:
+        rng = np.random.default_rng(0)
+        return Image.fromarray(rng.integers(0, 256, (300, 300, 4), dtype=np.uint8), "RGBA")
+
+    def test_frames_match_sequential(self, cpus, monkeypatch):
+        """並列にリサイズした各サイズの画像が逐次処理と一致するテスト"""
+        image = self._image()
+        parallel_frames = IconConverter()._resize_for_icon(image)
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 0)
+        sequential_frames = IconConverter()._resize_for_icon(image)
+
+        assert [frame.tobytes() for frame in parallel_frames] == [frame.tobytes() for frame in sequential_frames]
+
+    @pytest.mark.parametrize("profile", ["balanced", "small"])
+    def test_entries_match_sequential(self, cpus, monkeypatch, profile):
+        """並列にエンコードした項目が逐次処理（balanced はPillowのICO保存）と一致するテスト"""
+        converter = IconConverter()
+        frames = converter._resize_for_icon(self._image())
+        encoding = get_profile(profile)
+
+        parallel_output = BytesIO()
+        converter._encode_ico(frames[-1], frames, parallel_output, encoding)  # type: ignore[arg-type]
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 0)
+        sequential_output = BytesIO()
+        converter._encode_ico(frames[-1], frames, sequential_output, encoding)  # type: ignore[arg-type]
+
+        parallel_entries = ico.read_ico(parallel_output.getvalue())
+        sequential_entries = ico.read_ico(sequential_output.getvalue())
+        assert [entry.data for entry in parallel_entries] == [entry.data for entry in sequential_entries]
+
+    def test_cpu_seconds_include_helpers(self, cpus, monkeypatch):
+        """ヘルパーで処理したCPU時間も変換のCPU時間に含まれ、逐次処理とほぼ同じになるテスト"""
+        image = Image.fromarray(np.random.default_rng(0).integers(0, 256, (1024, 1024, 4), dtype=np.uint8), "RGBA")
+
+        def cpu_seconds() -> float:
+            converter = IconConverter()
+            stats = ConversionStats()
+            with stats.measure_resources(trace_memory=False):
+                frames = converter._resize_for_icon(image)
+                converter._encode_ico(frames[-1], frames, BytesIO(), get_profile("small"))  # type: ignore[arg-type]
+            return stats.cpu_seconds
+
+        parallel_cpu = cpu_seconds()
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 0)
+        sequential_cpu = cpu_seconds()
+
+        # 呼び出し元のスレッドだけを数えると、逐次処理の3割程度になる
+        assert 0.7 < parallel_cpu / sequential_cpu < 1.4
+
+    def test_palette_savings_recorded(self, cpus, tmp_path):
+        """並列にエンコードした場合もパレット化の削減量が記録されるテスト"""
+        input_path = tmp_path / "palette.png"
+        palette = Image.new("P", (256, 256))
+        palette.putpalette([value for index in range(16) for value in (index * 16, 0, 255 - index * 16)])
+        palette.putdata([(x // 16 + y // 16) % 16 for y in range(256) for x in range(256)])
+        palette.save(input_path)
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(str(input_path), str(tmp_path / "output.ico"), stats=stats, palettize=True)
+
+        assert stats.palettized_entries > 0
+        assert stats.palette_saved_bytes > 0
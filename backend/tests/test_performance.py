@@ -10,12 +10,12 @@ import time
 from pathlib import Path
 
 import pytest
-from PIL import Image
 
 # backend ディレクトリをパスに追加
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
+from benchmarks.corpus import generate_sized  # noqa: E402
 from services.conversion import ImageConversionService  # noqa: E402
 
 
@@ -30,32 +30,19 @@ class TestPerformance:
     def create_test_image(self, size_mb: float) -> bytes:
         """指定サイズのテスト画像を生成
 
+        写真風の合成画像（benchmarks.corpus）を使い、PNG圧縮後のファイルサイズが
+        指定サイズに近くなるよう寸法を調整する。
+
         Args:
             size_mb: 画像サイズ（MB）
 
         Returns:
             bytes: PNG画像のバイナリデータ
         """
-        # 目標サイズに近い画像サイズを計算
-        # PNG圧縮を考慮して、実際のピクセル数を調整
         target_bytes = int(size_mb * 1024 * 1024)
-        # 概算: 1ピクセル = 4バイト（RGBA）、圧縮率約50%
-        pixels = int((target_bytes / 2) ** 0.5)
-
-        # RGB画像を生成（グラデーション）
-        img = Image.new("RGB", (pixels, pixels))
-        for y in range(pixels):
-            for x in range(pixels):
-                r = int((x / pixels) * 255)
-                g = int((y / pixels) * 255)
-                b = 128
-                img.putpixel((x, y), (r, g, b))
-
-        # PNGとして保存
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG", optimize=False)
-        buffer.seek(0)
-        return buffer.getvalue()
+        image = generate_sized("photo", "png", target_bytes)
+        assert abs(len(image.data) / target_bytes - 1.0) <= 0.1, "テスト画像が目標サイズに達していません"
+        return image.data
 
     def test_conversion_time_1mb(self, service):
         """1MB画像の変換時間テスト（ベースライン）"""
@@ -0,0 +1,139 @@
+"""リクエスト単位のプロファイリングのユニットテスト"""
+
+import os
+import pstats
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# テスト環境を設定（レート制限を無効化）
+os.environ["TESTING"] = "true"
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import parallel, profiling  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """プロファイリングを有効化し、保存先を一時ディレクトリにする"""
+    monkeypatch.setattr(profiling, "PROFILE_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+class TestShouldProfile:
+    """プロファイリング対象の判定のテストクラス"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """無効時はトークンがあっても計測しないテスト"""
+        monkeypatch.setattr(profiling, "PROFILE_ENABLED", False)
+        monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+        monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+
+        assert profiling.should_profile("secret") is False
+
+    def test_token(self, profile_dir):
+        """トークン一致時のみ計測するテスト"""
+        assert profiling.should_profile("secret") is True
+        assert profiling.should_profile("wrong") is False
+        assert profiling.should_profile(None) is False
+
+    def test_sample_rate(self, profile_dir, monkeypatch):
+        """サンプリング率1.0では常に計測するテスト"""
+        monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+
+        assert profiling.should_profile(None) is True
+
+
+class TestRunProfiled:
+    """プロファイル保存のテストクラス"""
+
+    def test_saves_profile_by_request_id(self, profile_dir):
+        """リクエストID名でプロファイルが保存されるテスト"""
+        result = profiling.run_profiled("req-1", sum, [1, 2, 3])
+
+        assert result == 6
+        stats = pstats.Stats(str(profile_dir / "req-1.prof"))
+        assert stats.total_calls > 0
+
+    def test_saves_profile_on_error(self, profile_dir):
+        """例外で終了した場合もプロファイルを保存するテスト"""
+
+        def fail() -> None:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            profiling.run_profiled("req-error", fail)
+
+        assert (profile_dir / "req-error.prof").exists()
+
+    def test_unsafe_request_id(self, profile_dir):
+        """パス区切りを含むIDが保存先の外に出ないテスト"""
+        path = profiling.profile_path("../../etc/passwd")
+
+        assert path.parent == profile_dir
+        assert "/" not in path.name
+
+    def test_rotation(self, profile_dir, monkeypatch):
+        """保存件数の上限を超えると古い順に削除されるテスト"""
+        monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+        for index in range(3):
+            profiling.run_profiled(f"req-{index}", sum, [index])
+            os.utime(profile_dir / f"req-{index}.prof", (index, index))
+
+        profiling.run_profiled("req-3", sum, [3])
+
+        assert sorted(path.name for path in profile_dir.glob("*.prof")) == ["req-2.prof", "req-3.prof"]
+
+    def test_fan_out_suspended_while_profiling(self, profile_dir, monkeypatch):
+        """計測中はヘルパースレッドを予約せず、計測後は元に戻るテスト"""
+        monkeypatch.setattr(parallel, "_CPU_COUNT", 8)
+        monkeypatch.setattr(parallel, "RESIZE_PARALLELISM", 4)
+
+        def workers() -> int:
+            with parallel.fan_out(6) as count:
+                return count
+
+        assert profiling.run_profiled("req-fan-out", workers) == 1
+        assert workers() > 1
+
+    def test_busy_profiler_runs_without_profiling(self, profile_dir):
+        """計測中の別リクエストは計測せずに実行されるテスト"""
+        with profiling._profile_lock:
+            result = profiling.run_profiled("req-busy", sum, [1])
+
+        assert result == 1
+        assert not (profile_dir / "req-busy.prof").exists()
+
+
+class TestProfilingEndpoint:
+    """変換APIでのプロファイリングのテストクラス"""
+
+    def test_convert_with_profile_token(self, profile_dir, sample_png_bytes):
+        """トークン付きリクエストのプロファイルが X-Request-ID 名で保存されるテスト"""
+        client = TestClient(app)
+        response = client.post(
+            "/api/convert",
+            files={"file": ("test.png", sample_png_bytes, "image/png")},
+            headers={profiling.PROFILE_HEADER: "secret"},
+        )
+
+        assert response.status_code == 200
+        request_id = response.headers["X-Request-ID"]
+        assert (profile_dir / f"{request_id}.prof").exists()
+
+    def test_convert_without_token(self, profile_dir, sample_png_bytes):
+        """トークンなしのリクエストは計測しないテスト"""
+        client = TestClient(app)
+        response = client.post("/api/convert", files={"file": ("test.png", sample_png_bytes, "image/png")})
+
+        assert response.status_code == 200
+        assert list(profile_dir.glob("*.prof")) == []
@@ -0,0 +1,158 @@
+"""core/stats.pyのユニットテスト"""
+
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core.logic import IconConverter  # noqa: E402
+from core.metrics import CPU_SECONDS, PEAK_MEMORY, QUEUE_WAIT, STAGE_DURATION  # noqa: E402
+from core.stats import ConversionStats, add_helper_cpu  # noqa: E402
+from services.conversion import ImageConversionService  # noqa: E402
+
+
+class TestConversionStats:
+    """ConversionStatsのテストクラス"""
+
+    def test_measure_accumulates(self):
+        """同じステージの計測値が合算されることのテスト"""
+        stats = ConversionStats()
+        stats.add("resize", 0.25)
+        with stats.measure("resize"):
+            pass
+
+        assert stats.stages["resize"] >= 0.25
+
+    def test_server_timing_order_and_unit(self):
+        """Server-Timingがステージ順・ミリ秒で出力されることのテスト"""
+        stats = ConversionStats()
+        stats.add("encode", 0.004)
+        stats.add("read", 0.0012)
+        stats.add("decode", 0.02)
+
+        assert stats.server_timing() == "read;dur=1.2, decode;dur=20.0, encode;dur=4.0"
+
+    def test_server_timing_empty(self):
+        """計測値がない場合のServer-Timingテスト"""
+        assert ConversionStats().server_timing() == ""
+
+    def test_record_metrics(self):
+        """計測結果がヒストグラムに反映されることのテスト"""
+        stats = ConversionStats(input_format="gif", input_bytes=200 * 1024, output_bytes=10)
+        stats.add("decode", 0.01)
+        child = STAGE_DURATION.labels("decode", "gif", "100k_1m")
+        before = sum(child.snapshot()[0])
+
+        stats.record_metrics()
+
+        assert sum(child.snapshot()[0]) == before + 1
+
+
+class TestResourceAccounting:
+    """CPU時間・メモリ使用量の記録のテストクラス"""
+
+    def test_measure_resources_records_cpu(self):
+        """CPU時間が記録され、サンプリング対象外ではピークメモリがNoneのテスト"""
+        stats = ConversionStats()
+        with stats.measure_resources(trace_memory=False):
+            sum(i * i for i in range(200_000))
+
+        assert stats.cpu_seconds > 0
+        assert stats.peak_memory_bytes is None
+        assert stats.rss_growth_bytes >= 0
+
+    def test_helper_cpu_added_to_measured_conversion(self):
+        """ヘルパースレッドのCPU時間が計測中の変換にだけ加算されるテスト"""
+        stats = ConversionStats()
+        add_helper_cpu(5.0)
+        with stats.measure_resources(trace_memory=False):
+            add_helper_cpu(2.0)
+
+        assert 2.0 <= stats.cpu_seconds < 3.0
+
+    def test_measure_resources_traces_memory(self):
+        """サンプリング対象ではtracemallocのピークが記録され、計測後に停止するテスト"""
+        stats = ConversionStats()
+        with stats.measure_resources(trace_memory=True):
+            buffer = np.ones(4 * 1024 * 1024, dtype=np.uint8)
+            del buffer
+
+        assert stats.peak_memory_bytes is not None
+        assert stats.peak_memory_bytes >= 4 * 1024 * 1024
+        assert not tracemalloc.is_tracing()
+
+    def test_resource_fields(self):
+        """ログ用フィールドの単位変換のテスト"""
+        stats = ConversionStats(input_format="png", input_bytes=100, queue_wait=0.0125, cpu_seconds=0.5)
+
+        fields = stats.resource_fields()
+
+        assert fields["queue_wait_ms"] == 12.5
+        assert fields["cpu_ms"] == 500.0
+        assert fields["peak_memory_bytes"] is None
+
+    def test_record_metrics_resources(self):
+        """キュー待ち・CPU時間・ピークメモリがメトリクスに反映されることのテスト"""
+        stats = ConversionStats(input_format="bmp", input_bytes=10, cpu_seconds=0.1, peak_memory_bytes=2**21)
+        queue_child = QUEUE_WAIT.labels("bmp")
+        cpu_child = CPU_SECONDS.labels("bmp", "lt_100k")
+        memory_child = PEAK_MEMORY.labels("bmp", "lt_100k")
+        before = [sum(child.snapshot()[0]) for child in (queue_child, cpu_child, memory_child)]
+
+        stats.record_metrics()
+
+        after = [sum(child.snapshot()[0]) for child in (queue_child, cpu_child, memory_child)]
+        assert after == [count + 1 for count in before]
+
+
+class TestStatsPropagation:
+    """変換統計がIconConverterからサービスまで受け渡されることのテスト"""
+
+    def test_converter_records_stages(self, tmp_path, sample_png_bytes):
+        """IconConverterが各ステージを記録することのテスト"""
+        input_path = tmp_path / "input.png"
+        input_path.write_bytes(sample_png_bytes)
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(
+            str(input_path),
+            str(tmp_path / "output.ico"),
+            preserve_transparency=False,
+            auto_transparent_bg=True,
+            stats=stats,
+        )
+
+        assert set(stats.stages) == {"decode", "key", "resize", "encode"}
+
+    def test_service_fills_same_instance(self, sample_png_bytes):
+        """サービスが渡されたインスタンスに記録することのテスト"""
+        stats = ConversionStats()
+
+        ico_data = ImageConversionService().convert_to_ico(
+            file_content=io.BytesIO(sample_png_bytes),
+            filename="test.png",
+            stats=stats,
+        )
+
+        assert stats.output_bytes == len(ico_data)
+        assert {"decode", "resize", "encode"} <= set(stats.stages)
+        assert "key" not in stats.stages
+
+    async def test_async_service_records_queue_wait_and_cpu(self, sample_png_bytes):
+        """非同期変換でキュー待ち時間とCPU時間が記録されることのテスト"""
+        stats = ConversionStats()
+
+        await ImageConversionService().convert_to_ico_async(
+            file_content=io.BytesIO(sample_png_bytes),
+            filename="test.png",
+            stats=stats,
+        )
+
+        assert stats.queue_wait >= 0
+        assert stats.cpu_seconds > 0
@@ -0,0 +1,194 @@
+"""core/svg.pyのユニットテスト"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import svg  # noqa: E402
+from core.logic import IconConverter  # noqa: E402
+from core.stats import ConversionStats  # noqa: E402
+
+
+def _svg(body: str = "", attributes: str = 'viewBox="0 0 100 100"') -> bytes:
+    namespaces = 'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+    return f"<svg {namespaces} {attributes}>{body}</svg>".encode()
+
+
+class TestParseSvg:
+    """SVGの検査のテストクラス"""
+
+    @pytest.mark.parametrize(
+        ("attributes", "expected"),
+        [
+            ('viewBox="0 0 200 100" width="10" height="10"', (200.0, 100.0)),
+            ('viewBox="0,0,50,150"', (50.0, 150.0)),
+            ('width="300px" height="100"', (300.0, 100.0)),
+            ('width="100%" height="100%"', (1.0, 1.0)),
+            ("", (1.0, 1.0)),
+        ],
+    )
+    def test_intrinsic_size(self, attributes, expected):
+        """viewBox・width / height から固有サイズが求められるテスト"""
+        assert svg.parse_svg(_svg(attributes=attributes)).size == expected
+
+    def test_local_references_allowed(self):
+        """文書内の参照と埋め込みデータは許可されるテスト"""
+        body = (
+            '<defs><linearGradient id="g"/></defs><rect fill="url(#g)" style="stroke: url(\'#g\')"/>'
+            '<use href="#g"/><image xlink:href="data:image/png;base64,AAAA"/>'
+            "<style>rect { fill: url(#g); }</style>"
+        )
+        svg.parse_svg(_svg(body))
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b'<?xml version="1.0"?><!DOCTYPE svg [<!ENTITY xxe SYSTEM "file:///etc/passwd">]>'
+            b'<svg xmlns="http://www.w3.org/2000/svg"><text>&xxe;</text></svg>',
+            b'<?xml-stylesheet href="http://example.com/a.css"?><svg xmlns="http://www.w3.org/2000/svg"/>',
+            _svg('<image href="http://example.com/a.png"/>'),
+            _svg('<image xlink:href="file:///etc/passwd"/>'),
+            _svg('<rect fill="url(http://example.com/a.svg#g)"/>'),
+            _svg("<rect style=\"fill: url( 'https://example.com/p' )\"/>"),
+            _svg("<style>@import 'https://example.com/a.css';</style>"),
+            _svg('<style>rect { background: url("//example.com/a.png") }</style>'),
+        ],
+    )
+    def test_external_references_rejected(self, data):
+        """外部実体・外部リソースへの参照が拒否されるテスト"""
+        with pytest.raises(ValueError):
+            svg.parse_svg(data)
+
+    @pytest.mark.parametrize("data", [b"<svg", b'<html xmlns="http://www.w3.org/1999/xhtml"/>', b"\x89PNG"])
+    def test_not_svg(self, data):
+        """SVGではないデータが拒否されるテスト"""
+        with pytest.raises(ValueError):
+            svg.parse_svg(data)
+
+
+class TestFitSvgSize:
+    """アイコンサイズへの当てはめのテストクラス"""
+
+    def test_scales_up_and_keeps_aspect(self):
+        """ベクターのため小さな固有サイズでも拡大して縦横比を保つテスト"""
+        assert svg.fit_svg_size((20.0, 10.0), (256, 256)) == (256, 128)
+        assert svg.fit_svg_size((10.0, 30.0), (48, 48)) == (16, 48)
+        assert svg.fit_svg_size((1.0, 1000.0), (16, 16)) == (1, 16)
+
+
+class TestRenderers:
+    """レンダラーの選択のテストクラス"""
+
+    def test_unknown_renderer(self):
+        """登録されていないレンダラーを指定した場合のテスト"""
+        with pytest.raises(RuntimeError, match="登録されていません"):
+            svg.get_renderer("no-such-renderer")
+
+    def test_missing_dependency(self, monkeypatch):
+        """依存パッケージがない場合に RuntimeError になるテスト"""
+
+        def missing():
+            raise ImportError("No module named 'cairosvg'")
+
+        monkeypatch.setitem(svg._RENDERERS, "missing", missing)
+        with pytest.raises(RuntimeError, match="利用できません"):
+            svg.get_renderer("missing")
+
+    def test_registered_renderer_is_default(self, svg_renderer):
+        """登録したレンダラーが SVG_RENDERER で選ばれ、再利用されるテスト"""
+        assert svg.get_renderer() is svg_renderer
+        assert svg.get_renderer() is svg.get_renderer("test")
+
+    def test_concurrent_first_use_creates_one_renderer(self, monkeypatch):
+        """初回の取得が同時に来てもレンダラーは1つだけ作成されるテスト"""
+        created = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            created.append(object())
+            time.sleep(0.01)
+            return created[-1]
+
+        monkeypatch.setitem(svg._RENDERERS, "counting", factory)
+        results = []
+
+        def get():
+            barrier.wait()
+            results.append(svg.get_renderer("counting"))
+
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        svg._instances.pop("counting", None)
+
+        assert len(created) == 1
+        assert all(result is created[0] for result in results)
+
+    def test_cairosvg_blocks_external_resources(self):
+        """cairosvg が外部リソースを読み込まないテスト（cairosvg がある場合のみ）"""
+        pytest.importorskip("cairosvg")
+        renderer = svg.CairoSvgRenderer()
+
+        image = renderer.render(_svg('<rect width="100" height="100" fill="#00ff00"/>'), (32, 32))
+        assert image.size == (32, 32)
+        assert image.getpixel((16, 16)) == (0, 255, 0, 255)
+        with pytest.raises(ValueError):
+            renderer._fetch("file:///etc/passwd")
+
+
+class TestSvgConversion:
+    """SVGからICOへの変換のテストクラス"""
+
+    def test_each_size_rendered_directly(self, svg_renderer, sample_svg_bytes, tmp_path):
+        """各アイコンサイズで個別にラスタライズされ、縮小されずにICOに格納されるテスト"""
+        input_path = tmp_path / "logo.svg"
+        input_path.write_bytes(sample_svg_bytes)
+        output_path = tmp_path / "logo.ico"
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(str(input_path), str(output_path), stats=stats)
+
+        expected = [(16, 8), (32, 16), (48, 24), (64, 32), (128, 64), (256, 128)]
+        assert svg_renderer.sizes == expected
+        with Image.open(output_path) as ico:
+            assert sorted(ico.info["sizes"]) == expected
+            ico.size = (256, 128)
+            ico.load()
+            assert ico.mode == "RGBA"
+        assert {"decode", "resize", "encode"} <= set(stats.stages)
+
+    def test_auto_transparent_background(self, svg_renderer, sample_svg_bytes, tmp_path):
+        """自動背景透明化がラスタライズ後の画像に対して実行されるテスト"""
+        input_path = tmp_path / "logo.svg"
+        input_path.write_bytes(sample_svg_bytes)
+        stats = ConversionStats()
+
+        IconConverter().convert_image_to_ico(
+            str(input_path),
+            str(tmp_path / "logo.ico"),
+            preserve_transparency=False,
+            auto_transparent_bg=True,
+            stats=stats,
+        )
+
+        assert len(svg_renderer.sizes) == 6
+        assert "key" in stats.stages
+
+    def test_unsafe_svg_fails(self, svg_renderer, tmp_path):
+        """安全でないSVGは描画せずに変換が失敗するテスト"""
+        input_path = tmp_path / "evil.svg"
+        input_path.write_bytes(_svg('<image href="http://169.254.169.254/latest/meta-data/"/>'))
+
+        with pytest.raises(ValueError):
+            IconConverter().convert_image_to_ico(str(input_path), str(tmp_path / "evil.ico"))
+        assert svg_renderer.sizes == []
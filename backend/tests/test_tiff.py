@@ -0,0 +1,291 @@
+"""core/tiff.pyのユニットテスト"""
+
+import os
+import struct
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image, TiffImagePlugin, TiffTags
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import tiff  # noqa: E402
+from core.logic import IconConverter  # noqa: E402
+
+# テスト環境であることを示す環境変数を設定（レート制限を無効化）
+os.environ["TESTING"] = "true"
+
+from main import app  # noqa: E402
+
+
+def _noise(mode: str, size: tuple[int, int], seed: int = 0) -> Image.Image:
+    """縮小結果の比較で誤差が目立つよう、ランダムな画素の画像を作成"""
+    bands = len(mode)
+    shape = (size[1], size[0], bands) if bands > 1 else (size[1], size[0])
+    return Image.fromarray(np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8), mode)
+
+
+def _tiled_tiff(image: Image.Image, tile: int, compression: str = "tiff_lzw") -> bytes:
+    """タイル分割されたTIFFを作成（Pillowはタイル分割のTIFFを書き出せないため、1タイルずつ圧縮して組み立てる）"""
+    chunks = []
+    tags: TiffImagePlugin.ImageFileDirectory_v2 | None = None
+    for top in range(0, image.height, tile):
+        for left in range(0, image.width, tile):
+            padded = Image.new(image.mode, (tile, tile))
+            padded.paste(image.crop((left, top, min(left + tile, image.width), min(top + tile, image.height))))
+            buffer = BytesIO()
+            padded.save(buffer, format="TIFF", compression=compression, strip_size=1 << 30)
+            single = Image.open(BytesIO(buffer.getvalue()))
+            assert isinstance(single, TiffImagePlugin.TiffImageFile)
+            tags = single.tag_v2
+            offset, count = tags[273][0], tags[279][0]
+            chunks.append(buffer.getvalue()[offset : offset + count])
+
+    assert tags is not None
+    ifd = TiffImagePlugin.ImageFileDirectory_v2(prefix=b"II")
+    for tag in (*tiff._DECODING_TAGS, 284):
+        if tag in tags:
+            ifd[tag] = tags[tag]
+            ifd.tagtype[tag] = tags.tagtype[tag]
+    ifd[256], ifd[257], ifd[322], ifd[323] = image.width, image.height, tile, tile
+    ifd[325] = tuple(len(chunk) for chunk in chunks)
+    ifd[324] = (0,) * len(chunks)
+    for tag in (256, 257, 322, 323, 324, 325):
+        ifd.tagtype[tag] = TiffTags.LONG
+    position = 8 + len(ifd.tobytes(8))
+    offsets = []
+    for chunk in chunks:
+        offsets.append(position)
+        position += len(chunk)
+    ifd[324] = tuple(offsets)
+    return b"II*\x00" + struct.pack("<I", 8) + ifd.tobytes(8) + b"".join(chunks)
+
+
+def _multi_page(pages: list[tuple[Image.Image, dict]]) -> bytes:
+    """ページごとにタグを指定して複数ページのTIFFを作成"""
+    buffer = BytesIO()
+    with TiffImagePlugin.AppendingTiffWriter(buffer) as writer:
+        for page, tiffinfo in pages:
+            page.save(writer, format="TIFF", tiffinfo=tiffinfo)
+            writer.newFrame()
+    return buffer.getvalue()
+
+
+def _sub_ifd_tiff(image: Image.Image, reduced: Image.Image) -> bytes:
+    """縮小画像を SubIFD として持つTIFFを作成"""
+    # 縮小画像のIFDの位置を求めてから SubIFD タグに書き込み、ページの連結を切る
+    placeholder = Image.open(BytesIO(_multi_page([(image, {330: 0}), (reduced, {254: 1})])))
+    placeholder.seek(1)
+    data = bytearray(_multi_page([(image, {330: placeholder._frame_pos[1]}), (reduced, {254: 1})]))
+    first = struct.unpack("<I", data[4:8])[0]
+    entries = struct.unpack("<H", data[first : first + 2])[0]
+    next_ifd = first + 2 + 12 * entries
+    data[next_ifd : next_ifd + 4] = b"\x00\x00\x00\x00"
+    return bytes(data)
+
+
+def _open(data: bytes) -> TiffImagePlugin.TiffImageFile:
+    image = Image.open(BytesIO(data))
+    assert isinstance(image, TiffImagePlugin.TiffImageFile)
+    return image
+
+
+class TestSelectReducedLevel:
+    """縮小画像の選択のテストクラス"""
+
+    def test_smallest_usable_page(self):
+        """必要なサイズを満たす最も小さい縮小画像のページが選ばれるテスト"""
+        base = _noise("RGB", (1200, 900))
+        data = _multi_page([(base, {})] + [(base.resize((w, h)), {254: 1}) for w, h in ((600, 450), (300, 225))])
+
+        level = tiff.select_reduced_level(_open(data), 256)
+
+        assert level.size == (600, 450)
+        assert level.tell() == 1
+
+    def test_ignores_independent_pages(self):
+        """縮小画像フラグのないページや縦横比の異なるページは使わないテスト"""
+        base = _noise("RGB", (1200, 900))
+        data = _multi_page([(base, {}), (base.resize((600, 450)), {}), (base.resize((600, 600)), {254: 1})])
+
+        level = tiff.select_reduced_level(_open(data), 256)
+
+        assert level.size == (1200, 900)
+        assert level.tell() == 0
+
+    def test_sub_ifd(self):
+        """SubIFD の縮小画像が選ばれ、その画素だけが読み込まれるテスト"""
+        base = _noise("RGB", (1000, 700))
+        reduced = base.resize((500, 350))
+        image = _open(_sub_ifd_tiff(base, reduced))
+        assert getattr(image, "n_frames", 1) == 1
+
+        level = tiff.select_reduced_level(image, 256)
+        level.load()
+
+        assert level.size == (500, 350)
+        assert np.array_equal(np.asarray(level), np.asarray(reduced))
+
+
+class TestDecodeTilesReduced:
+    """タイル単位の縮小デコードのテストクラス"""
+
+    @pytest.mark.parametrize(
+        ("mode", "compression"),
+        [("RGB", "tiff_lzw"), ("RGB", "jpeg"), ("RGBA", "tiff_adobe_deflate"), ("L", "raw")],
+    )
+    @pytest.mark.parametrize("factor", [2, 3, 7])
+    def test_tiled_matches_full_decode(self, mode, compression, factor):
+        """タイル単位の縮小結果が全画素をデコードしてから縮小した結果と一致するテスト"""
+        data = _tiled_tiff(_noise(mode, (700, 500)), 128, compression)
+        full = _open(data)
+        full.load()
+
+        reduced = tiff.decode_tiles_reduced(_open(data), factor)
+
+        assert reduced is not None
+        assert np.array_equal(np.asarray(reduced), np.asarray(full.reduce(factor)))
+
+    def test_strips_match_full_decode(self):
+        """ストリップ分割のTIFFでも全画素をデコードしてから縮小した結果と一致するテスト"""
+        buffer = BytesIO()
+        _noise("RGB", (500, 700)).save(buffer, format="TIFF", compression="tiff_lzw", strip_size=5 * 500 * 3)
+        full = _open(buffer.getvalue())
+        full.load()
+
+        reduced = tiff.decode_tiles_reduced(_open(buffer.getvalue()), 3)
+
+        assert reduced is not None
+        assert np.array_equal(np.asarray(reduced), np.asarray(full.reduce(3)))
+
+    def test_unsupported_layout(self):
+        """1ストリップだけのTIFFや縮小できないモードはNoneを返すテスト"""
+        single = BytesIO()
+        _noise("RGB", (300, 300)).save(single, format="TIFF", compression="tiff_lzw", strip_size=1 << 30)
+        palette = BytesIO()
+        _noise("L", (300, 300)).convert("P").save(palette, format="TIFF", strip_size=300)
+
+        assert tiff.decode_tiles_reduced(_open(single.getvalue()), 2) is None
+        assert tiff.decode_tiles_reduced(_open(palette.getvalue()), 2) is None
+
+
+class TestDecodeTiff:
+    """TIFFの縮小デコードのテストクラス"""
+
+    def test_small_image_is_loaded_as_is(self):
+        """縮小の必要がない画像はそのまま読み込まれるテスト"""
+        image = _noise("RGB", (400, 300))
+        buffer = BytesIO()
+        image.save(buffer, format="TIFF")
+
+        decoded = tiff.decode_tiff(_open(buffer.getvalue()), 256)
+
+        assert decoded.size == (400, 300)
+        assert np.array_equal(np.asarray(decoded), np.asarray(image))
+
+    def test_tiled_image_keeps_min_size(self):
+        """タイル分割の大きな画像が、必要なサイズを下回らない範囲で縮小されるテスト"""
+        decoded = tiff.decode_tiff(_open(_tiled_tiff(_noise("RGB", (1100, 800)), 256)), 256)
+
+        assert decoded.size == (367, 267)
+
+    def test_conversion(self, tmp_path):
+        """縮小デコードしたTIFFからICOに256pxまでのすべてのサイズが格納されるテスト"""
+        input_path = tmp_path / "large.tif"
+        input_path.write_bytes(_tiled_tiff(_noise("RGB", (1100, 800)), 256))
+        output_path = tmp_path / "large.ico"
+
+        IconConverter().convert_image_to_ico(str(input_path), str(output_path), preserve_transparency=False)
+
+        with Image.open(output_path) as ico:
+            assert (256, 186) in ico.info["sizes"]
+            assert len(ico.info["sizes"]) == 6
+
+    def test_conversion_keeps_orientation(self, tmp_path):
+        """縮小デコードしたTIFFにもEXIFの向きが適用されるテスト"""
+        input_path = tmp_path / "rotated.tif"
+        _noise("RGB", (1100, 800)).save(input_path, format="TIFF", strip_size=1100 * 3 * 64, tiffinfo={274: 6})
+        output_path = tmp_path / "rotated.ico"
+
+        IconConverter().convert_image_to_ico(str(input_path), str(output_path), preserve_transparency=False)
+
+        with Image.open(output_path) as ico:
+            assert (186, 256) in ico.info["sizes"]
+
+
+class TestVerifyTiff:
+    """TIFFのデコード確認のテストクラス"""
+
+    @staticmethod
+    def _gradient(size: tuple[int, int]) -> Image.Image:
+        """LZWでよく圧縮される（アップロードの上限に収まる）グラデーションの画像"""
+        x = np.linspace(0, 255, size[0], dtype=np.uint8)
+        y = np.linspace(0, 255, size[1], dtype=np.uint8)
+        pixels = np.stack(np.broadcast_arrays(x[None, :], y[:, None], (x[None, :] // 2 + y[:, None] // 2)), axis=2)
+        return Image.fromarray(np.ascontiguousarray(pixels), "RGB")
+
+    @pytest.fixture
+    def loaded_sizes(self, monkeypatch) -> list[tuple[int, int]]:
+        """読み込まれたTIFF（帯単位のデコードで包み直したTIFFを含む）の大きさを記録する"""
+        sizes: list[tuple[int, int]] = []
+        original = TiffImagePlugin.TiffImageFile.load
+
+        def load(image):
+            sizes.append(image.size)
+            return original(image)
+
+        monkeypatch.setattr(TiffImagePlugin.TiffImageFile, "load", load)
+        return sizes
+
+    @staticmethod
+    def _corrupt_tile(data: bytes, tile: int) -> bytes:
+        """指定したタイルの圧縮データを壊したTIFF"""
+        corrupted = bytearray(data)
+        offset = _open(data).tag_v2[324][tile]
+        corrupted[offset : offset + 64] = b"\xff" * 64
+        return bytes(corrupted)
+
+    def test_decodes_band_by_band(self, loaded_sizes):
+        """大きなタイル分割のTIFFはすべての帯を1本ずつデコードし、全体は展開しないテスト"""
+        image = _open(_tiled_tiff(_noise("RGB", (1024, 1024)), 128))
+
+        tiff.verify_tiff(image, 256)
+
+        assert set(loaded_sizes) == {(1024, 128)}
+        assert len(loaded_sizes) >= 1024 // 128
+
+    @pytest.mark.parametrize("tile", [0, -1])
+    def test_corrupt_band_raises(self, tile):
+        """先頭・最後の帯のデータが壊れている場合は例外を送出するテスト"""
+        data = self._corrupt_tile(_tiled_tiff(_noise("RGB", (1024, 1024)), 128), tile)
+
+        with pytest.raises(Exception):  # noqa: B017
+            tiff.verify_tiff(_open(data), 256)
+
+    def test_api_rejects_corrupt_last_tile(self):
+        """最後のタイルだけが壊れたTIFFは変換エラーではなくバリデーションエラーになるテスト"""
+        data = self._corrupt_tile(_tiled_tiff(self._gradient((2048, 1024)), 256), -1)
+        files = {"file": ("corrupt.tiff", BytesIO(data), "image/tiff")}
+
+        response = TestClient(app).post("/api/convert", files=files)
+
+        assert response.status_code == 415
+
+    def test_api_never_decodes_full_resolution(self, loaded_sizes):
+        """APIでの変換（バリデーションを含む）で元の解像度の全画素をデコードしないテスト"""
+        size = (4096, 3072)
+        data = _tiled_tiff(self._gradient(size), 256)
+        files = {"file": ("large.tiff", BytesIO(data), "image/tiff")}
+
+        response = TestClient(app).post("/api/convert", files=files)
+
+        assert response.status_code == 200
+        assert loaded_sizes
+        # 全画素（36MiB）をデコードすると size が記録される。帯単位なら1つの帯（4096x256）まで
+        assert max(width * height for width, height in loaded_sizes) <= size[0] * 256
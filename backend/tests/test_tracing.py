@@ -0,0 +1,244 @@
+"""トレーシングのユニットテスト"""
+
+import json
+import os
+import sys
+import threading
+import uuid
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+# テスト環境を設定（レート制限を無効化）
+os.environ["TESTING"] = "true"
+
+# backend ディレクトリをパスに追加
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core import tracing  # noqa: E402
+from core.metrics import TRACE_SPANS_DROPPED  # noqa: E402
+from main import app  # noqa: E402
+
+
+class _ListExporter:
+    """出力されたスパンをリストに保持する出力先"""
+
+    def __init__(self):
+        self.spans: list[tracing.Span] = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def exporter():
+    """トレーシングを有効化し、テスト後に無効化する"""
+    exporter = _ListExporter()
+    tracing.configure(exporter)
+    yield exporter
+    tracing.configure(None)
+
+
+def _png(size: int = 64) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (size, size), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestDisabled:
+    """トレーシング無効時のテストクラス"""
+
+    def test_noop_span_is_shared(self):
+        """無効時は共有の何もしないスパンが返されるテスト"""
+        assert tracing.is_enabled() is False
+        root = tracing.start_trace(str(uuid.uuid4()), "http.request")
+
+        with root:
+            assert root.recording is False
+            assert tracing.span("decode") is root
+            assert tracing.span("encode") is root
+
+    def test_span_outside_trace_is_noop(self, exporter):
+        """有効時でもトレースの外ではスパンを記録しないテスト"""
+        with tracing.span("decode") as span:
+            span.set_attribute("size", 16)
+        tracing.record_span("queue_wait", 0.1)
+        tracing.flush()
+
+        assert span.recording is False
+        assert exporter.spans == []
+
+
+class TestSpans:
+    """スパンの親子関係と出力のテストクラス"""
+
+    def test_nested_spans(self, exporter):
+        """子スパンが親のトレースIDとスパンIDを引き継ぐテスト"""
+        request_id = str(uuid.uuid4())
+        with tracing.start_trace(request_id, "root") as root:
+            with tracing.span("child") as child:
+                child.set_attribute("size", 16)
+            tracing.record_span("waited", 0.01)
+        tracing.flush()
+
+        spans = {span.name: span for span in exporter.spans}
+        assert root.trace_id == uuid.UUID(request_id).hex
+        assert spans["root"].parent_id is None
+        assert spans["child"].parent_id == root.span_id
+        assert spans["child"].attributes == {"size": 16}
+        assert spans["waited"].parent_id == root.span_id
+        assert spans["waited"].end_ns - spans["waited"].start_ns == pytest.approx(10_000_000, rel=0.01)
+
+    def test_exception_marks_error(self, exporter):
+        """例外が発生したスパンがエラーとして記録されるテスト"""
+        with pytest.raises(ValueError), tracing.start_trace("not-a-uuid", "root"):
+            raise ValueError("boom")
+        tracing.flush()
+
+        (span,) = exporter.spans
+        assert span.error is True
+        assert span.attributes["exception.type"] == "ValueError"
+        assert len(span.trace_id) == 32
+
+
+class TestRequestTrace:
+    """変換リクエストのトレースのテストクラス"""
+
+    def test_conversion_request(self, exporter):
+        """変換リクエストがステージ別のスパンに分割され、X-Request-IDと対応するテスト"""
+        client = TestClient(app)
+        response = client.post(
+            "/api/convert",
+            files={"file": ("test.png", _png(), "image/png")},
+            data={"auto_transparent_bg": "true", "preserve_transparency": "false"},
+        )
+        assert response.status_code == 200
+        tracing.flush()
+
+        trace_id = uuid.UUID(response.headers["X-Request-ID"]).hex
+        spans = [span for span in exporter.spans if span.trace_id == trace_id]
+        by_name = {span.name: span for span in spans}
+        expected = {"http.request", "read", "validate", "queue_wait", "convert", "decode", "key", "resize", "encode"}
+        assert expected <= set(by_name)
+
+        root = by_name["http.request"]
+        assert root.attributes["http.status_code"] == 200
+        assert by_name["queue_wait"].parent_id == root.span_id
+        assert by_name["decode"].parent_id == by_name["convert"].span_id
+        # 変換ステージはスレッドプールのワーカースレッドで記録される
+        assert by_name["decode"].thread.startswith("iconconv")
+
+        sizes = sorted(span.attributes["size"] for span in spans if span.name == "resize.size")
+        assert sizes == [16, 32, 48, 64]
+        assert all(span.parent_id == by_name["resize"].span_id for span in spans if span.name == "resize.size")
+
+
+class TestExporters:
+    """出力先のテストクラス"""
+
+    def _span(self) -> tracing.Span:
+        span = tracing.Span("decode", uuid.uuid4().hex, "00f067aa0ba902b7", start_ns=1_000)
+        span.set_attribute("size", 16)
+        span.end_ns = 2_000_000
+        return span
+
+    def test_json_lines(self, tmp_path):
+        """JSON Lines ファイルに1行1スパンで追記されるテスト"""
+        path = tmp_path / "traces" / "spans.jsonl"
+        exporter = tracing.JsonLinesExporter(path)
+
+        exporter.export([self._span()])
+        exporter.export([self._span()])
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        record = json.loads(lines[0])
+        assert record["name"] == "decode"
+        assert record["parent_id"] == "00f067aa0ba902b7"
+        assert record["duration_ms"] == pytest.approx(1.999)
+        assert record["attributes"] == {"size": 16}
+
+    def test_otlp_payload(self):
+        """OTLP/HTTP（JSON）形式のリクエストボディのテスト"""
+        span = self._span()
+        payload = tracing.OtlpHttpExporter("http://localhost:4318/v1/traces").payload([span])
+
+        resource_spans = payload["resourceSpans"][0]
+        assert resource_spans["resource"]["attributes"][0]["value"] == {"stringValue": tracing.SERVICE_NAME}
+        (otlp_span,) = resource_spans["scopeSpans"][0]["spans"]
+        assert otlp_span["traceId"] == span.trace_id
+        assert otlp_span["parentSpanId"] == "00f067aa0ba902b7"
+        assert otlp_span["startTimeUnixNano"] == "1000"
+        assert {"key": "size", "value": {"intValue": "16"}} in otlp_span["attributes"]
+
+    def test_export_failure_is_ignored(self, exporter, monkeypatch):
+        """出力に失敗してもスパンの記録が止まらないテスト"""
+
+        def fail(spans):
+            raise OSError("collector unavailable")
+
+        monkeypatch.setattr(exporter, "export", fail)
+        with tracing.start_trace(str(uuid.uuid4()), "root"):
+            pass
+        tracing.flush()
+        monkeypatch.undo()
+
+        with tracing.start_trace(str(uuid.uuid4()), "root"):
+            pass
+        tracing.flush()
+        assert len(exporter.spans) == 1
+
+
+class TestBatchProcessor:
+    """スパンの出力キューのテストクラス"""
+
+    def test_full_queue_drops_spans(self):
+        """出力先が詰まってキューが一杯になると、あふれたスパンを破棄して数えるテスト"""
+        release = threading.Event()
+        exported = []
+
+        class StalledExporter(_ListExporter):
+            def export(self, spans):
+                release.wait(5)
+                exported.extend(spans)
+
+        processor = tracing._BatchProcessor(max_spans=2)
+        processor.start(StalledExporter())
+        dropped = TRACE_SPANS_DROPPED.labels("queue_full").get()
+        try:
+            processor.put("first")
+            # 出力スレッドが1件目を取り出して出力先で止まるまで待つ
+            while not processor._queue.empty():
+                threading.Event().wait(0.01)
+            for index in range(5):
+                processor.put(f"span-{index}")
+
+            assert TRACE_SPANS_DROPPED.labels("queue_full").get() - dropped == 3
+        finally:
+            release.set()
+            processor.flush()
+            processor.shutdown()
+        assert exported == ["first", "span-0", "span-1"]
+
+    def test_export_failure_counted(self):
+        """出力に失敗したスパンを数えるテスト"""
+
+        class BrokenExporter(_ListExporter):
+            def export(self, spans):
+                raise OSError("collector unavailable")
+
+        processor = tracing._BatchProcessor()
+        processor.start(BrokenExporter())
+        failed = TRACE_SPANS_DROPPED.labels("export_error").get()
+        processor.put("span")
+        processor.flush()
+        processor.shutdown()
+
+        assert TRACE_SPANS_DROPPED.labels("export_error").get() - failed == 1
@@ -3,11 +3,22 @@
 import io
 
 import pytest
+from PIL import Image
 
 from exceptions import FileSizeExceededError, InvalidFileFormatError
+from services import validation
 from services.validation import ValidationService
 
 
+@pytest.fixture
+def animated_gif_bytes():
+    """3フレームのアニメーションGIF"""
+    frames = [Image.new("RGB", (32, 32), (index * 40, 0, 0)) for index in range(3)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="GIF", save_all=True, append_images=frames[1:])
+    return buffer.getvalue()
+
+
 class TestValidationService:
     """ValidationServiceのテストクラス"""
 
@@ -134,3 +145,98 @@ class TestValidationService:
                 file_content=file_stream,
                 content_type="image/png",
             )
+
+    def test_validate_frame_index(self, animated_gif_bytes):
+        """存在しないフレームを指定した場合の検証"""
+        ValidationService.validate_image_content(io.BytesIO(animated_gif_bytes), frame=2)
+        with pytest.raises(InvalidFileFormatError, match="フレーム"):
+            ValidationService.validate_image_content(io.BytesIO(animated_gif_bytes), frame=3)
+
+    def test_validate_selected_frame(self, corrupt_second_page_tiff_bytes):
+        """指定したフレームが破損している場合は検証で拒否し、他のフレームの指定は通すテスト"""
+        ValidationService.validate_image_content(io.BytesIO(corrupt_second_page_tiff_bytes), frame=0)
+        with pytest.raises(InvalidFileFormatError, match="画像ファイルとして読み込めません"):
+            ValidationService.validate_image_content(io.BytesIO(corrupt_second_page_tiff_bytes), frame=1)
+
+    def test_validate_too_many_frames(self, animated_gif_bytes, monkeypatch):
+        """フレーム数が上限を超える場合の検証"""
+        monkeypatch.setattr(validation, "MAX_FRAMES", 2)
+        file_stream = io.BytesIO(animated_gif_bytes)
+        with pytest.raises(InvalidFileFormatError, match="フレーム数が多すぎます"):
+            ValidationService.validate_image_content(file_stream)
+        assert file_stream.tell() == 0
+
+    def test_validate_file_format_svg_success(self, svg_renderer):
+        """SVG形式の検証（成功）"""
+        ValidationService.validate_file_format("logo.svg", "image/svg+xml")
+        ValidationService.validate_file_format("logo.svg", None)
+
+    def test_validate_file_format_svg_without_renderer(self, monkeypatch):
+        """SVGレンダラーを利用できない環境ではSVGを対応形式に含めないテスト"""
+        from core import svg
+
+        monkeypatch.setattr(svg, "SVG_RENDERER", "no-such-renderer")
+        assert ".svg" not in validation.allowed_extensions()
+        with pytest.raises(InvalidFileFormatError) as exc_info:
+            ValidationService.validate_file_format("logo.svg", None)
+        assert "SVG" not in str(exc_info.value)
+        with pytest.raises(InvalidFileFormatError, match="MIMEタイプ"):
+            ValidationService.validate_file_format("logo.png", "image/svg+xml")
+
+    def test_validate_file_format_icon_success(self):
+        """ICO・ICNS形式の検証（成功）"""
+        ValidationService.validate_file_format("app.ico", "image/x-icon")
+        ValidationService.validate_file_format("app.ico", "image/vnd.microsoft.icon")
+        ValidationService.validate_file_format("app.icns", "image/icns")
+
+    def test_validate_ico_update_success(self):
+        """ICO更新の組み合わせの検証（成功）"""
+        ValidationService.validate_ico_update("app.ico", ["16.png", "32.bmp"])
+
+    @pytest.mark.parametrize(
+        ("filename", "replacements"),
+        [
+            ("app.png", ["16.png"]),
+            ("app.ico", []),
+            ("app.ico", ["16.svg"]),
+            ("app.ico", ["16.ico"]),
+            ("app.ico", [f"{i}.png" for i in range(17)]),
+        ],
+    )
+    def test_validate_ico_update_invalid(self, filename, replacements):
+        """ICO更新の組み合わせの検証（失敗）"""
+        with pytest.raises(InvalidFileFormatError):
+            ValidationService.validate_ico_update(filename, replacements)
+
+    def test_validate_uploaded_svg_success(self, sample_svg_bytes, svg_renderer):
+        """SVGファイルの包括的な検証（成功）"""
+        file_stream = io.BytesIO(sample_svg_bytes)
+        ValidationService.validate_uploaded_file(
+            filename="logo.svg",
+            file_size=len(sample_svg_bytes),
+            file_content=file_stream,
+            content_type="image/svg+xml",
+        )
+        assert file_stream.tell() == 0
+        # 検証ではラスタライズしない
+        assert svg_renderer.sizes == []
+
+    def test_validate_uploaded_svg_external_reference(self, svg_renderer):
+        """外部リソースを参照するSVGの検証"""
+        data = b'<svg xmlns="http://www.w3.org/2000/svg"><image href="file:///etc/passwd"/></svg>'
+        with pytest.raises(InvalidFileFormatError, match="安全でない参照"):
+            ValidationService.validate_svg_content(io.BytesIO(data))
+
+    def test_validate_svg_without_renderer(self, sample_svg_bytes, monkeypatch):
+        """SVGレンダラーを利用できない場合の検証"""
+        from core import svg
+
+        monkeypatch.setattr(svg, "SVG_RENDERER", "no-such-renderer")
+        with pytest.raises(InvalidFileFormatError, match="現在利用できません"):
+            ValidationService.validate_svg_content(io.BytesIO(sample_svg_bytes))
+
+    def test_validate_svg_frame_index(self, sample_svg_bytes, svg_renderer):
+        """SVGで先頭以外のフレームを指定した場合の検証"""
+        ValidationService.validate_svg_content(io.BytesIO(sample_svg_bytes), frame=0)
+        with pytest.raises(InvalidFileFormatError, match="フレーム"):
+            ValidationService.validate_svg_content(io.BytesIO(sample_svg_bytes), frame=1)